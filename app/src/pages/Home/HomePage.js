@@ -12,6 +12,7 @@ import Endpoint from '../../utils/Endpoint';
 const HomePage = () => {
   const [isLoaded, setIsLoaded] = useState(false);
   const [puzzles, setPuzzles] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [redirect, setRedirect] = useState(null);
   const [hidePuzzleId, setHidePuzzleId] = useState(-1);
   const [createModalOpen, setCreateModalOpen] = useState(false);
@@ -41,15 +42,17 @@ const HomePage = () => {
     }
   }, [accessToken, redirectToPuzzle]);
 
-  const updatePuzzles = useCallback((accessToken, setPuzzles) => {
+  // puzzles are fetched as summaries, a page at a time; full boards are loaded by the puzzle page
+  const updatePuzzles = useCallback((accessToken, setPuzzles, cursor = null) => {
     const requestOptions = {
       method: 'GET',
       headers: { Authorization: `Bearer ${accessToken}` },
     };
-    fetch(Endpoint.getPuzzles(), requestOptions).then(res => res.json()).then(data => {
+    fetch(Endpoint.getPuzzles({cursor}), requestOptions).then(res => res.json()).then(data => {
       setIsLoaded(true);
       if (data.puzzles !== undefined) {
-        setPuzzles(data.puzzles);
+        setPuzzles(previous => cursor === null ? data.puzzles : [...previous, ...data.puzzles]);
+        setNextCursor(data.next_cursor ?? null);
       }
     });
   }, []);
@@ -113,6 +116,10 @@ const HomePage = () => {
             />
           ))}
         </div>
+        {nextCursor !== null
+          && (<button className="more-puzzles-btn" onClick={() => updatePuzzles(accessToken, setPuzzles, nextCursor)}>
+            Show more puzzles
+          </button>)}
       </div>
     </PageTemplate>
   );
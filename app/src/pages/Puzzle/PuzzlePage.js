@@ -28,8 +28,14 @@ const PuzzlePage = () => {
   const isMultiplayerGame = players.length > 1;
   const { accessToken } = useContext(CurrentUserContext);
   const socket = useRef(null); 
+  const version = useRef(null);
 
-  const updatePuzzle = useCallback(({pieces, completed, players}) => {
+  const updatePuzzle = useCallback(({pieces, completed, players, version: puzzleVersion}) => {
+    // a snapshot older than the moves already applied is ignored
+    if (version.current !== null && puzzleVersion < version.current) {
+      return;
+    }
+    version.current = puzzleVersion;
     setPieces(
       pieces.sort((pieceA, pieceB) =>
         (pieceA.y_coordinate * 10 + pieceA.x_coordinate) - (pieceB.y_coordinate * 10 + pieceB.x_coordinate)
@@ -42,6 +48,28 @@ const PuzzlePage = () => {
     }
   }, []);
 
+  const applyDelta = useCallback(({pieces, completed, version: deltaVersion, from_version: fromVersion}) => {
+    if (version.current !== null && deltaVersion <= version.current) {
+      return;  // already applied
+    }
+    // a delta holds the pieces changed by a single move, or (when resyncing) by all of the
+    // moves made since its from_version
+    const previousVersion = fromVersion === undefined ? deltaVersion - 1 : fromVersion;
+    if (version.current === null || previousVersion !== version.current) {
+      // some moves were missed; ask for the moves made since the last version seen (or for
+      // the whole puzzle, if no version was seen yet)
+      socket.current.emit('resync', {puzzle_id: puzzleId, version: version.current});
+      return;
+    }
+    version.current = deltaVersion;
+    setPieces(oldPieces => oldPieces.map(piece => {
+      const changed = pieces.find(({x_coordinate: x, y_coordinate: y}) =>
+        x === piece.x_coordinate && y === piece.y_coordinate);
+      return changed ? {...piece, value: changed.value} : piece;
+    }));
+    setSolved(completed);
+  }, [puzzleId]);
+
   const addMessage = useCallback((data) => {
     setMessages(oldMessages => [...oldMessages, data]);
   }, []);
@@ -53,7 +81,14 @@ const PuzzlePage = () => {
     if (currSocket.disconnected) {
       currSocket.connect({query: {auth: accessToken}});
     }
-    currSocket.emit('join', {puzzle_id: puzzleId, token: accessToken});
+    currSocket.emit('join', {puzzle_id: puzzleId}, (ack) => {
+      // the server acknowledges with the locks currently held on the puzzle's pieces
+      if (ack && ack.locks) {
+        setPlayersLockingCells(Object.fromEntries(ack.locks
+          .filter(({player}) => player)
+          .map(({x_coordinate: x, y_coordinate: y, player}) => [coordsToString(x, y), {player, index: -1}])));
+      }
+    });
     
     return () => {
       currSocket.emit('leave', {puzzle_id: puzzleId});
@@ -70,10 +105,8 @@ const PuzzlePage = () => {
   }, [accessToken, puzzleId, updatePuzzle]);
 
   useEffect(() => {  
-    socket.current.on("puzzle_update", ({pieces, completed}) => {
-      console.log(pieces);
-      console.log(completed);
-      updatePuzzle({pieces, completed})
+    socket.current.on("puzzle_update", ({pieces, completed, version}) => {
+      updatePuzzle({pieces, completed, version})
     });
 
     return () => {
@@ -81,6 +114,20 @@ const PuzzlePage = () => {
     };
   }, [socket, updatePuzzle]);
 
+  useEffect(() => {  
+    socket.current.on("puzzle_delta", applyDelta);
+
+    return () => {
+      socket.current.removeAllListeners('puzzle_delta');
+    };
+  }, [socket, applyDelta]);
+
+  useEffect(() => {
+    // locks received before the players were known are given the index of their player
+    setPlayersLockingCells(oldCells => Object.fromEntries(Object.entries(oldCells).map(
+      ([cell, {player}]) => [cell, {player, index: players.findIndex(p => p.id === player.id)}])));
+  }, [players]);
+
   useEffect(() => {  
     socket.current.on("message_update", (data) => {
       console.log('got message:');
@@ -140,6 +187,7 @@ const PuzzlePage = () => {
             gridState={pieces}
             puzzleId={puzzleId}
             solved={solved}
+            version={version}
             ref={socket}
           />
         </div>
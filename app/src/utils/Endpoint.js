@@ -7,7 +7,7 @@ const Endpoint = {
   register: () => `${backendRoot}/register`,
   getPuzzle: ({puzzleId}) => `${backendRoot}/puzzles/${puzzleId}`,
   createPuzzle: ({difficulty, additionalPlayers, size = 3}) => `${backendRoot}/puzzles?difficulty=${difficulty}&size=${size}&additional_players=${additionalPlayers.join(',')}`,
-  getPuzzles: () => `${backendRoot}/puzzles`,
+  getPuzzles: ({cursor = null} = {}) => `${backendRoot}/puzzles?fields=summary${cursor !== null ? `&cursor=${cursor}` : ''}`,
   movePiece: ({puzzleId}) => `${backendRoot}/puzzles/${puzzleId}/piece`,
   getLeaderboard: () => `${backendRoot}/leaderboard`,
   hidePuzzle: ({hidePuzzleId}) => `${backendRoot}/puzzles/${hidePuzzleId}?hidden=True`,
@@ -0,0 +1,14 @@
+#!/bin/bash
+
+if [ -z "$1" ]
+	then
+		benchmark="completion_check"
+	else
+		benchmark="$1"
+fi
+
+current_time=$(date "+%Y.%m.%d-%H.%M.%S")
+filename="$benchmark-$current_time.txt"
+
+# only the results go to the report; warnings and logs (on stderr) are shown but not saved
+cd ./server && python -m benchmarks.$benchmark | tee ../reports/backend/benchmarks/$filename
@@ -2,7 +2,7 @@
 Makes backend a package; this prevents circular import Flask issues that are
 encountered when putting the app in a file where it is imported into models/resources
 and then needs to be re-imported. However, it is still necessary to import the routes,
-decorators and sockets after creation.
+decorators, sockets and commands after creation.
 
 Approach take from Corey Shafer tutorial named
 "Python Flask Tutorial: Full-Featured Web App Part 5 - Package Structure"
@@ -15,6 +15,7 @@ from flask_restful import Api
 from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
 import eventlet
+from .message_queue import socketio_options
 
 
 app = Flask(__name__)
@@ -28,10 +29,23 @@ app.config.from_object(app_settings)
 cors = CORS(app)
 db = SQLAlchemy(app)
 socketio = SocketIO(app, manage_session=True, cors_allowed_origins="*",
-                    async_mode='eventlet', logger=True, engineio_logger=True)
+                    async_mode='eventlet', logger=True, engineio_logger=True,
+                    **socketio_options(app.config['SOCKETIO_MESSAGE_QUEUE']))
 api = Api(app)
 
+from .executor import BoardExecutor  # pylint: disable=wrong-import-position
+from .token_cache import TokenCache   # pylint: disable=wrong-import-position
+from .leaderboard_cache import LeaderboardCache  # pylint: disable=wrong-import-position
+from .lock_manager import DatabaseLockManager, LockManager  # pylint: disable=wrong-import-position
+executor = BoardExecutor(app, sleep=socketio.sleep)
+token_cache = TokenCache(app)
+leaderboard_cache = LeaderboardCache(app)
+# processes that share events through a message queue share their piece locks as well
+lock_manager = (DatabaseLockManager(app) if app.config['SOCKETIO_MESSAGE_QUEUE']
+                else LockManager(app))
+
 
 from . import routes      # pylint: disable=[wrong-import-position, import-self]
 from . import decorators  # pylint: disable=[wrong-import-position, import-self]
 from . import sockets     # pylint: disable=[wrong-import-position, import-self]
+from . import commands    # pylint: disable=[wrong-import-position, import-self]
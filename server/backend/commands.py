@@ -0,0 +1,112 @@
+"""
+Defines the command line commands available through the flask CLI (e.g., `flask pack-puzzles`),
+used for maintenance and deployment tasks such as migrating stored puzzles.
+"""
+from datetime import datetime, timedelta
+import click
+from backend import app, db
+from backend.message_queue import MessageBroker, UNIX_SCHEME
+from backend.models.puzzle_pool import PooledPuzzle
+from backend.models.puzzle_snapshot import PuzzleSnapshot
+from backend.models.sudoku_puzzle import Puzzle
+from backend.models.user_score import UserScore
+from backend.schema import upgrade_schema
+
+
+@app.cli.command('upgrade-db')
+def upgrade_db():
+    """
+    Brings the schema of an existing database up to date: creates the missing tables, and adds
+    the columns and indexes added since to the existing tables. Safe to run more than once.
+    """
+    added = upgrade_schema()
+    click.echo(f"Added {len(added)} columns and indexes"
+               + (f": {', '.join(added)}." if added else "."))
+
+
+@app.cli.command('pack-puzzles')
+def pack_puzzles():
+    """
+    Converts all puzzles stored as individual puzzle pieces to packed storage,
+    committing each puzzle as it is converted. Databases created before packed storage
+    existed are upgraded first.
+    """
+    upgrade_schema()
+    puzzle_ids = [
+        puzzle_id for (puzzle_id,) in
+        db.session.query(Puzzle.id).filter(Puzzle.packed_board.is_(None)).order_by(Puzzle.id)
+    ]
+    for puzzle_id in puzzle_ids:
+        Puzzle.get_puzzle(puzzle_id).convert_to_packed(autocommit=True)
+
+    click.echo(f"Converted {len(puzzle_ids)} puzzles to packed storage.")
+
+
+@app.cli.command('fill-puzzle-pool')
+@click.option('--size', 'sizes', type=int, multiple=True,
+              help='Size of puzzles to generate; may be repeated (default: all pooled sizes).')
+@click.option('--target', type=int, default=None,
+              help='Number of puzzles to hold per size and difficulty bucket.')
+def fill_puzzle_pool(sizes, target):
+    """
+    Pre-generates puzzles for the puzzle pool (e.g., at deploy time), filling every
+    difficulty bucket of the requested sizes up to the target number of puzzles.
+    """
+    sizes = sizes or app.config['PUZZLE_POOL_SIZES']
+    target = app.config['PUZZLE_POOL_TARGET'] if target is None else target
+
+    for size in sizes:
+        for bucket, (low, high) in enumerate(PooledPuzzle.BUCKETS):
+            generated = PooledPuzzle.fill(size, bucket, target)
+            click.echo(f"Size {size}, difficulty {low}-{high}: generated {generated} puzzles.")
+
+
+@app.cli.command('rebuild-user-scores')
+def rebuild_user_scores():
+    """
+    Recomputes the scores of all users on the leaderboard from the completed puzzles
+    (e.g., after the scores were first introduced, or to check their consistency).
+    """
+    stored, changed = UserScore.rebuild()
+    click.echo(f"Rebuilt scores for {stored} users; {changed} scores were out of date.")
+
+
+@app.cli.command('compact-move-journal')
+@click.option('--retention-days', type=float, default=None,
+              help='Days the moves of completed puzzles are kept for (default: '
+                   'MOVE_RETENTION_DAYS).')
+def compact_move_journal(retention_days):
+    """
+    Removes the journaled moves and snapshots of completed puzzles that are older than the
+    retention window, keeping what is needed to rebuild the boards (e.g., run daily).
+    """
+    if retention_days is None:
+        retention_days = app.config['MOVE_RETENTION_DAYS']
+    moves, snapshots = PuzzleSnapshot.compact_journal(
+        datetime.utcnow() - timedelta(days=retention_days)
+    )
+    db.session.commit()
+    click.echo(f"Removed {moves} moves and {snapshots} snapshots of completed puzzles.")
+
+
+@app.cli.command('run-message-broker')
+@click.option('--path', default=None,
+              help='Path of the UNIX socket to listen on (default: from SOCKETIO_MESSAGE_QUEUE).')
+def run_message_broker(path):
+    """
+    Runs the broker that relays web socket events between the server processes of this host,
+    for a SOCKETIO_MESSAGE_QUEUE of 'unix://<path>'.
+    """
+    url = app.config['SOCKETIO_MESSAGE_QUEUE']
+    if path is None and url.startswith(UNIX_SCHEME):
+        path = url[len(UNIX_SCHEME):]
+    if not path:
+        raise click.UsageError("Set SOCKETIO_MESSAGE_QUEUE to 'unix://<path>' or pass --path.")
+
+    try:
+        broker = MessageBroker(path)
+    except OSError as exception:
+        raise click.ClickException(f"Cannot listen on {path}: {exception}") from exception
+    with broker:
+        click.echo(f"Relaying web socket events on {path}.")
+        broker.serve_forever()
@@ -11,6 +11,42 @@ class BaseConfig:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.environ.get('SECRET_KEY')
     CORS_HEADERS = 'Content-Type'
+    PUZZLE_STORAGE = os.environ.get('PUZZLE_STORAGE', 'pieces')  # 'pieces' or 'packed'
+    PUZZLE_POOL_SIZES = [
+        int(size) for size in os.environ.get('PUZZLE_POOL_SIZES', '2,3,4,5').split(',') if size
+    ]
+    PUZZLE_POOL_LOW_WATER = int(os.environ.get('PUZZLE_POOL_LOW_WATER', 2))  # 0 disables refills
+    PUZZLE_POOL_TARGET = int(os.environ.get('PUZZLE_POOL_TARGET', 5))
+    # seconds spent removing pieces while keeping the solution of a new puzzle unique
+    PUZZLE_GENERATION_BUDGET = float(os.environ.get('PUZZLE_GENERATION_BUDGET', 0.1))
+    # the same, for the puzzles generated for the puzzle pool (off the request path)
+    PUZZLE_POOL_GENERATION_BUDGET = float(os.environ.get('PUZZLE_POOL_GENERATION_BUDGET', 5))
+    PUZZLE_SOLVER = os.environ.get('PUZZLE_SOLVER', 'bitmask')  # 'bitmask' or 'py-sudoku'
+    BOARD_EXECUTOR_WORKERS = int(os.environ.get('BOARD_EXECUTOR_WORKERS', os.cpu_count() or 1))
+    BOARD_EXECUTOR_TIMEOUT = float(os.environ.get('BOARD_EXECUTOR_TIMEOUT', 30))  # seconds
+    GOOGLE_AUTH_POOL_SIZE = int(os.environ.get('GOOGLE_AUTH_POOL_SIZE', 10))
+    GOOGLE_AUTH_CONNECT_TIMEOUT = float(os.environ.get('GOOGLE_AUTH_CONNECT_TIMEOUT', 3.05))
+    GOOGLE_AUTH_READ_TIMEOUT = float(os.environ.get('GOOGLE_AUTH_READ_TIMEOUT', 10))
+    GOOGLE_AUTH_RETRIES = int(os.environ.get('GOOGLE_AUTH_RETRIES', 2))
+    GOOGLE_AUTH_BACKOFF_FACTOR = float(os.environ.get('GOOGLE_AUTH_BACKOFF_FACTOR', 0.3))
+    TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))  # 0 disables the cache
+    TOKEN_CACHE_MAX_TTL = int(os.environ.get('TOKEN_CACHE_MAX_TTL', 300))  # seconds
+    TOKEN_CACHE_NEGATIVE_TTL = int(os.environ.get('TOKEN_CACHE_NEGATIVE_TTL', 30))  # seconds
+    PUZZLES_PAGE_SIZE = int(os.environ.get('PUZZLES_PAGE_SIZE', 20))  # puzzles per page by default
+    PUZZLES_MAX_PAGE_SIZE = int(os.environ.get('PUZZLES_MAX_PAGE_SIZE', 100))
+    # journaled moves per page by default; also the most moves a resyncing client is sent
+    MOVES_PAGE_SIZE = int(os.environ.get('MOVES_PAGE_SIZE', 100))
+    MOVES_MAX_PAGE_SIZE = int(os.environ.get('MOVES_MAX_PAGE_SIZE', 1000))
+    SNAPSHOT_INTERVAL = int(os.environ.get('SNAPSHOT_INTERVAL', 100))  # moves; 0 disables them
+    # days the moves of completed puzzles are journaled for (see `flask compact-move-journal`)
+    MOVE_RETENTION_DAYS = float(os.environ.get('MOVE_RETENTION_DAYS', 30))
+    LEADERBOARD_CACHE_SIZE = int(os.environ.get('LEADERBOARD_CACHE_SIZE', 100))  # 0 disables it
+    LEADERBOARD_CACHE_MAX_AGE = int(os.environ.get('LEADERBOARD_CACHE_MAX_AGE', 300))  # seconds
+    PIECE_LOCK_LEASE = float(os.environ.get('PIECE_LOCK_LEASE', 60))  # seconds
+    # seconds between the removals of expired piece locks (announced to the players)
+    PIECE_LOCK_SWEEP_INTERVAL = float(os.environ.get('PIECE_LOCK_SWEEP_INTERVAL', 5))
+    # URL of the queue sharing web socket events between processes (e.g., 'unix:///tmp/sudoku.sock')
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE', '')
 
 
 class DevelopmentConfig(BaseConfig):
@@ -26,12 +62,20 @@ class UnitTestingConfig(BaseConfig):
     """ Testing Configurations """
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = None
+    PUZZLE_POOL_LOW_WATER = 0
+    BOARD_EXECUTOR_WORKERS = 0
+    TOKEN_CACHE_SIZE = 0
+    LEADERBOARD_CACHE_SIZE = 0
 
 
 class IntegrationTestingConfig(BaseConfig):
     """ Testing Configurations """
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI_TEST')
+    PUZZLE_POOL_LOW_WATER = 0
+    BOARD_EXECUTOR_WORKERS = 0
+    TOKEN_CACHE_SIZE = 0
+    LEADERBOARD_CACHE_SIZE = 0
 
 
 class ProductionConfig(BaseConfig):
@@ -2,17 +2,19 @@
 Defines various function/route decorators used in handling requests.
 """
 from flask import make_response, request
-from backend import app, db
+from backend import app
 from backend.resources.authentication import verify_token
+from backend.schema import upgrade_schema
 
 
 @app.before_first_request
 def create_tables():
     """
     Creates all database tables relevant to this application,
-    if the tables do not already exist, before the first request is handed
+    if the tables do not already exist, before the first request is handed; the columns
+    added to existing tables since they were created are added as well (see backend.schema).
     """
-    db.create_all()
+    upgrade_schema()
 
 
 @app.before_request
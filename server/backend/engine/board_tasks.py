@@ -0,0 +1,26 @@
+"""
+CPU-bound work on Sudoku boards, written as top-level functions of plain values so that
+it can be submitted to worker processes (see backend.executor).
+"""
+import random
+from backend.engine.generator import generate
+from backend.engine.solver import get_solver
+
+
+def generate_board(size, difficulty, seed, time_budget=0.1):
+    """
+    Generates a puzzle board of the given size and difficulty (see backend.engine.generator);
+    returns the board (2D array of values, None for empty pieces) along with its solution,
+    and whether the solution is known to be unique. The seed makes the generated board
+    different between worker processes.
+    """
+    generated = generate(size, difficulty, random.Random(seed), time_budget)
+    return generated.board, generated.solution, generated.unique
+
+
+def solve_board(size, board, solver='bitmask'):
+    """
+    Solves a puzzle board of the given size with the named solver (see backend.engine.solver),
+    returning the solved board, or None if the board has no solution.
+    """
+    return get_solver(solver).solve(size, board)
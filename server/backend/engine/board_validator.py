@@ -0,0 +1,114 @@
+"""
+Incremental validation of Sudoku boards.
+
+Rather than re-checking (or re-solving) the whole board whenever a piece changes,
+the validator keeps counters of the values placed in every row, column and box,
+along with a bitmask of the values present in each. Placing or removing a value
+is O(1), and a board is complete once it has no empty pieces and no conflicts.
+"""
+
+
+class BoardValidator:
+    """
+    Keeps per-row, per-column and per-box counters for a Sudoku board of the given size
+    (i.e., a board with size * size rows and columns).
+    """
+
+    def __init__(self, size, board=None):
+        self.size = size
+        self.dimensions = size * size
+        self.values = [None] * (self.dimensions * self.dimensions)
+        self.empty = len(self.values)
+        self.conflicts = 0
+
+        # index 0 of each counter list is unused, as values range from 1 to dimensions
+        units = 3 * self.dimensions
+        self.counts = [[0] * (self.dimensions + 1) for _ in range(units)]
+        self.masks = [0] * units
+
+        if board is not None:
+            for y_coord, row in enumerate(board):
+                for x_coord, value in enumerate(row):
+                    if value is not None:
+                        self.place(x_coord, y_coord, value)
+
+    def units_for(self, x_coord, y_coord):
+        """
+        Returns the indices of the row, column and box counters for a position on the board.
+        """
+        box = (y_coord // self.size) * self.size + x_coord // self.size
+        return y_coord, self.dimensions + x_coord, 2 * self.dimensions + box
+
+    def get_value(self, x_coord, y_coord):
+        """
+        Returns the value currently held at a position on the board.
+        """
+        return self.values[y_coord * self.dimensions + x_coord]
+
+    def place(self, x_coord, y_coord, value):
+        """
+        Places a value (or None, to clear the position) on the board, replacing any value
+        previously held at the position. Returns True if the value conflicts with another
+        value in the same row, column or box.
+        """
+        index = y_coord * self.dimensions + x_coord
+        previous = self.values[index]
+        if previous == value:
+            return self.has_conflict(x_coord, y_coord)
+
+        units = self.units_for(x_coord, y_coord)
+        if previous is None:
+            self.empty -= 1
+        else:
+            for unit in units:
+                self._remove(unit, previous)
+
+        if value is None:
+            self.empty += 1
+        else:
+            for unit in units:
+                self._add(unit, value)
+
+        self.values[index] = value
+        return self.has_conflict(x_coord, y_coord)
+
+    def has_conflict(self, x_coord, y_coord):
+        """
+        Determines if the value at a position appears more than once in its row, column or box.
+        """
+        value = self.get_value(x_coord, y_coord)
+        if value is None:
+            return False
+        return any(self.counts[unit][value] > 1 for unit in self.units_for(x_coord, y_coord))
+
+    def get_candidates(self, x_coord, y_coord):
+        """
+        Returns the values that could be placed at a position without conflicting
+        with the values already placed in its row, column and box.
+        """
+        row, column, box = self.units_for(x_coord, y_coord)
+        used = self.masks[row] | self.masks[column] | self.masks[box]
+        return [value for value in range(1, self.dimensions + 1) if not used & (1 << value)]
+
+    def is_complete(self):
+        """
+        A board is complete when every position holds a value and no values conflict.
+        """
+        return self.empty == 0 and self.conflicts == 0
+
+    def _add(self, unit, value):
+        """Adds a value to the counters of a row, column or box."""
+        count = self.counts[unit][value] + 1
+        self.counts[unit][value] = count
+        if count > 1:
+            self.conflicts += 1
+        self.masks[unit] |= 1 << value
+
+    def _remove(self, unit, value):
+        """Removes a value from the counters of a row, column or box."""
+        count = self.counts[unit][value] - 1
+        self.counts[unit][value] = count
+        if count > 0:
+            self.conflicts -= 1
+        else:
+            self.masks[unit] &= ~(1 << value)
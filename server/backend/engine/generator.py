@@ -0,0 +1,106 @@
+"""
+Generator for Sudoku puzzle boards of any supported size, in bounded time.
+
+A solved board is built from a shifted-row pattern, which is a valid solution for any size,
+and randomized by shuffling the values, the rows within each band, the bands, the columns
+within each stack and the stacks, and by transposing the board.
+
+Pieces are then removed (in random order) until the share of empty pieces matches the
+difficulty, as with the py-sudoku generator:
+  1. A piece is removed if its value is the only candidate left for it, i.e., if the other
+     values of its row, column and box cover every other value. This is an O(1) check with
+     bitmasks, and keeps the solution unique (the puzzle can be solved by filling these
+     pieces back in, in reverse order).
+  2. Further pieces are removed if the solver finds that the solution stays unique, until
+     the time budget is spent.
+  3. Any pieces still needed to reach the difficulty are removed at random; the solution
+     of such puzzles is not guaranteed to be unique (as with very high difficulties, where
+     a unique solution is impossible), and they are reported as such, so that the moves
+     made on them are only judged by the rules rather than against the generated solution.
+"""
+import random
+import time
+from collections import namedtuple
+from backend.engine.solver import BitmaskSolver
+
+GeneratedBoard = namedtuple('GeneratedBoard', ['board', 'solution', 'unique'])
+
+
+def solved_board(size, rng):
+    """
+    Builds a random solved board of the given size.
+    """
+    dimensions = size * size
+    values = list(range(1, dimensions + 1))
+    rng.shuffle(values)
+    board = [[values[(size * (row % size) + row // size + column) % dimensions]
+              for column in range(dimensions)] for row in range(dimensions)]
+
+    rows = [band * size + row
+            for band in rng.sample(range(size), size) for row in rng.sample(range(size), size)]
+    columns = [stack * size + column
+               for stack in rng.sample(range(size), size)
+               for column in rng.sample(range(size), size)]
+    board = [[board[row][column] for column in columns] for row in rows]
+    if rng.random() < 0.5:
+        board = [list(row) for row in zip(*board)]
+    return board
+
+
+def generate(size, difficulty, rng=None, time_budget=0.1, solver=None):
+    """
+    Generates a puzzle board of the given size, where the share of empty pieces is the
+    difficulty (a float between 0 and 1). Returns the board (None for empty pieces), its
+    solution, and whether the solution is known to be unique. Uniqueness checks with the
+    solver stop once the time budget (in seconds) is spent.
+    """
+    rng = rng or random.Random()
+    solver = solver or BitmaskSolver()
+    deadline = time.monotonic() + time_budget
+
+    solution = solved_board(size, rng)
+    board = [row[:] for row in solution]
+    dimensions = size * size
+    target = int(difficulty * dimensions * dimensions)
+    if target <= 0:
+        return GeneratedBoard(board, solution, True)
+
+    # bitmasks of the values in each row, column and box
+    full = (1 << dimensions) - 1
+    rows, columns, boxes = [full] * dimensions, [full] * dimensions, [full] * dimensions
+
+    removed = 0
+    remaining = []
+    for cell in rng.sample(range(dimensions * dimensions), dimensions * dimensions):
+        row, column = divmod(cell, dimensions)
+        box = (row // size) * size + column // size
+        if removed < target and rows[row] | columns[column] | boxes[box] == full:
+            bit = ~(1 << (board[row][column] - 1))
+            rows[row] &= bit
+            columns[column] &= bit
+            boxes[box] &= bit
+            board[row][column] = None
+            removed += 1
+        else:
+            remaining.append((row, column))
+
+    kept = []
+    for index, (row, column) in enumerate(remaining):
+        if removed == target or time.monotonic() > deadline:
+            kept.extend(remaining[index:])
+            break
+        value, board[row][column] = board[row][column], None
+        try:
+            if solver.has_unique_solution(size, board, deadline=deadline):
+                removed += 1
+                continue
+        except TimeoutError:
+            pass  # the budget is spent; the piece is kept, as its removal was not checked
+        board[row][column] = value
+        kept.append((row, column))
+
+    unique = removed == target
+    for row, column in kept[:target - removed]:
+        board[row][column] = None
+
+    return GeneratedBoard(board, solution, unique)
@@ -0,0 +1,55 @@
+"""
+Compact encoding of a Sudoku board, so that a whole board can be stored in a single column.
+
+The board is encoded as one byte per piece (row by row, with 0 for an empty piece),
+followed by a bitmap of the static pieces (bit i of the bitmap is set if piece i is static).
+"""
+
+
+def packed_length(size):
+    """
+    Returns the number of bytes needed to encode a board of the given size.
+    """
+    pieces = size ** 4
+    return pieces + (pieces + 7) // 8
+
+
+def pack_board(board, static):
+    """
+    Encodes a board, given as a 2D array of values (None for an empty piece) and
+    a 2D array of flags that are True for the static pieces.
+    """
+    values = bytearray(value or 0 for row in board for value in row)
+    bitmap = bytearray((len(values) + 7) // 8)
+    for index, is_static in enumerate(flag for row in static for flag in row):
+        if is_static:
+            bitmap[index // 8] |= 1 << (index % 8)
+    return bytes(values + bitmap)
+
+
+def unpack_board(data, size):
+    """
+    Decodes a board of the given size; returns a 2D array of values (None for an empty
+    piece) and a 2D array of flags that are True for the static pieces.
+    """
+    if len(data) != packed_length(size):
+        raise ValueError(f"Packed board has {len(data)} bytes; a board of size {size} "
+                         f"requires {packed_length(size)} bytes.")
+
+    dimensions = size * size
+    pieces = dimensions * dimensions
+    board = [[data[row * dimensions + column] or None for column in range(dimensions)]
+             for row in range(dimensions)]
+    static = [[bool(data[pieces + index // 8] & (1 << (index % 8)))
+               for index in range(row * dimensions, (row + 1) * dimensions)]
+              for row in range(dimensions)]
+    return board, static
+
+
+def set_packed_value(data, size, x_coord, y_coord, value):
+    """
+    Returns a copy of the encoded board with the value of a single piece replaced.
+    """
+    packed = bytearray(data)
+    packed[y_coord * size * size + x_coord] = value or 0
+    return bytes(packed)
@@ -0,0 +1,235 @@
+"""
+Solvers for Sudoku boards of any supported size.
+
+Boards are given as 2D arrays of values, with None for empty pieces. The bitmask solver
+treats the board as an exact cover problem: every piece needs exactly one value, and every
+row, column and box needs every value exactly once. The values still available to each
+row, column and box are kept as bitmasks, so that the candidates of a piece are found with
+a few bitwise operations. Pieces with a single candidate, and values with a single place
+left in a row, column or box, are filled in without guessing; otherwise the search branches
+on the piece with the fewest candidates (the "minimum remaining values" heuristic).
+
+The py-sudoku solver (the generic backtracking solver of the py-sudoku library) remains
+available as a fallback for solving boards only; solutions are counted (e.g., to check that
+a generated puzzle has a unique solution) with the bitmask solver.
+"""
+from abc import ABC, abstractmethod
+import time
+from sudoku import Sudoku
+
+
+class Solver(ABC):
+    """
+    Interface of the Sudoku solvers; solvers that can count solutions also provide
+    count_solutions and has_unique_solution (see BitmaskSolver).
+    """
+    name = None
+
+    @abstractmethod
+    def solve(self, size, board):
+        """
+        Solves the board (without changing it); returns the solved board, or None if
+        the board has no solution.
+        """
+
+
+class _Geometry:
+    """
+    Index tables for a board of a given size: the cells are numbered row by row, and the
+    units (rows, then columns, then boxes) are numbered from 0 to 3 * dimensions - 1.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.dimensions = size * size
+        self.cells = self.dimensions * self.dimensions
+        self.full = (1 << self.dimensions) - 1
+
+        self.cell_units = []
+        self.units = [[] for _ in range(3 * self.dimensions)]
+        for cell in range(self.cells):
+            row, column = divmod(cell, self.dimensions)
+            box = (row // size) * size + column // size
+            units = (row, self.dimensions + column, 2 * self.dimensions + box)
+            self.cell_units.append(units)
+            for unit in units:
+                self.units[unit].append(cell)
+
+
+class BitmaskSolver(Solver):
+    """
+    Exact cover solver using bitmask candidate sets, forced moves and the MRV heuristic.
+    """
+    name = 'bitmask'
+
+    def __init__(self):
+        self.geometries = {}
+
+    def get_geometry(self, size):
+        """
+        Gets the index tables for boards of the given size, building them once per size.
+        """
+        if size not in self.geometries:
+            self.geometries[size] = _Geometry(size)
+        return self.geometries[size]
+
+    def solve(self, size, board):
+        solutions = self.search(size, board, limit=1)
+        return solutions[0] if solutions else None
+
+    def count_solutions(self, size, board, limit=2, deadline=None):
+        """
+        Counts the solutions of the board, stopping once the limit is reached (so a board
+        with a unique solution is one where counting up to 2 returns 1). If a deadline is
+        given (a time.monotonic() value), a TimeoutError is raised once it has passed.
+        """
+        return len(self.search(size, board, limit, deadline))
+
+    def has_unique_solution(self, size, board, deadline=None):
+        """
+        Determines if the board has exactly one solution; see count_solutions for the deadline.
+        """
+        return self.count_solutions(size, board, limit=2, deadline=deadline) == 1
+
+    def search(self, size, board, limit, deadline=None):
+        """
+        Finds up to limit solutions of the board, returned as 2D arrays of values.
+        """
+        geometry = self.get_geometry(size)
+        dimensions = geometry.dimensions
+        if len(board) != dimensions or any(len(row) != dimensions for row in board):
+            raise ValueError(f"Board must have {dimensions} rows and columns for size {size}.")
+
+        values = [0] * geometry.cells
+        used = [0] * len(geometry.units)
+        for cell, value in enumerate(value for row in board for value in row):
+            if value is None:
+                continue
+            if not isinstance(value, int) or not 1 <= value <= dimensions:
+                raise ValueError(f"Invalid value on board ({value}).")
+            if not self.place(geometry, values, used, cell, 1 << (value - 1)):
+                return []  # the values given on the board conflict
+
+        solutions = []
+        self.search_from(geometry, values, used, limit, solutions, deadline)
+        return [[solution[row * dimensions:(row + 1) * dimensions] for row in range(dimensions)]
+                for solution in solutions]
+
+    @staticmethod
+    def place(geometry, values, used, cell, bit):
+        """
+        Places the value (given as a bit) on a cell; returns False if the value was
+        already used in the cell's row, column or box.
+        """
+        first, second, third = geometry.cell_units[cell]
+        if (used[first] | used[second] | used[third]) & bit:
+            return False
+        values[cell] = bit.bit_length()
+        used[first] |= bit
+        used[second] |= bit
+        used[third] |= bit
+        return True
+
+    def propagate(self, geometry, values, used):
+        """
+        Fills in forced values until there are none left: pieces with a single candidate,
+        and values with a single place left in a unit. Returns False on a contradiction.
+        """
+        full = geometry.full
+        cell_units = geometry.cell_units
+        changed = True
+        while changed:
+            changed = False
+            for cell in range(geometry.cells):
+                if values[cell]:
+                    continue
+                first, second, third = cell_units[cell]
+                candidates = full & ~(used[first] | used[second] | used[third])
+                if not candidates:
+                    return False
+                if not candidates & (candidates - 1):
+                    self.place(geometry, values, used, cell, candidates)
+                    changed = True
+
+            for unit, cells in enumerate(geometry.units):
+                missing = full & ~used[unit]
+                if not missing:
+                    continue
+                once = twice = 0
+                for cell in cells:
+                    if not values[cell]:
+                        first, second, third = cell_units[cell]
+                        candidates = full & ~(used[first] | used[second] | used[third])
+                        twice |= once & candidates
+                        once |= candidates
+                if missing & ~once:
+                    return False  # a missing value has no place left in the unit
+
+                singles = missing & once & ~twice
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    # the single place may have been taken by another forced value since
+                    if not any(self.place(geometry, values, used, cell, bit)
+                               for cell in cells if not values[cell]):
+                        return False
+                    changed = True
+        return True
+
+    # pylint: disable=too-many-arguments
+    def search_from(self, geometry, values, used, limit, solutions, deadline=None):
+        """
+        Depth-first search for solutions, branching on the piece with the fewest candidates.
+        """
+        if deadline is not None and time.monotonic() > deadline:
+            raise TimeoutError("Search for solutions did not finish before the deadline.")
+        if not self.propagate(geometry, values, used):
+            return
+
+        full = geometry.full
+        best_cell, best_candidates, best_count = None, 0, geometry.dimensions + 1
+        for cell in range(geometry.cells):
+            if values[cell]:
+                continue
+            first, second, third = geometry.cell_units[cell]
+            candidates = full & ~(used[first] | used[second] | used[third])
+            count = bin(candidates).count('1')
+            if count < best_count:
+                best_cell, best_candidates, best_count = cell, candidates, count
+                if count == 2:
+                    break
+
+        if best_cell is None:
+            solutions.append(values)
+            return
+
+        while best_candidates and len(solutions) < limit:
+            bit = best_candidates & -best_candidates
+            best_candidates ^= bit
+            branch_values, branch_used = values[:], used[:]
+            self.place(geometry, branch_values, branch_used, best_cell, bit)
+            self.search_from(geometry, branch_values, branch_used, limit, solutions, deadline)
+
+
+class PySudokuSolver(Solver):
+    """
+    Solver using the generic backtracking solver of the py-sudoku library.
+    """
+    name = 'py-sudoku'
+
+    def solve(self, size, board):
+        solved = Sudoku(size, size, board=[row[:] for row in board]).solve()
+        if not solved.board or any(value is None for row in solved.board for value in row):
+            return None
+        return solved.board
+
+
+SOLVERS = {solver.name: solver for solver in (BitmaskSolver(), PySudokuSolver())}
+
+
+def get_solver(name='bitmask'):
+    """
+    Gets the solver with the given name ('bitmask' or 'py-sudoku').
+    """
+    if name not in SOLVERS:
+        raise ValueError(f"Unknown solver {name}; available solvers are {sorted(SOLVERS)}.")
+    return SOLVERS[name]
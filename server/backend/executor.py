@@ -0,0 +1,115 @@
+"""
+Executor for CPU-bound work on puzzle boards (generating and solving boards).
+
+The work is run in a pool of worker processes, so that a slow generation or solve does
+not stall the eventlet hub (and with it, every socket connection of the server). The
+process pool is started on first use and sized by the BOARD_EXECUTOR_WORKERS configuration;
+with 0 workers, the work is run inline instead. The pool is shut down when the server exits.
+
+Tasks that do not finish within BOARD_EXECUTOR_TIMEOUT seconds fail the request, but a task that
+has already started running in a worker process is not cancelled: it runs to completion (and
+keeps its worker busy) and its result is discarded. Only tasks still queued are cancelled.
+"""
+import atexit
+import multiprocessing
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from backend.models.puzzle_exception import PuzzleException
+
+
+class BoardExecutor:
+    """
+    Submits work to the worker processes, and waits on the results cooperatively.
+    """
+    POLL_INTERVAL = 0.01  # seconds between checks on a submitted task
+
+    def __init__(self, app=None, sleep=time.sleep):
+        self.app = app
+        self.sleep = sleep
+        self.pool = None
+        self.pending = set()  # futures of the tasks submitted to the pool, until they are done
+
+    def init_app(self, app):
+        """
+        Sets the app whose configuration sizes the executor.
+        """
+        self.app = app
+
+    def get_pool(self):
+        """
+        Gets the process pool, starting it if it is not running; returns None if the
+        executor is configured to run work inline.
+        """
+        workers = self.app.config['BOARD_EXECUTOR_WORKERS']
+        if workers <= 0:
+            return None
+        if self.pool is None:
+            # worker processes are spawned rather than forked, as forking does not go
+            # well with the eventlet hub (or the database connections) of the server
+            self.pool = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(self.shutdown)
+        return self.pool
+
+    def submit(self, func, *args):
+        """
+        Submits a function (which must be a top-level function, called with arguments that
+        can be pickled) to the worker processes; returns a Future for its result, which can
+        be cancelled as long as the function has not started running.
+        """
+        pool = self.get_pool()
+        if pool is not None:
+            future = pool.submit(func, *args)
+            self.pending.add(future)
+            future.add_done_callback(self.pending.discard)
+            return future
+
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as exception:  # pylint: disable=broad-except
+            future.set_exception(exception)
+        return future
+
+    def wait(self, future, timeout=None):
+        """
+        Waits for the result of a submitted function, sleeping between checks on the future
+        so that other green threads are run in the meantime (blocking on the future would
+        block the whole hub). A future that is not done before the timeout is cancelled if it
+        has not started yet; a task already running in a worker process runs to completion.
+        """
+        timeout = self.app.config['BOARD_EXECUTOR_TIMEOUT'] if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while not future.done():
+            if time.monotonic() >= deadline:
+                future.cancel()  # only stops tasks that have not started yet
+                raise PuzzleException(f"Puzzle board could not be processed within {timeout}"
+                                      f" seconds; please try again later.")
+            self.sleep(self.POLL_INTERVAL)
+
+        try:
+            return future.result()
+        except CancelledError as exception:
+            raise PuzzleException("Processing of the puzzle board was cancelled.") from exception
+        except BrokenProcessPool as exception:
+            self.pool = None  # a worker process died; start a new pool for the next task
+            raise PuzzleException("Puzzle board could not be processed.") from exception
+
+    def run(self, func, *args, timeout=None):
+        """
+        Submits a function to the worker processes and waits for its result.
+        """
+        return self.wait(self.submit(func, *args), timeout=timeout)
+
+    def shutdown(self):
+        """
+        Stops the worker processes, cancelling any tasks that have not started yet; this is
+        registered to run when the server exits while the pool is running.
+        """
+        atexit.unregister(self.shutdown)
+        for future in list(self.pending):
+            future.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
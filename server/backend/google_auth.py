@@ -1,8 +1,15 @@
 """
 Google Authentication Class to help with authentication of
 the submitted Oauth token.
+
+Requests to the Google API are made through a single session, which keeps a pool of
+connections alive between requests (rather than opening a new TCP and TLS connection for
+every request), with connect and read timeouts, and retries with backoff on connection
+errors and server errors.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class GoogleAuth:
@@ -11,6 +18,34 @@ class GoogleAuth:
     """
     TOKEN_INFO = 'https://www.googleapis.com/oauth2/v1/tokeninfo'
     USER_INFO = "https://www.googleapis.com/oauth2/v2/userinfo"
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, pool_size=10, connect_timeout=3.05, read_timeout=10, retries=2,
+                 backoff_factor=0.3, token_info_url=None, user_info_url=None):
+        self.token_info_url = token_info_url or self.TOKEN_INFO
+        self.user_info_url = user_info_url or self.USER_INFO
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(total=retries, backoff_factor=backoff_factor,
+                      status_forcelist=self.RETRY_STATUSES)
+        adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates an instance configured by the GOOGLE_AUTH settings of the app configuration.
+        """
+        return cls(
+            pool_size=config['GOOGLE_AUTH_POOL_SIZE'],
+            connect_timeout=config['GOOGLE_AUTH_CONNECT_TIMEOUT'],
+            read_timeout=config['GOOGLE_AUTH_READ_TIMEOUT'],
+            retries=config['GOOGLE_AUTH_RETRIES'],
+            backoff_factor=config['GOOGLE_AUTH_BACKOFF_FACTOR']
+        )
 
     def validate_token(self, token):
         """
@@ -18,7 +53,8 @@ class GoogleAuth:
         on the token to make sure it is still valid, including checking the
         expiration date).
         """
-        response = requests.get(self.TOKEN_INFO, params={'access_token': token})
+        response = self.session.get(self.token_info_url, params={'access_token': token},
+                                    timeout=self.timeout)
         return response.json()
 
     def get_user_information(self, token):
@@ -27,5 +63,5 @@ class GoogleAuth:
         from the Google Oauth API.
         """
         headers = {'Authorization': f'Bearer {token}'}
-        response = requests.get(self.USER_INFO, headers=headers, data={})
+        response = self.session.get(self.user_info_url, headers=headers, timeout=self.timeout)
         return response.json()
@@ -0,0 +1,172 @@
+"""
+In-process cache of the top of the leaderboard, so that the scores table is not read on every
+request for the leaderboard (which every client makes on page load).
+
+The cache holds the top LEADERBOARD_CACHE_SIZE users by score (K), sorted as the leaderboard
+is: by score, then with the most recently registered user first. Any request for at most K
+users is served from memory once the cache is loaded. Rather than expiring on a timer, the
+cache is written through as scores change: the new scores of the players of a completed
+puzzle (see backend.models.user_score) are applied once their transaction commits. Since
+scores only ever increase, applying them keeps the cache exact; a score that decreases (e.g.,
+after `flask rebuild-user-scores`) empties the cache, to be loaded again on the next request.
+
+As the cache is per process, scores changed by other processes are only seen once the cache
+is loaded again; it is loaded again at the latest LEADERBOARD_CACHE_MAX_AGE seconds after it
+was last loaded. A size of 0 disables the cache.
+"""
+import bisect
+import time
+from collections import namedtuple
+from threading import Lock
+
+LeaderboardEntry = namedtuple('LeaderboardEntry', ['user_id', 'first_name', 'last_name', 'score'])
+
+
+def ranking_key(entry):
+    """
+    Returns the sort key of an entry, highest score (then highest user id) first.
+    """
+    return -entry.score, -entry.user_id
+
+
+class LeaderboardCache:
+    """
+    Sorted list of the top K leaderboard entries, written through as scores change.
+    """
+    def __init__(self, app=None, clock=time.monotonic):
+        self.app = app
+        self.clock = clock
+        self.entries = []  # sorted by ranking_key
+        self.keys = []     # ranking_key of each entry, for bisection
+        self.loaded_at = None
+        self.updated_at = None
+        self.generation = 0  # changes whenever the cached entries are changed or dropped
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0
+
+    def init_app(self, app):
+        """
+        Sets the app whose configuration sizes the cache.
+        """
+        self.app = app
+
+    @property
+    def size(self):
+        """
+        The number of entries (K) the cache holds; 0 when the cache is disabled.
+        """
+        return max(self.app.config['LEADERBOARD_CACHE_SIZE'], 0)
+
+    def is_loaded(self):
+        """
+        Determines if the cache holds the top entries, loaded recently enough to be served.
+        """
+        return (self.loaded_at is not None and
+                self.clock() - self.loaded_at < self.app.config['LEADERBOARD_CACHE_MAX_AGE'])
+
+    def get(self, n_results):
+        """
+        Returns the top n entries, or None if they cannot be served from the cache (the
+        cache is not loaded, or n is larger than the cache).
+        """
+        if self.size <= 0:
+            return None
+
+        with self.lock:
+            if n_results <= self.size and self.is_loaded():
+                self.hits += 1
+                return self.entries[:n_results]
+            self.misses += 1
+            return None
+
+    def start_load(self):
+        """
+        Returns a token to pass to load() with the entries read from the database; the load
+        is ignored if scores were written through in between, as the entries may be older.
+        """
+        return self.generation
+
+    def load(self, entries, token):
+        """
+        Replaces the cached entries with the top K entries, as read from the database after
+        start_load() returned the token.
+        """
+        if self.size <= 0:
+            return
+
+        with self.lock:
+            if token != self.generation:
+                return
+            self.entries = sorted(entries, key=ranking_key)[:self.size]
+            self.keys = [ranking_key(entry) for entry in self.entries]
+            self.loaded_at = self.updated_at = self.clock()
+            self.generation += 1
+
+    def update(self, entries):
+        """
+        Writes through the new scores of users (as leaderboard entries).
+        """
+        if self.size <= 0:
+            return
+
+        with self.lock:
+            self.generation += 1
+            if self.loaded_at is None:
+                return
+
+            for entry in entries:
+                index = next((index for index, cached in enumerate(self.entries)
+                              if cached.user_id == entry.user_id), None)
+                if index is not None:
+                    if entry.score < self.entries[index].score:
+                        self.drop()  # users below the cached ones may now rank higher
+                        return
+                    del self.entries[index]
+                    del self.keys[index]
+
+                key = ranking_key(entry)
+                if entry.score > 0 and (len(self.entries) < self.size or key < self.keys[-1]):
+                    index = bisect.bisect_left(self.keys, key)
+                    self.entries.insert(index, entry)
+                    self.keys.insert(index, key)
+                    del self.entries[self.size:]
+                    del self.keys[self.size:]
+
+            self.updated_at = self.clock()
+            self.updates += 1
+
+    def invalidate(self):
+        """
+        Drops the cached entries, so that they are loaded again on the next request.
+        """
+        with self.lock:
+            self.drop()
+
+    def drop(self):
+        """
+        Drops the cached entries; the lock must be held.
+        """
+        self.entries, self.keys = [], []
+        self.loaded_at = self.updated_at = None
+        self.generation += 1
+
+    def stats(self):
+        """
+        Returns the number of cache hits and misses so far (and the share of hits), the
+        number of write-through updates, the number of cached entries, and the staleness of
+        the cache: the seconds since it was loaded from the database and since it was last
+        changed (None if it is not loaded).
+        """
+        now = self.clock()
+        requests = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / requests if requests else None,
+            'updates': self.updates,
+            'size': len(self.entries),
+            'age': now - self.loaded_at if self.loaded_at is not None else None,
+            'since_update': now - self.updated_at if self.updated_at is not None else None,
+        }
@@ -0,0 +1,373 @@
+"""
+Table of the locks that players hold on puzzle pieces while they edit them, so that two
+players cannot work on the same piece at the same time.
+
+A lock is held by a web socket connection (by session ID), on behalf of a user, for a lease
+of PIECE_LOCK_LEASE seconds; taking the lock again renews the lease. Locks are released by
+their holder, when the holder leaves the puzzle or disconnects, or once the lease expires,
+so that locks are never left behind by clients that went away. Moves on a locked piece are
+only accepted from the holder of the lock (see backend.sockets and
+backend.resources.sudoku_puzzle_piece).
+
+The table is kept in memory by the LockManager, which is enough when the server runs as a
+single process. When the server runs as several processes, the players of a puzzle may be
+connected to different processes, so the table is kept in the database instead, by the
+DatabaseLockManager; its leases use the wall clock, shared by the processes.
+
+Expired locks are removed when they are next looked at, and by reap_expired (run periodically
+while locks are held, see backend.sockets); the on_expired callback of the managers is called
+with the (puzzle id, x, y) of each lock removed that way, so that its removal is announced to
+the players of the puzzle.
+"""
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from threading import Lock
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from backend import app, db, socketio
+from backend.models.piece_lock import PieceLockRecord
+
+PieceLock = namedtuple('PieceLock', ['sid', 'user_id', 'player', 'expires'])
+
+
+class LockManager:
+    """
+    Table of piece locks by puzzle and coordinates, with the holder and lease of each lock.
+    """
+    def __init__(self, app=None, clock=time.monotonic, on_expired=None):
+        self.app = app
+        self.clock = clock
+        self.on_expired = on_expired
+        self.locks = {}  # puzzle id -> {(x, y): PieceLock}
+        self.held = {}   # session ID -> set of (puzzle id, x, y) locked by the connection
+        self.expired = []  # (puzzle id, x, y) of the expired locks removed, to be announced
+        self.lock = Lock()
+
+    def init_app(self, app):
+        """
+        Sets the app whose configuration sets the lease of locks.
+        """
+        self.app = app
+
+    def acquire(self, puzzle_id, x_coord, y_coord, sid, user_id=None, player=None):
+        """
+        Locks the piece for the connection (and user), or renews its lease if the connection
+        already holds the lock. Returns True if the connection holds the lock, or False if
+        another connection does.
+        """
+        with self.locked():
+            current = self.get_live_lock(puzzle_id, x_coord, y_coord)
+            if current is not None and current.sid != sid:
+                return False
+
+            expires = self.clock() + self.app.config['PIECE_LOCK_LEASE']
+            self.locks.setdefault(puzzle_id, {})[(x_coord, y_coord)] = \
+                PieceLock(sid, user_id, player, expires)
+            self.held.setdefault(sid, set()).add((puzzle_id, x_coord, y_coord))
+            return True
+
+    def release(self, puzzle_id, x_coord, y_coord, sid):
+        """
+        Releases the lock on the piece, if the connection holds it. Returns True if the
+        lock was released.
+        """
+        with self.locked():
+            current = self.get_live_lock(puzzle_id, x_coord, y_coord)
+            if current is None or current.sid != sid:
+                return False
+            self.remove(puzzle_id, x_coord, y_coord)
+            return True
+
+    def release_all(self, sid, puzzle_id=None):
+        """
+        Releases all of the locks held by the connection (only on the given puzzle, if one
+        is given). Returns the released locks, as (puzzle id, x, y) tuples.
+        """
+        with self.lock:
+            released = [key for key in self.held.get(sid, ())
+                        if puzzle_id is None or key[0] == puzzle_id]
+            for key in released:
+                self.remove(*key)
+            return sorted(released)
+
+    def get_lock(self, puzzle_id, x_coord, y_coord):
+        """
+        Returns the lock on the piece, or None if the piece is not locked.
+        """
+        with self.locked():
+            return self.get_live_lock(puzzle_id, x_coord, y_coord)
+
+    def can_move(self, puzzle_id, x_coord, y_coord, sid=None, user_id=None):
+        """
+        Determines if a move can be made on the piece by the connection or user: the piece
+        is not locked, or the lock is held by the connection or on behalf of the user.
+        """
+        current = self.get_lock(puzzle_id, x_coord, y_coord)
+        return (current is None or (sid is not None and current.sid == sid) or
+                (user_id is not None and current.user_id == user_id))
+
+    def get_puzzle_locks(self, puzzle_id):
+        """
+        Returns the current locks on the pieces of the puzzle, as a dictionary of the lock
+        on each locked piece, by (x, y) coordinates.
+        """
+        with self.locked():
+            for x_coord, y_coord in list(self.locks.get(puzzle_id, ())):
+                self.get_live_lock(puzzle_id, x_coord, y_coord)
+            return dict(self.locks.get(puzzle_id, {}))
+
+    def has_locks(self):
+        """
+        Determines if any piece is locked (including by locks whose lease has expired but
+        that were not removed yet).
+        """
+        return bool(self.locks)
+
+    def reap_expired(self):
+        """
+        Removes the locks whose lease has expired, passing each of them to the on_expired
+        callback. Returns the removed locks, as (puzzle id, x, y) tuples.
+        """
+        with self.locked():
+            now = self.clock()
+            expired = sorted((puzzle_id, x_coord, y_coord)
+                             for puzzle_id, puzzle_locks in self.locks.items()
+                             for (x_coord, y_coord), current in puzzle_locks.items()
+                             if current.expires <= now)
+            for key in expired:
+                self.get_live_lock(*key)
+            return expired
+
+    @contextmanager
+    def locked(self):
+        """
+        Holds the lock of the table; the expired locks removed meanwhile are passed to the
+        on_expired callback once it is released.
+        """
+        with self.lock:
+            yield
+            expired, self.expired = self.expired, []
+        if self.on_expired is not None:
+            for key in expired:
+                self.on_expired(*key)
+
+    def get_live_lock(self, puzzle_id, x_coord, y_coord):
+        """
+        Returns the lock on the piece, removing it if its lease has expired; the lock
+        must be held.
+        """
+        current = self.locks.get(puzzle_id, {}).get((x_coord, y_coord))
+        if current is not None and current.expires <= self.clock():
+            self.remove(puzzle_id, x_coord, y_coord)
+            self.expired.append((puzzle_id, x_coord, y_coord))
+            return None
+        return current
+
+    def remove(self, puzzle_id, x_coord, y_coord):
+        """
+        Removes the lock on the piece from the table; the lock must be held.
+        """
+        puzzle_locks = self.locks.get(puzzle_id, {})
+        current = puzzle_locks.pop((x_coord, y_coord), None)
+        if not puzzle_locks:
+            self.locks.pop(puzzle_id, None)
+        if current is not None:
+            held = self.held.get(current.sid, set())
+            held.discard((puzzle_id, x_coord, y_coord))
+            if not held:
+                self.held.pop(current.sid, None)
+
+    def clear(self):
+        """
+        Removes all locks.
+        """
+        with self.lock:
+            self.locks.clear()
+            self.held.clear()
+            self.expired.clear()
+
+
+class DatabaseLockManager:
+    """
+    Table of piece locks kept in the database (see backend.models.piece_lock), with the same
+    interface as the LockManager; every change is committed right away.
+    """
+    def __init__(self, app=None, clock=datetime.utcnow, on_expired=None):
+        self.app = app
+        self.clock = clock
+        self.on_expired = on_expired
+
+    def init_app(self, app):
+        """
+        Sets the app whose configuration sets the lease of locks.
+        """
+        self.app = app
+
+    @staticmethod
+    def query_piece(puzzle_id, x_coord, y_coord):
+        """
+        Returns the query of the lock on the piece.
+        """
+        return PieceLockRecord.query.filter_by(puzzle_id=puzzle_id, x_coordinate=x_coord,
+                                               y_coordinate=y_coord)
+
+    def acquire(self, puzzle_id, x_coord, y_coord, sid, user_id=None, player=None):
+        """
+        Locks the piece for the connection (and user), or renews its lease if the connection
+        already holds the lock. Returns True if the connection holds the lock, or False if
+        another connection does (including one that took the lock at the same time).
+        """
+        self.reap_expired()
+        expires = self.clock() + timedelta(seconds=self.app.config['PIECE_LOCK_LEASE'])
+        current = self.query_piece(puzzle_id, x_coord, y_coord).first()
+        if current is not None and current.sid != sid:
+            db.session.commit()
+            return False
+
+        if current is not None:
+            db.session.delete(current)
+            db.session.flush()
+        db.session.add(PieceLockRecord(puzzle_id, x_coord, y_coord, sid, expires,
+                                       user_id=user_id, player=player))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+
+    def release(self, puzzle_id, x_coord, y_coord, sid):
+        """
+        Releases the lock on the piece, if the connection holds it. Returns True if the
+        lock was released.
+        """
+        released = self.query_piece(puzzle_id, x_coord, y_coord).filter(
+            PieceLockRecord.sid == sid, PieceLockRecord.expires > self.clock()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return released == 1
+
+    def release_all(self, sid, puzzle_id=None):
+        """
+        Releases all of the locks held by the connection (only on the given puzzle, if one
+        is given). Returns the released locks, as (puzzle id, x, y) tuples.
+        """
+        query = PieceLockRecord.query.filter(PieceLockRecord.sid == sid)
+        if puzzle_id is not None:
+            query = query.filter(PieceLockRecord.puzzle_id == puzzle_id)
+        released = sorted((record.puzzle_id, record.x_coordinate, record.y_coordinate)
+                          for record in query)
+        query.delete(synchronize_session=False)
+        db.session.commit()
+        return released
+
+    def get_lock(self, puzzle_id, x_coord, y_coord):
+        """
+        Returns the lock on the piece, or None if the piece is not locked.
+        """
+        record = self.query_piece(puzzle_id, x_coord, y_coord) \
+            .filter(PieceLockRecord.expires > self.clock()).first()
+        return self.as_lock(record) if record is not None else None
+
+    def can_move(self, puzzle_id, x_coord, y_coord, sid=None, user_id=None):
+        """
+        Determines if a move can be made on the piece by the connection or user: the piece
+        is not locked, or the lock is held by the connection or on behalf of the user.
+        """
+        current = self.get_lock(puzzle_id, x_coord, y_coord)
+        return (current is None or (sid is not None and current.sid == sid) or
+                (user_id is not None and current.user_id == user_id))
+
+    @staticmethod
+    def has_locks():
+        """
+        Determines if any piece is locked (including by locks whose lease has expired but
+        that were not removed yet).
+        """
+        return db.session.query(PieceLockRecord.query.exists()).scalar()
+
+    def reap_expired(self):
+        """
+        Removes the locks whose lease has expired, passing each of them to the on_expired
+        callback. Returns the removed locks, as (puzzle id, x, y) tuples.
+        """
+        columns = (PieceLockRecord.puzzle_id, PieceLockRecord.x_coordinate,
+                   PieceLockRecord.y_coordinate)
+        # the expired locks are locked until they are removed, so that they are neither renewed
+        # nor removed (and announced) by another process meanwhile
+        expired = sorted(tuple(key) for key in db.session.query(*columns).filter(
+            PieceLockRecord.expires <= self.clock()
+        ).with_for_update())
+        if expired:
+            PieceLockRecord.query.filter(tuple_(*columns).in_(expired)) \
+                .delete(synchronize_session=False)
+        db.session.commit()
+        if self.on_expired is not None:
+            for key in expired:
+                self.on_expired(*key)
+        return expired
+
+    def get_puzzle_locks(self, puzzle_id):
+        """
+        Returns the current locks on the pieces of the puzzle, as a dictionary of the lock
+        on each locked piece, by (x, y) coordinates.
+        """
+        records = PieceLockRecord.query.filter(PieceLockRecord.puzzle_id == puzzle_id,
+                                               PieceLockRecord.expires > self.clock())
+        return {(record.x_coordinate, record.y_coordinate): self.as_lock(record)
+                for record in records}
+
+    @staticmethod
+    def as_lock(record):
+        """
+        Converts a stored lock to a PieceLock.
+        """
+        return PieceLock(record.sid, record.user_id, record.get_player(), record.expires)
+
+    @staticmethod
+    def clear():
+        """
+        Removes all locks.
+        """
+        PieceLockRecord.query.delete(synchronize_session=False)
+        db.session.commit()
+
+
+class LockSweeper:
+    """
+    Removes the expired locks of a lock manager as a background task, every
+    PIECE_LOCK_SWEEP_INTERVAL seconds while any locks are held, so that their removal is
+    announced even if nobody looks at the locked pieces again; makes sure that only one such
+    task runs at a time.
+    """
+    def __init__(self, lock_manager):
+        self.lock_manager = lock_manager
+        self.lock = Lock()
+        self.requested = False
+
+    def notify(self):
+        """
+        Requests that the expired locks be removed once their lease is over (e.g., after a
+        lock was taken); starts the background task if it is not already running.
+        """
+        self.requested = True
+        if self.lock.acquire(blocking=False):  # pylint: disable=consider-using-with
+            socketio.start_background_task(self.run)
+
+    def run(self):
+        """
+        Removes the expired locks periodically, until no locks are held and no further
+        requests have been made.
+        """
+        try:
+            with app.app_context():
+                while self.requested or self.lock_manager.has_locks():
+                    self.requested = False
+                    socketio.sleep(app.config['PIECE_LOCK_SWEEP_INTERVAL'])
+                    self.lock_manager.reap_expired()
+        except Exception as exception:  # pylint: disable=broad-except
+            print(f"Exception occurred while removing expired piece locks: {exception}")
+        finally:
+            self.lock.release()
@@ -0,0 +1,241 @@
+"""
+Message queue shared by the server processes, so that events emitted to the web socket clients
+of a puzzle (e.g., socketio.emit(..., room=puzzle_id)) reach the clients connected to any of the
+processes, and not only those connected to the process that emits the event.
+
+The queue is set by the SOCKETIO_MESSAGE_QUEUE URL:
+ - '' (the default): no queue; events only reach the clients of the emitting process, which is
+   enough when the server runs as a single process.
+ - 'unix:///path/to/broker.sock': events are published to the MessageBroker listening on the
+   UNIX socket (see `flask run-message-broker`), which relays them to every process. This needs
+   no other service, but only works for processes on the same host.
+ - any other URL (e.g., 'redis://...' or 'amqp://...'): the queues of Flask-SocketIO, which need
+   the matching service and packages.
+
+Events are relayed as pickled messages, as with the Redis queue; the broker's socket should only
+be accessible to the server processes.
+"""
+import errno
+import os
+import pickle
+import socket
+import socketserver
+import struct
+from threading import Lock
+import socketio
+from eventlet.green import socket as green_socket
+
+UNIX_SCHEME = 'unix://'
+HEADER = struct.Struct('!I')  # length of the message that follows
+PUBLISHER, SUBSCRIBER = b'P', b'S'  # first byte sent by a connection to the broker
+
+
+def socketio_options(url, channel='flask-socketio'):
+    """
+    Returns the keyword arguments to give SocketIO for the message queue with the given URL.
+    """
+    if not url:
+        return {}
+    if url.startswith(UNIX_SCHEME):
+        return {'client_manager': UnixSocketManager(url[len(UNIX_SCHEME):], channel=channel)}
+    return {'message_queue': url, 'channel': channel}
+
+
+def send_message(sock, data):
+    """
+    Sends a message (as bytes) on the socket, preceded by its length.
+    """
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def receive_message(sock):
+    """
+    Returns the next message (as bytes) received on the socket, or None if the socket was
+    closed.
+    """
+    header = receive_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    return receive_exactly(sock, HEADER.unpack(header)[0])
+
+
+def receive_exactly(sock, n_bytes):
+    """
+    Returns the next n bytes received on the socket, or None if the socket was closed first.
+    """
+    data = b''
+    while len(data) < n_bytes:
+        chunk = sock.recv(n_bytes - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class UnixSocketManager(socketio.PubSubManager):
+    """
+    Socket.IO client manager that shares events between processes through a MessageBroker
+    listening on a UNIX socket.
+    """
+    name = 'unix'
+
+    def __init__(self, path, channel='socketio', write_only=False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self.publisher = None
+        self.publish_lock = Lock()
+
+    def connect_to_broker(self, role):
+        """
+        Returns a new connection to the broker, as a publisher or a subscriber. The sockets of
+        eventlet are used with the eventlet server, so that waiting on the broker only blocks
+        the waiting green thread.
+        """
+        socket_class = socket.socket
+        if self.server is not None and self.server.async_mode == 'eventlet':
+            socket_class = green_socket.socket
+        sock = socket_class(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.path)
+            sock.sendall(role)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _publish(self, data):
+        """
+        Publishes the message to the broker, connecting again once if the connection was lost.
+        """
+        message = pickle.dumps((self.channel, data))
+        with self.publish_lock:
+            for retry in (True, False):
+                try:
+                    if self.publisher is None:
+                        self.publisher = self.connect_to_broker(PUBLISHER)
+                    send_message(self.publisher, message)
+                    return
+                except OSError:
+                    self.close_publisher()
+                    if not retry:
+                        raise
+                    self._get_logger().error('Cannot publish to the message broker; retrying')
+
+    def close_publisher(self):
+        """
+        Closes the connection used to publish messages, if any; the publish lock must be held.
+        """
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+    def _listen(self):
+        """
+        Yields the messages published on the channel, connecting to the broker again (after
+        a delay) whenever the connection is lost.
+        """
+        delay = 1
+        while True:
+            try:
+                sock = self.connect_to_broker(SUBSCRIBER)
+            except OSError:
+                self._get_logger().error('Cannot connect to the message broker; retrying in '
+                                         '%s seconds', delay)
+                self.server.sleep(delay)
+                delay = min(delay * 2, 60)
+                continue
+
+            delay = 1
+            try:
+                message = receive_message(sock)
+                while message is not None:
+                    channel, data = pickle.loads(message)
+                    if channel == self.channel:
+                        yield data
+                    message = receive_message(sock)
+            except OSError:
+                pass
+            finally:
+                sock.close()
+            self._get_logger().error('Lost the connection to the message broker; reconnecting')
+
+
+class BrokerHandler(socketserver.BaseRequestHandler):
+    """
+    Handles a connection to the broker: messages from publishers are relayed to all subscribers.
+    """
+    def handle(self):
+        role = receive_exactly(self.request, 1)
+        if role == SUBSCRIBER:
+            self.server.add_subscriber(self.request)
+            # wait until the subscriber disconnects; subscribers send nothing else
+            while self.request.recv(1024):
+                pass
+            self.server.remove_subscriber(self.request)
+        elif role == PUBLISHER:
+            message = receive_message(self.request)
+            while message is not None:
+                self.server.relay(message)
+                message = receive_message(self.request)
+
+
+class MessageBroker(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Relays the messages published by the server processes to all of them, over a UNIX socket.
+    """
+    daemon_threads = True
+
+    def __init__(self, path):
+        if os.path.exists(path):
+            self.remove_stale_socket(path)
+        super().__init__(path, BrokerHandler)
+        self.path = path
+        self.subscribers = []
+        self.lock = Lock()
+
+    @staticmethod
+    def remove_stale_socket(path):
+        """
+        Removes the socket file left at the path by a broker that is no longer running; raises
+        an OSError (EADDRINUSE) if a broker is still listening on it.
+        """
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)  # nothing is listening on the socket
+            return
+        finally:
+            probe.close()
+        raise OSError(errno.EADDRINUSE, f"A message broker is already listening on {path}")
+
+    def add_subscriber(self, sock):
+        """
+        Starts relaying messages to the subscriber's socket.
+        """
+        with self.lock:
+            self.subscribers.append(sock)
+
+    def remove_subscriber(self, sock):
+        """
+        Stops relaying messages to the subscriber's socket.
+        """
+        with self.lock:
+            if sock in self.subscribers:
+                self.subscribers.remove(sock)
+
+    def relay(self, message):
+        """
+        Sends the message to every subscriber, dropping the subscribers that went away.
+        """
+        with self.lock:
+            for sock in list(self.subscribers):
+                try:
+                    send_message(sock, message)
+                except OSError:
+                    self.subscribers.remove(sock)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,49 @@
+"""
+Module responsible for the piece locks shared by the server processes.
+
+When the server runs as several processes (sharing web socket events through a message queue,
+see backend.message_queue), the clients of a puzzle may be connected to different processes,
+so the locks on its pieces are kept in the database rather than by each process (see
+backend.lock_manager.DatabaseLockManager).
+"""
+import json
+from backend import db
+
+
+class PieceLockRecord(db.Model):
+    """
+    The lock held on a puzzle piece by a web socket connection, until its lease expires.
+    """
+    __tablename__ = 'piece_locks'
+
+    puzzle_id = db.Column(db.Integer, db.ForeignKey('sudoku_puzzles.id'), primary_key=True)
+    x_coordinate = db.Column(db.Integer, primary_key=True)
+    y_coordinate = db.Column(db.Integer, primary_key=True)
+    sid = db.Column(db.String(64), nullable=False, index=True)  # session ID of the holder
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    player = db.Column(db.Text, nullable=True)  # player given by the client, as JSON
+    expires = db.Column(db.DateTime, nullable=False)  # naive UTC datetime
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, puzzle_id, x_coordinate, y_coordinate, sid, expires, user_id=None,
+                 player=None):
+        self.puzzle_id = puzzle_id
+        self.x_coordinate = x_coordinate
+        self.y_coordinate = y_coordinate
+        self.sid = sid
+        self.expires = expires
+        self.user_id = user_id
+        self.player = json.dumps(player) if player is not None else None
+
+    def get_player(self):
+        """
+        Returns the player given by the client when the lock was taken, or None.
+        """
+        return json.loads(self.player) if self.player is not None else None
+
+    def __str__(self):
+        return (
+            f"PieceLockRecord(puzzle_id={self.puzzle_id}, x_coordinate={self.x_coordinate}, "
+            f"y_coordinate={self.y_coordinate}, sid={self.sid}, user_id={self.user_id}, "
+            f"expires={self.expires})"
+        )
@@ -2,9 +2,9 @@
 Module responsible for mapping players to all of their puzzles,
 as well as adding players to a new puzzle.
 """
-from sqlalchemy import func
 from backend import db
 from backend.models.user import User
+from backend.models.user_score import UserScore
 from backend.models.sudoku_puzzle import Puzzle
 from backend.models.puzzle_exception import PuzzleException
 
@@ -48,6 +48,32 @@ class PuzzlePlayer(db.Model):
             return query.all()
         return query.filter_by(hidden=False).all()
 
+    @classmethod
+    def find_player_puzzle(cls, player_id, puzzle_id):
+        """
+        Returns the pairing of a specific player (by the player's id) and puzzle, or None
+        if the player is not associated with the puzzle; this is a single primary key lookup.
+        """
+        return cls.query.get((player_id, puzzle_id))
+
+    @classmethod
+    def is_player_of_puzzle(cls, player_id, puzzle_id, cache=None):
+        """
+        Determines if a specific player (by the player's id) is associated with the puzzle,
+        whether or not the puzzle is hidden from the player. Memberships that are found are
+        kept in the cache (a dictionary) if one is given, such as a cache kept for the length
+        of a request or of a web socket connection; players may join puzzles at any time, so
+        missing memberships are always looked up again.
+        """
+        key = (player_id, puzzle_id)
+        if cache is not None and cache.get(key):
+            return True
+
+        is_player = cls.find_player_puzzle(player_id, puzzle_id) is not None
+        if is_player and cache is not None:
+            cache[key] = True
+        return is_player
+
     @classmethod
     def find_players_for_puzzle(cls, puzzle_id):
         """
@@ -58,6 +84,56 @@ class PuzzlePlayer(db.Model):
             .filter_by(puzzle_id=puzzle_id)\
             .all()
 
+    # pylint: disable=too-many-arguments
+    @classmethod
+    def find_puzzles_for_player(cls, player_id, hidden=True, after_id=None, limit=None,
+                                load_pieces=True, **filters):
+        """
+        Returns the puzzles of a specific player (by the player's id) in order of their ids,
+        with their puzzle pieces unless specified otherwise, using one query for the puzzles
+        and one for their pieces. By default, only puzzles that are not hidden from the player
+        are returned.
+
+        Puzzles can be paged through by their ids (keyset pagination): only the puzzles after
+        the given puzzle id are returned, up to the given limit. Puzzles can also be filtered
+        on their completed, size and difficulty attributes, given as keyword arguments.
+        """
+        query = Puzzle.query.join(PuzzlePlayer, PuzzlePlayer.puzzle_id == Puzzle.id)\
+            .filter(PuzzlePlayer.player_id == player_id)
+        if not hidden:
+            query = query.filter(PuzzlePlayer.hidden.is_(False))
+        for name, value in filters.items():
+            if name not in ('completed', 'size', 'difficulty'):
+                raise PuzzleException(f"Puzzles cannot be filtered on {name}.")
+            query = query.filter(getattr(Puzzle, name) == value)
+        if after_id is not None:
+            query = query.filter(Puzzle.id > after_id)
+
+        query = query.order_by(Puzzle.id)
+        if limit is not None:
+            query = query.limit(limit)
+
+        puzzles = query.all()
+        if load_pieces:
+            Puzzle.load_pieces_for_puzzles(puzzles)
+        return puzzles
+
+    @classmethod
+    def find_players_for_puzzles(cls, puzzle_ids):
+        """
+        Returns the users associated with each of several puzzles, using a single query;
+        returns a dictionary of the list of users for each puzzle id.
+        """
+        players = {puzzle_id: [] for puzzle_id in puzzle_ids}
+        if players:
+            rows = db.session.query(PuzzlePlayer.puzzle_id, User)\
+                .join(User, PuzzlePlayer.player_id == User.id)\
+                .filter(PuzzlePlayer.puzzle_id.in_(players))\
+                .order_by(User.id)
+            for puzzle_id, user in rows:
+                players[puzzle_id].append(user)
+        return players
+
     @classmethod
     def get_top_players(cls, n_results):
         """
@@ -66,17 +142,7 @@ class PuzzlePlayer(db.Model):
         if not isinstance(n_results, int) or n_results <= 0:
             return []
 
-        return (
-            User.query
-            .with_entities(User.first_name, User.last_name,
-                           func.sum(Puzzle.point_value).label('score'))
-            .join(PuzzlePlayer, PuzzlePlayer.player_id == User.id)
-            .join(Puzzle, Puzzle.id == PuzzlePlayer.puzzle_id)
-            .filter_by(completed=True)
-            .group_by(User.id)
-            .order_by(func.sum(Puzzle.point_value).desc())
-            .limit(n_results)
-        )
+        return UserScore.get_leaderboard(n_results)
 
     @classmethod
     def add_player_to_puzzle(cls, puzzle_id, user, autocommit=True):
@@ -94,7 +160,34 @@ class PuzzlePlayer(db.Model):
                                   f"players affiliated with puzzle {puzzle_id}")
 
         puzzle_player = PuzzlePlayer(user.id, puzzle_id)
-        puzzle_player.save(autocommit)
+        puzzle_player.save(autocommit=False)
+
+        # players joining a completed puzzle get its points as well
+        puzzle = Puzzle.get_puzzle(puzzle_id, load_pieces=False)
+        if puzzle is not None and puzzle.completed:
+            UserScore.add_puzzle_points(puzzle_id, puzzle.point_value, player_id=user.id)
+
+        if autocommit:
+            db.session.commit()
+
+    @classmethod
+    def add_players_to_new_puzzle(cls, puzzle_id, player_ids, autocommit=True):
+        """
+        Adds the players (by their ids) to a puzzle that was just created, and so has no
+        players yet, with a single multi-row INSERT; the players are not added to the session.
+        """
+        player_ids = list(dict.fromkeys(player_ids))  # without duplicates, in order
+        if len(player_ids) > MAX_PLAYERS_PER_PUZZLE:
+            raise PuzzleException(f"There can be at most {MAX_PLAYERS_PER_PUZZLE} "
+                                  f"players affiliated with puzzle {puzzle_id}")
+
+        if player_ids:
+            db.session.execute(cls.__table__.insert().values([
+                {'player_id': player_id, 'puzzle_id': puzzle_id, 'hidden': False}
+                for player_id in player_ids
+            ]))
+        if autocommit:
+            db.session.commit()
 
     def update_visibility(self, hidden, autocommit=True):
         """
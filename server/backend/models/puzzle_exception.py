@@ -18,3 +18,18 @@ class PuzzleException(Exception):
         to be readily returned.
         """
         return self.msg
+
+
+class PuzzleConflict(PuzzleException):
+    """
+    Exception raised when a move cannot be made because the puzzle was changed since the
+    version the move was made against; holds the current version of the puzzle and the
+    current value of the piece the move was made on.
+    """
+    # pylint: disable=too-many-arguments
+    def __init__(self, msg, version, x_coordinate, y_coordinate, value):
+        super().__init__(msg)
+        self.version = version
+        self.x_coordinate = x_coordinate
+        self.y_coordinate = y_coordinate
+        self.value = value
@@ -0,0 +1,109 @@
+"""
+Module responsible for the journal of the moves made on puzzles.
+
+Every move is appended to the journal in the same transaction as the move itself, along with
+the version the move gave the puzzle, so that clients that missed some moves (e.g., while
+reconnecting) can catch up with only the moves made since the last version they saw, rather
+than the whole puzzle board. Journaled moves are never changed.
+"""
+from datetime import datetime
+from sqlalchemy import and_, cast, literal, select
+from backend import db
+from backend.models.puzzle_pieces import PuzzlePiece
+
+
+class PuzzleMove(db.Model):
+    """
+    A move made on a puzzle: the value of a piece changed by a player.
+    """
+    __tablename__ = 'puzzle_moves'
+    __table_args__ = (
+        db.UniqueConstraint('puzzle_id', 'version', name='unique_move'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    puzzle_id = db.Column(db.Integer, db.ForeignKey('sudoku_puzzles.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)  # version of the puzzle after the move
+    player_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    x_coordinate = db.Column(db.Integer, nullable=False)
+    y_coordinate = db.Column(db.Integer, nullable=False)
+    old_value = db.Column(db.Integer, nullable=True)
+    new_value = db.Column(db.Integer, nullable=True)
+    # indexed for the compaction of the journal (see backend.models.puzzle_snapshot)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, puzzle_id, version, x_coordinate, y_coordinate, old_value, new_value,
+                 player_id=None):
+        self.puzzle_id = puzzle_id
+        self.version = version
+        self.x_coordinate = x_coordinate
+        self.y_coordinate = y_coordinate
+        self.old_value = old_value
+        self.new_value = new_value
+        self.player_id = player_id
+
+    def save(self, autocommit=False):
+        """
+        Appends the move to the journal, autocommits if True.
+        """
+        db.session.add(self)
+        if autocommit:
+            db.session.commit()
+
+    # pylint: disable=too-many-arguments
+    @classmethod
+    def record_piece_move(cls, puzzle_id, version, x_coordinate, y_coordinate, new_value,
+                          player_id=None):
+        """
+        Appends a move on a puzzle stored as individual puzzle pieces to the journal, taking
+        the old value from the piece with a single INSERT ... SELECT (without loading the
+        piece or committing); this must be done before the piece is changed. The version can be
+        given as a SQL expression, e.g., a subquery of the version of the puzzle. Nothing is
+        journaled if the piece does not exist.
+        """
+        pieces = PuzzlePiece.__table__
+        move = select([
+            cast(literal(puzzle_id), db.Integer),
+            cast(version, db.Integer),
+            cast(literal(player_id), db.Integer),
+            cast(literal(x_coordinate), db.Integer),
+            cast(literal(y_coordinate), db.Integer),
+            pieces.c.value,
+            cast(literal(new_value), db.Integer),
+            literal(datetime.utcnow(), db.DateTime)
+        ]).where(and_(pieces.c.puzzle_id == puzzle_id,
+                      pieces.c.x_coordinate == x_coordinate,
+                      pieces.c.y_coordinate == y_coordinate))
+        db.session.execute(cls.__table__.insert().from_select(
+            ['puzzle_id', 'version', 'player_id', 'x_coordinate', 'y_coordinate', 'old_value',
+             'new_value', 'created_at'], move
+        ))
+
+    @classmethod
+    def find_moves_since(cls, puzzle_id, version, limit=None):
+        """
+        Finds the journaled moves made on the puzzle after the given version, ordered by
+        version; at most limit moves are returned, if given.
+        """
+        query = cls.query.filter(cls.puzzle_id == puzzle_id, cls.version > version) \
+            .order_by(cls.version)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    @staticmethod
+    def covers(moves, version):
+        """
+        Returns True if the moves (as found by find_moves_since) start right after the given
+        version, i.e., if no moves made since that version are missing from the journal.
+        """
+        return bool(moves) and moves[0].version == version + 1
+
+    def __str__(self):
+        return (
+            f"PuzzleMove(puzzle_id={self.puzzle_id}, version={self.version}, "
+            f"player_id={self.player_id}, x_coordinate={self.x_coordinate}, "
+            f"y_coordinate={self.y_coordinate}, old_value={self.old_value}, "
+            f"new_value={self.new_value}, created_at={self.created_at})"
+        )
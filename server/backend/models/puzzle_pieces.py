@@ -23,6 +23,10 @@ class PuzzlePiece(db.Model):
     static_piece = db.Column(db.Boolean, nullable=False)
     value = db.Column(db.Integer, nullable=True)
 
+    # rows per INSERT statement when inserting pieces in bulk; keeps the parameters of each
+    # statement (5 per row) under the limit of older SQLite versions (999)
+    INSERT_BATCH_SIZE = 150
+
     # pylint: disable=too-many-arguments
     def __init__(self, puzzle_id, x_coordinate, y_coordinate, value=None, static_piece=False):
         self.puzzle_id = puzzle_id
@@ -38,6 +42,44 @@ class PuzzlePiece(db.Model):
         """
         return cls.query.filter_by(puzzle_id=puzzle_id).all()
 
+    @classmethod
+    def find_pieces_for_puzzles(cls, puzzle_ids):
+        """
+        Find all pieces of several puzzles with a single query; returns a dictionary
+        of the pieces for each puzzle id.
+        """
+        pieces = {puzzle_id: [] for puzzle_id in puzzle_ids}
+        if pieces:
+            for piece in cls.query.filter(cls.puzzle_id.in_(pieces)).order_by(cls.id):
+                pieces[piece.puzzle_id].append(piece)
+        return pieces
+
+    @classmethod
+    def insert_pieces(cls, pieces):
+        """
+        Inserts new puzzle pieces with multi-row INSERT statements (INSERT_BATCH_SIZE pieces
+        per statement), rather than one statement per piece, without committing. The pieces
+        are not added to the session, so they are not given their ids.
+        """
+        rows = [{
+            'puzzle_id': piece.puzzle_id,
+            'x_coordinate': piece.x_coordinate,
+            'y_coordinate': piece.y_coordinate,
+            'static_piece': piece.static_piece,
+            'value': piece.value
+        } for piece in pieces]
+        for start in range(0, len(rows), cls.INSERT_BATCH_SIZE):
+            db.session.execute(
+                cls.__table__.insert().values(rows[start:start + cls.INSERT_BATCH_SIZE])
+            )
+
+    @classmethod
+    def delete_all_pieces(cls, puzzle_id):
+        """
+        Deletes all pieces associated with a given puzzle id (without committing).
+        """
+        cls.query.filter_by(puzzle_id=puzzle_id).delete()
+
     @classmethod
     def get_piece(cls, puzzle_id, x_coordinate, y_coordinate):
         """
@@ -54,6 +96,39 @@ class PuzzlePiece(db.Model):
                                   f"This position is off of the puzzle board.")
         return piece
 
+    @classmethod
+    def set_value(cls, puzzle_id, x_coordinate, y_coordinate, new_value):
+        """
+        Sets the value of a single (non-static) piece with a targeted UPDATE, without loading
+        the piece or committing. Returns the change in the number of empty pieces on the board
+        caused by the update: -1 if an empty piece was filled, 1 if a value was removed, else 0.
+        """
+        if not isinstance(new_value, int) and new_value is not None:
+            raise PuzzleException("Puzzle pieces can only have integer values, or None.")
+
+        query = cls.query.filter_by(
+            puzzle_id=puzzle_id,
+            x_coordinate=x_coordinate,
+            y_coordinate=y_coordinate,
+            static_piece=False
+        )
+        # the condition on the current value tells which way the number of empty pieces changed
+        if new_value is not None:
+            if query.filter(cls.value.is_(None)).update(
+                    {cls.value: new_value}, synchronize_session=False):
+                return -1
+            if query.update({cls.value: new_value}, synchronize_session=False):
+                return 0
+        else:
+            if query.filter(cls.value.isnot(None)).update(
+                    {cls.value: None}, synchronize_session=False):
+                return 1
+            if query.count():
+                return 0
+
+        # you cannot change pieces that came with the game board
+        raise PuzzleException("Changes can only be made to non-static puzzle pieces.")
+
     def save(self, autocommit=False):
         """
         Saves a new "puzzle piece" to the database, autocommits if True.
@@ -0,0 +1,183 @@
+"""
+Pool of pre-generated Sudoku puzzles, so that new puzzles can be created without
+generating the puzzle board while the request is handled (generating a board of
+size 4 or 5 can take several seconds).
+
+Pooled puzzles are grouped by size and difficulty bucket, where the buckets are the
+difficulty intervals that puzzle point values are based on (Puzzle.POINT_VALUES_DIFFICULTY);
+any puzzle in a bucket can be given out for a requested difficulty in the same bucket.
+Buckets are replenished by a background task once they fall below the low-water mark
+set by the PUZZLE_POOL_LOW_WATER configuration, and can be filled ahead of time with
+the `flask fill-puzzle-pool` command.
+
+Since pooled puzzles are generated off the request path, they are given a much larger time
+budget for keeping their solution unique (PUZZLE_POOL_GENERATION_BUDGET) than the puzzles
+generated while a request is handled (PUZZLE_GENERATION_BUDGET).
+"""
+import random
+from threading import Lock
+from backend import app, db, socketio
+from backend.engine.packed_board import pack_board, unpack_board
+from backend.models.sudoku_puzzle import Puzzle
+
+
+class PooledPuzzle(db.Model):
+    """
+    A generated puzzle board (with its solution), waiting to be given out as a new puzzle.
+    """
+    __tablename__ = 'puzzle_pool'
+    __table_args__ = (
+        db.Index('pool_bucket', 'size', 'bucket'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    size = db.Column(db.Integer, nullable=False)
+    bucket = db.Column(db.Integer, nullable=False)  # index of the difficulty interval
+    difficulty = db.Column(db.Float, nullable=False)  # difficulty the board was generated at
+    board = db.Column(db.LargeBinary, nullable=False)  # packed board (see engine.packed_board)
+    solution = db.Column(db.LargeBinary, nullable=False)
+    unique_solution = db.Column(db.Boolean, nullable=True)
+
+    BUCKETS = list(Puzzle.POINT_VALUES_DIFFICULTY.keys())
+    MAX_DRAW_ATTEMPTS = 3
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, size, bucket, difficulty, board, solution, unique_solution=None):
+        self.size = size
+        self.bucket = bucket
+        self.difficulty = difficulty
+        self.board = board
+        self.solution = solution
+        self.unique_solution = unique_solution
+
+    @classmethod
+    def get_bucket(cls, difficulty):
+        """
+        Returns the index of the difficulty bucket for the given difficulty, or None
+        if the difficulty is not in any bucket.
+        """
+        for index, (low, high) in enumerate(cls.BUCKETS):
+            if isinstance(difficulty, float) and low <= difficulty <= high:
+                return index
+        return None
+
+    @classmethod
+    def generate(cls, size, bucket, time_budget=None):
+        """
+        Generates a new puzzle for the pool, at a random difficulty within the bucket,
+        spending at most time_budget seconds (by default, PUZZLE_POOL_GENERATION_BUDGET)
+        keeping its solution unique.
+        """
+        low, high = cls.BUCKETS[bucket]
+        difficulty = round(random.uniform(low, high), 2)
+        if time_budget is None:
+            time_budget = app.config['PUZZLE_POOL_GENERATION_BUDGET']
+        puzzle = Puzzle(difficulty_level=difficulty, size=size, time_budget=time_budget)
+        board = puzzle.get_pieces_as_arr()
+        static = [[value is not None for value in row] for row in board]
+        return cls(size, bucket, difficulty, pack_board(board, static), puzzle.solution,
+                   puzzle.unique_solution)
+
+    @classmethod
+    def count_available(cls, size, bucket):
+        """
+        Returns the number of puzzles in the pool for the given size and difficulty bucket.
+        """
+        return cls.query.filter_by(size=size, bucket=bucket).count()
+
+    @classmethod
+    def draw(cls, difficulty, size):
+        """
+        Takes a puzzle out of the pool, returning it as a new (unsaved) Puzzle with the
+        requested difficulty; returns None if the pool has no puzzle for the request.
+        The puzzle is removed from the pool as part of the current transaction.
+        """
+        bucket = cls.get_bucket(difficulty)
+        if bucket is None or size not in app.config['PUZZLE_POOL_SIZES']:
+            return None
+
+        for _ in range(cls.MAX_DRAW_ATTEMPTS):
+            pooled = cls.query.filter_by(size=size, bucket=bucket).order_by(cls.id).first()
+            if not pooled:
+                return None
+
+            # the delete only succeeds for one of the requests drawing the same puzzle
+            if cls.query.filter_by(id=pooled.id).delete(synchronize_session=False):
+                board, _ = unpack_board(pooled.board, size)
+                puzzle = Puzzle(difficulty_level=difficulty, size=size, board=board)
+                puzzle.solution = pooled.solution
+                puzzle.unique_solution = pooled.unique_solution
+                db.session.expunge(pooled)
+                return puzzle
+        return None
+
+    @classmethod
+    def fill(cls, size, bucket, target, time_budget=None):
+        """
+        Generates puzzles for the given size and difficulty bucket until the pool holds
+        the target number of puzzles, committing each puzzle as it is generated (with the
+        given time budget, see generate). Returns the number of puzzles generated.
+        """
+        generated = 0
+        while cls.count_available(size, bucket) < target:
+            db.session.add(cls.generate(size, bucket, time_budget))
+            db.session.commit()
+            generated += 1
+            socketio.sleep(0)  # let other requests be handled between puzzles
+        return generated
+
+    @classmethod
+    def replenish(cls):
+        """
+        Refills every bucket that is below the low-water mark up to the pool's target size.
+        Returns the number of puzzles generated.
+        """
+        low_water = app.config['PUZZLE_POOL_LOW_WATER']
+        target = max(app.config['PUZZLE_POOL_TARGET'], low_water)
+        time_budget = app.config['PUZZLE_POOL_GENERATION_BUDGET']
+        generated = 0
+        for size in app.config['PUZZLE_POOL_SIZES']:
+            for bucket in range(len(cls.BUCKETS)):
+                if cls.count_available(size, bucket) < low_water:
+                    generated += cls.fill(size, bucket, target, time_budget)
+        return generated
+
+
+class PoolReplenisher:
+    """
+    Runs the replenishment of the puzzle pool as a background task, making sure that
+    only one such task runs at a time.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.requested = False
+
+    def notify(self):
+        """
+        Requests that the pool be replenished; starts the background task if it is not
+        already running (a running task replenishes the pool again once it is done).
+        Does nothing if no low-water mark is configured.
+        """
+        if app.config['PUZZLE_POOL_LOW_WATER'] <= 0:
+            return
+
+        self.requested = True
+        if self.lock.acquire(blocking=False):  # pylint: disable=consider-using-with
+            socketio.start_background_task(self.run)
+
+    def run(self):
+        """
+        Replenishes the pool until no further requests have been made.
+        """
+        try:
+            with app.app_context():
+                while self.requested:
+                    self.requested = False
+                    PooledPuzzle.replenish()
+        except Exception as exception:  # pylint: disable=broad-except
+            print(f"Exception occurred while replenishing the puzzle pool: {exception}")
+        finally:
+            self.lock.release()
+
+
+replenisher = PoolReplenisher()
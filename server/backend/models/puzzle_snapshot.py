@@ -0,0 +1,97 @@
+"""
+Module responsible for the snapshots of puzzle boards taken as moves are made.
+
+A snapshot of the board (packed, see backend.engine.packed_board) is saved every
+SNAPSHOT_INTERVAL moves and when the puzzle is completed, in the same transaction as the move;
+the board of a puzzle at any version can then be rebuilt from the latest snapshot taken at or
+before that version and the few journaled moves made since (see backend.models.puzzle_move),
+however many moves were made on the puzzle. Web socket clients resyncing from a version whose
+moves are no longer journaled are sent the pieces changed since the board at that version (see
+backend.sockets.missed_deltas).
+
+Since boards can be rebuilt from their latest snapshot, the journal can be compacted: the
+moves (and snapshots) of completed puzzles that are older than the retention window, and that
+the latest snapshot already accounts for, are removed by `flask compact-move-journal`.
+"""
+from datetime import datetime
+from sqlalchemy import Boolean, Integer, column, func, select, table
+from backend import db
+from backend.models.puzzle_move import PuzzleMove
+
+# lightweight declaration of the puzzles table, since the puzzle model depends on this one
+sudoku_puzzles = table('sudoku_puzzles', column('id', Integer), column('completed', Boolean))
+
+
+class PuzzleSnapshot(db.Model):
+    """
+    The packed board of a puzzle at a given version.
+    """
+    __tablename__ = 'puzzle_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('puzzle_id', 'version', name='unique_snapshot'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    puzzle_id = db.Column(db.Integer, db.ForeignKey('sudoku_puzzles.id'), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    packed_board = db.Column(db.LargeBinary, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __init__(self, puzzle_id, version, packed_board):
+        self.puzzle_id = puzzle_id
+        self.version = version
+        self.packed_board = packed_board
+
+    def save(self, autocommit=False):
+        """
+        Saves the snapshot to the database, autocommits if True.
+        """
+        db.session.add(self)
+        if autocommit:
+            db.session.commit()
+
+    @classmethod
+    def find_latest(cls, puzzle_id, version=None):
+        """
+        Finds the latest snapshot of the puzzle taken at or before the given version (by
+        default, at any version), or None if there is no such snapshot.
+        """
+        query = cls.query.filter(cls.puzzle_id == puzzle_id)
+        if version is not None:
+            query = query.filter(cls.version <= version)
+        return query.order_by(cls.version.desc()).first()
+
+    @classmethod
+    def compact_journal(cls, before):
+        """
+        Removes the journaled moves and the snapshots of completed puzzles that were made
+        before the given time (a naive UTC datetime), keeping the latest snapshot of each
+        puzzle and the moves made after it, so that the boards can still be rebuilt. Returns
+        the number of moves and snapshots removed; the changes are not committed.
+        """
+        completed = select([sudoku_puzzles.c.id]).where(sudoku_puzzles.c.completed)
+        latest = db.aliased(cls)
+
+        def latest_version(puzzle_id):
+            return select([func.max(latest.version)]).where(latest.puzzle_id == puzzle_id) \
+                .as_scalar()
+
+        # only the moves and snapshots older than the retention window are looked at (through
+        # the indexes on created_at), rather than every completed puzzle
+        moves = PuzzleMove.query.filter(
+            PuzzleMove.created_at < before,
+            PuzzleMove.puzzle_id.in_(completed),
+            PuzzleMove.version <= latest_version(PuzzleMove.puzzle_id)
+        ).delete(synchronize_session=False)
+        snapshots = cls.query.filter(
+            cls.created_at < before,
+            cls.puzzle_id.in_(completed),
+            cls.version < latest_version(cls.puzzle_id)
+        ).delete(synchronize_session=False)
+        return moves, snapshots
+
+    def __str__(self):
+        return (
+            f"PuzzleSnapshot(puzzle_id={self.puzzle_id}, version={self.version}, "
+            f"created_at={self.created_at})"
+        )
@@ -4,11 +4,30 @@ Sudoku Puzzle class is overarching class, holding a given puzzle's
 size, difficulty, point_value and puzzle pieces. The puzzle also
 keeps track of whether or not the Sudoku Puzzle has been completed,
 as pieces are incrementally added to the puzzle.
+
+The pieces of a puzzle are either stored as individual puzzle pieces, or packed
+into a single column of the puzzle itself (see backend.engine.packed_board); the
+storage used for new puzzles is set by the PUZZLE_STORAGE configuration.
+
+Every move made on a puzzle increases its version by one, so that clients following the
+moves of other players (see backend.sockets) can tell if they missed any; the moves are also
+journaled with their version (see backend.models.puzzle_move), so that missed moves can be
+caught up with. Snapshots of the board are taken every few moves (see
+backend.models.puzzle_snapshot), so that the board at any version can be rebuilt quickly.
 """
-from sudoku import Sudoku
+import random
+import sys
+from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
+from backend.engine.board_tasks import generate_board, solve_board
+from backend.engine.board_validator import BoardValidator
+from backend.engine.packed_board import pack_board, unpack_board, set_packed_value
+from backend.models.puzzle_move import PuzzleMove
 from backend.models.puzzle_pieces import PuzzlePiece
-from backend.models.puzzle_exception import PuzzleException
-from backend import db
+from backend.models.puzzle_snapshot import PuzzleSnapshot
+from backend.models.puzzle_exception import PuzzleConflict, PuzzleException
+from backend.models.user_score import UserScore
+from backend import app, db, executor
 
 
 class Puzzle(db.Model):
@@ -22,6 +41,11 @@ class Puzzle(db.Model):
     difficulty = db.Column(db.Float, nullable=False)
     size = db.Column(db.Integer, nullable=False)
     point_value = db.Column(db.Integer, nullable=False)
+    solution = db.Column(db.LargeBinary, nullable=True)  # solved board, one byte per value
+    unique_solution = db.Column(db.Boolean, nullable=True)  # None if not known
+    packed_board = db.Column(db.LargeBinary, nullable=True)  # only set for packed storage
+    empty_pieces = db.Column(db.Integer, nullable=True)  # number of pieces without a value
+    version = db.Column(db.Integer, nullable=True)  # number of moves made on the puzzle
 
     # full available range is 0 to 1
     POINT_VALUES_DIFFICULTY = {
@@ -42,46 +66,229 @@ class Puzzle(db.Model):
     SIZE_RANGE = (2, 5)
     DIFFICULTY_RANGE = (0.01, 0.99)
 
-    def __init__(self, difficulty_level=0.5, size=3, completed=False):
+    STORAGE_PIECES = 'pieces'
+    STORAGE_PACKED = 'packed'
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, difficulty_level=0.5, size=3, completed=False, board=None, solution=None,
+                 time_budget=None):
         self.difficulty = None
         self.size = None
         self.point_value = None
+        self.solution = None
+        self.unique_solution = None
         self.puzzle_pieces = []
+        self.validator = None
         self.completed = completed
+        self.version = 0
 
         self.set_difficulty(difficulty_level)
         self.set_size(size)
         self.set_point_value()
-        self.set_pieces()
+        if board is None:
+            self.set_pieces(time_budget)
+        else:
+            self.set_board(board, solution)
 
     @classmethod
-    def get_puzzle(cls, puzzle_id: int):
+    def get_puzzle(cls, puzzle_id: int, load_pieces: bool = True):
         """
-        Returns the Puzzle matching the given id, or None if no such id exists.
+        Returns the Puzzle matching the given id, or None if no such id exists. The puzzle
+        pieces are loaded in as well, unless specified otherwise.
         """
         puzzle = cls.query.filter_by(id=puzzle_id).first()  # returns None if no results matched
         if not puzzle:
             return None
 
-        # load in the puzzle pieces for the puzzle
-        puzzle.puzzle_pieces = PuzzlePiece.find_all_pieces(puzzle_id=puzzle_id)
+        puzzle.puzzle_pieces = []
+        puzzle.validator = None
+        if load_pieces:
+            puzzle.load_pieces()
+        return puzzle
+
+    @classmethod
+    def load_pieces_for_puzzles(cls, puzzles):
+        """
+        Loads in the puzzle pieces for several puzzles at once, with a single query for all
+        of the puzzles stored as individual puzzle pieces.
+        """
+        pieces = PuzzlePiece.find_pieces_for_puzzles(
+            [puzzle.id for puzzle in puzzles if not puzzle.is_packed()]
+        )
+        for puzzle in puzzles:
+            if puzzle.is_packed():
+                puzzle.unpack_pieces()
+            else:
+                puzzle.puzzle_pieces = pieces[puzzle.id]
+            puzzle.validator = None
+        return puzzles
+
+    # pylint: disable=too-many-arguments
+    @classmethod
+    def update_piece(cls, puzzle_id, x_coord, y_coord, value, expected_version=None,
+                     player_id=None):
+        """
+        Makes a move on the puzzle with the given id, without loading the whole puzzle board
+        where possible: the piece is changed with a single targeted UPDATE, and the rest of the
+        board is only loaded when no pieces are left empty (i.e., when the move could complete
+        the puzzle). The move is journaled as made by the given player, in the same transaction.
+        Returns the puzzle, with the version given to the move.
+
+        If an expected version is given, the move is only made if the puzzle is still at that
+        version (compare-and-swap on the version); otherwise, a PuzzleConflict is raised with
+        the current state of the piece. Moves made without a version are never rejected as
+        conflicting: moves that write back the whole board are made one at a time instead.
+        """
+        puzzle = cls.get_puzzle(puzzle_id, load_pieces=False)
+        if not puzzle:
+            raise PuzzleException(f"Puzzle {puzzle_id} does not exist.")
+        if expected_version is not None and (puzzle.version or 0) != expected_version:
+            raise cls.move_conflict(puzzle_id, x_coord, y_coord)
+
+        # packed boards are loaded with the puzzle anyway; puzzles without a counter
+        # of empty pieces have it set by a regular update. The whole board is written back,
+        # so the puzzle is locked (until the move is committed) before the board is loaded,
+        # and no other move can be made in between.
+        if puzzle.is_packed() or puzzle.empty_pieces is None:
+            puzzle = cls.get_puzzle_for_update(puzzle_id)
+            if expected_version is not None and (puzzle.version or 0) != expected_version:
+                raise cls.move_conflict(puzzle_id, x_coord, y_coord)
+            if not puzzle.puzzle_pieces:
+                puzzle.load_pieces()
+            try:
+                puzzle.update(x_coord, y_coord, value, player_id=player_id)
+            except PuzzleException:
+                db.session.rollback()  # releases the lock on the puzzle
+                raise
+            return puzzle
+
+        puzzle.validate_move(x_coord, y_coord, value)
+        # the version is counted first, so that concurrent moves on the puzzle are ordered by
+        # the update of its row, and the move is journaled (with the old value of the piece)
+        # under its version before the piece is changed
+        if not cls.count_move(puzzle_id, expected_version=expected_version):
+            # another move was made since the expected version, or completed the puzzle
+            raise cls.move_conflict(puzzle_id, x_coord, y_coord)
+        PuzzleMove.record_piece_move(puzzle_id, cls.current_version(puzzle_id), x_coord, y_coord,
+                                     value, player_id=player_id)
+        try:
+            change = PuzzlePiece.set_value(puzzle_id, x_coord, y_coord, value)
+        except PuzzleException:
+            db.session.rollback()  # the move is not counted
+            raise
+        if change:
+            cls.count_empty_pieces(puzzle_id, change)
+        # re-read, including concurrent moves
+        db.session.expire(puzzle, ['empty_pieces', 'version'])
+
+        if puzzle.empty_pieces == 0:
+            puzzle.load_pieces()
+            if puzzle.is_complete_puzzle():
+                puzzle.set_puzzle_complete()
+        puzzle.take_snapshot_if_due()
+
+        version, completed = puzzle.version, puzzle.completed
+        db.session.commit()
+        # the puzzle is expired by the commit; keep what is known of it, rather than re-read it
+        set_committed_value(puzzle, 'version', version)
+        set_committed_value(puzzle, 'completed', completed)
+        return puzzle
+
+    @classmethod
+    def get_puzzle_for_update(cls, puzzle_id):
+        """
+        Returns the Puzzle matching the given id as read again from the database, with its row
+        locked until the transaction ends (SELECT ... FOR UPDATE), so that no other move can be
+        made on the puzzle in the meantime. The puzzle pieces are not loaded.
+        """
+        puzzle = cls.query.filter_by(id=puzzle_id).with_for_update().populate_existing().one()
+        puzzle.puzzle_pieces = []
+        puzzle.validator = None
         return puzzle
 
+    @classmethod
+    def count_move(cls, puzzle_id, expected_version=None):
+        """
+        Increases the version of the puzzle for a move with a single UPDATE (so that concurrent
+        moves are all counted), unless the puzzle was completed (e.g., by a concurrent move).
+        If an expected version is given, the puzzle is only updated if it is at that version.
+        Returns True if the move was counted. The changes are not committed.
+        """
+        query = cls.query.filter(cls.id == puzzle_id, cls.completed.is_(False))
+        if expected_version is not None:
+            query = query.filter(func.coalesce(cls.version, 0) == expected_version)
+        return query.update({cls.version: func.coalesce(cls.version, 0) + 1},
+                            synchronize_session=False) > 0
+
+    @classmethod
+    def count_empty_pieces(cls, puzzle_id, change):
+        """
+        Changes the number of empty pieces of the puzzle by the change caused by a move, with
+        a single UPDATE (so that concurrent moves are all counted), without committing.
+        """
+        cls.query.filter_by(id=puzzle_id).update(
+            {cls.empty_pieces: cls.empty_pieces + change}, synchronize_session=False
+        )
+
+    @classmethod
+    def current_version(cls, puzzle_id):
+        """
+        Returns a subquery of the version of the puzzle, as seen by the statement it is used in.
+        """
+        return db.session.query(func.coalesce(cls.version, 0)).filter(cls.id == puzzle_id) \
+            .as_scalar()
+
+    @classmethod
+    def move_conflict(cls, puzzle_id, x_coord, y_coord):
+        """
+        Returns the PuzzleConflict for a move on the piece that conflicts with another move,
+        with the current version of the puzzle and value of the piece, or a PuzzleException if
+        the other move completed the puzzle; the changes made for the move are rolled back.
+        """
+        db.session.rollback()
+        puzzle = cls.get_puzzle(puzzle_id, load_pieces=False)
+        if puzzle.completed:
+            return PuzzleException('Updates cannot be made to previously completed puzzles.')
+        if puzzle.is_packed():
+            puzzle.unpack_pieces()
+            value = puzzle.get_pieces_as_arr()[y_coord][x_coord]
+        else:
+            value = PuzzlePiece.get_piece(puzzle_id, x_coord, y_coord).value
+        return PuzzleConflict("The puzzle was changed by another move; the move was not made.",
+                              puzzle.version or 0, x_coord, y_coord, value)
+
+    def load_pieces(self):
+        """
+        Loads in the puzzle pieces for the puzzle.
+        """
+        if self.is_packed():
+            self.unpack_pieces()
+        else:
+            self.puzzle_pieces = PuzzlePiece.find_all_pieces(puzzle_id=self.id)
+        self.validator = None
+
     def save(self, autocommit: bool = True):
         """
         Saves a new Sudoku puzzle to the database.
 
-        By default this automatically adds new records to SudokuPieces.
+        By default this automatically adds new records to SudokuPieces (inserted in bulk),
+        unless puzzles are configured to use packed storage; then the pieces are saved with
+        the puzzle.
         """
+        if app.config['PUZZLE_STORAGE'] == self.STORAGE_PACKED:
+            self.pack_pieces()
+        self.empty_pieces = sum(piece.value is None for piece in self.puzzle_pieces)
+
         # add the puzzle and flush; this allows the auto-increment id to be
         # assigned to current puzzle, without commit
         db.session.add(self)
         db.session.flush()
 
-        # save individual puzzle pieces
-        for puzzle_piece in self.puzzle_pieces:
-            puzzle_piece.puzzle_id = self.id
-            puzzle_piece.save(autocommit=False)
+        # save individual puzzle pieces, with a few multi-row INSERT statements
+        if not self.is_packed():
+            for puzzle_piece in self.puzzle_pieces:
+                puzzle_piece.puzzle_id = self.id
+            PuzzlePiece.insert_pieces(self.puzzle_pieces)
 
         if autocommit:  # commit all the changes, if requested
             db.session.commit()
@@ -118,17 +325,135 @@ class Puzzle(db.Model):
                                   f" to {self.SIZE_RANGE[1]}. Got {size}.")
         self.size = size
 
-    def set_pieces(self):
+    def set_pieces(self, time_budget=None):
         """
-        Set the puzzle pieces for the Sudoku board.
+        Set the puzzle pieces for the Sudoku board. The solved board used to generate
+        the puzzle is kept with the puzzle, so that it never has to be solved again, along
+        with whether it is the only solution of the puzzle. The board is generated by the
+        board executor's worker processes, spending at most time_budget seconds (by default,
+        PUZZLE_GENERATION_BUDGET) keeping the solution unique.
         """
-        pieces = Sudoku(self.size).difficulty(self.difficulty).board  # produces 2D array of values
-        for i, row in enumerate(pieces):
+        if time_budget is None:
+            time_budget = app.config['PUZZLE_GENERATION_BUDGET']
+        pieces, solution, self.unique_solution = executor.run(
+            generate_board, self.size, self.difficulty, random.randrange(sys.maxsize), time_budget
+        )
+        self.set_board(pieces, solution=solution)
+
+    def set_board(self, board, solution=None):
+        """
+        Set the puzzle pieces from a 2D array of values, where None represents an empty
+        piece and any other value is a static piece. The solution is stored, if known.
+        """
+        if solution is not None:
+            self.set_solution(solution)
+
+        for i, row in enumerate(board):
             for j, piece in enumerate(row):
                 static_piece = bool(piece)
                 new_piece = PuzzlePiece(self.id, j, i, piece, static_piece)
                 self.puzzle_pieces.append(new_piece)
 
+    def is_packed(self):
+        """
+        Determines if the pieces of this puzzle are stored packed with the puzzle.
+        """
+        return self.packed_board is not None
+
+    def pack_pieces(self):
+        """
+        Packs the current puzzle pieces into the puzzle's packed board.
+        """
+        self.packed_board = self.get_packed_pieces()
+
+    def get_packed_pieces(self):
+        """
+        Returns the current puzzle pieces, packed.
+        """
+        static = self.get_pieces_as_arr(static_only=True)
+        static_flags = [[value is not None for value in row] for row in static]
+        return pack_board(self.get_pieces_as_arr(), static_flags)
+
+    def take_snapshot_if_due(self):
+        """
+        Saves a snapshot of the board after every SNAPSHOT_INTERVAL moves (0 disables them),
+        and once the puzzle is completed, without committing; the pieces are loaded if needed.
+        """
+        interval = app.config['SNAPSHOT_INTERVAL']
+        if not (self.completed or (interval and (self.version or 0) % interval == 0)):
+            return
+        if not self.puzzle_pieces:
+            self.load_pieces()
+        PuzzleSnapshot(self.id, self.version or 0, self.get_packed_pieces()).save()
+
+    def rebuild_board(self, version=None):
+        """
+        Rebuilds the board of the puzzle as it was at the given version (by default, the
+        current version) from the latest snapshot taken at or before that version (or the
+        original board, if there is none) and the journaled moves made since; with a snapshot
+        every SNAPSHOT_INTERVAL moves, few moves are replayed however many were made. Raises a
+        PuzzleException if the moves needed are no longer journaled.
+        """
+        version = (self.version or 0) if version is None else version
+        snapshot = PuzzleSnapshot.find_latest(self.id, version)
+        if snapshot is not None:
+            board, _ = unpack_board(snapshot.packed_board, self.size)
+            start = snapshot.version
+        else:
+            if not self.puzzle_pieces:
+                self.load_pieces()
+            board, start = self.recreate_original_puzzle_as_array(), 0
+
+        moves = PuzzleMove.find_moves_since(self.id, start, limit=version - start)
+        if [move.version for move in moves] != list(range(start + 1, version + 1)):
+            raise PuzzleException(f"The board of puzzle {self.id} at version {version} cannot "
+                                  f"be rebuilt; some of its moves are no longer journaled.")
+        for move in moves:
+            board[move.y_coordinate][move.x_coordinate] = move.new_value
+        return board
+
+    def unpack_pieces(self):
+        """
+        Sets the puzzle pieces from the puzzle's packed board.
+        """
+        board, static = unpack_board(self.packed_board, self.size)
+        self.puzzle_pieces = [
+            PuzzlePiece(self.id, x_coord, y_coord, value, static[y_coord][x_coord])
+            for y_coord, row in enumerate(board)
+            for x_coord, value in enumerate(row)
+        ]
+
+    def convert_to_packed(self, autocommit=True):
+        """
+        Converts a puzzle stored as individual puzzle pieces to packed storage, removing
+        the individual puzzle pieces from the database.
+        """
+        if self.is_packed():
+            return
+
+        self.pack_pieces()
+        PuzzlePiece.delete_all_pieces(self.id)
+        if autocommit:
+            db.session.commit()
+
+    def set_solution(self, solved_arr):
+        """
+        Stores the solved board (2D array of values) with the puzzle.
+        """
+        self.solution = bytes(value for row in solved_arr for value in row)
+
+    def get_solution_as_arr(self):
+        """
+        Returns the stored solved board as a 2D array of values, or None if the
+        solution has not been stored for this puzzle yet.
+        """
+        if self.solution is None:
+            return None
+
+        dimensions = self.size * self.size
+        values = list(self.solution)
+        return [values[row * dimensions:(row + 1) * dimensions] for row in range(dimensions)]
+
     def set_point_value(self):
         """
         Based on the difficulty submitted, determines the point value associated with the puzzle.
@@ -148,9 +473,44 @@ class Puzzle(db.Model):
         # set point value as sum of points for difficulty and size
         self.point_value = difficulty_points + size_points
 
-    def update(self, x_coord, y_coord, value):
+    def update(self, x_coord, y_coord, value, player_id=None):
         """
-        Update a puzzle with the specified value at the x, y coordinate on the puzzle board.
+        Update a puzzle with the specified value at the x, y coordinate on the puzzle board; the
+        move is journaled as made by the given player. Returns True if the value conflicts with
+        another value in the same row, column or box.
+        """
+        self.validate_move(x_coord, y_coord, value)
+
+        # update the piece, and the validator in order to test if the puzzle is now complete
+        old_value = None
+        for piece in self.puzzle_pieces:
+            if piece.x_coordinate == x_coord and piece.y_coordinate == y_coord:
+                old_value = piece.value
+                piece.update(value, autocommit=False)
+                break
+        if self.is_packed():
+            self.packed_board = set_packed_value(self.packed_board, self.size,
+                                                 x_coord, y_coord, value)
+        validator = self.get_validator()
+        conflict = validator.place(x_coord, y_coord, value)
+        self.empty_pieces = validator.empty
+        self.version = (self.version or 0) + 1
+        if self.id is not None:
+            PuzzleMove(self.id, self.version, x_coord, y_coord, old_value, value,
+                       player_id=player_id).save()
+
+        if validator.is_complete():
+            self.set_puzzle_complete()
+        if self.id is not None:
+            self.take_snapshot_if_due()
+
+        # save all changes (change to the puzzle piece and the status of the
+        db.session.commit()
+        return conflict
+
+    def validate_move(self, x_coord, y_coord, value):
+        """
+        Checks that a move (the value at the x, y coordinate) can be made on this puzzle.
         """
         if self.completed:  # do not accept any changes to completed puzzles
             raise PuzzleException('Updates cannot be made to previously completed puzzles.')
@@ -169,43 +529,58 @@ class Puzzle(db.Model):
             raise PuzzleException(f"Invalid value provided ({value})."
                                   f" Available values are 1 to {value_range}.")
 
-        # update the piece in order to test if the puzzle is now complete
-        for piece in self.puzzle_pieces:
-            if piece.x_coordinate == x_coord and piece.y_coordinate == y_coord:
-                piece.update(value, autocommit=False)
-                break
-
-        if self.is_complete_puzzle():
-            self.set_puzzle_complete()
-
-        # save all changes (change to the puzzle piece and the status of the
-        db.session.commit()
+    def get_validator(self):
+        """
+        Gets the validator tracking the values on this puzzle board, building it from the
+        puzzle pieces the first time it is needed.
+        """
+        if getattr(self, 'validator', None) is None:
+            self.validator = BoardValidator(self.size, self.get_pieces_as_arr())
+        return self.validator
 
     def is_complete_puzzle(self):
         """
-        Check if a puzzle is complete (i.e., has a winning configuration)
+        Check if a puzzle is complete (i.e., has a winning configuration); this is the case
+        when there are no empty pieces and no conflicting values on the board.
         """
-        # if there are any None values, then puzzle has to be incomplete
-        if any(piece.value is None for piece in self.puzzle_pieces):
-            return False
-
-        # rebuild original sudoku puzzle form static pieces
-        discrepancies = self.compare_with_solved_board()
-        return not discrepancies
+        return self.get_validator().is_complete()
 
     def set_puzzle_complete(self, autocommit=False):
         """
-        Sets a puzzle as 'completed.'
+        Sets a puzzle as 'completed,' and adds its points to the scores of its players (as
+        part of the same transaction). Points are only added by the request that marks the
+        puzzle as completed, even if moves complete the puzzle concurrently.
         """
+        if self.id is not None and self.mark_completed(self.id):
+            UserScore.add_puzzle_points(self.id, self.point_value)
         self.completed = True
         if autocommit:
             db.session.commit()
 
+    @classmethod
+    def mark_completed(cls, puzzle_id):
+        """
+        Marks the puzzle with the given id as completed in the database (without committing);
+        returns False if the puzzle was already marked as completed.
+        """
+        return cls.query.filter_by(id=puzzle_id, completed=False).update(
+            {cls.completed: True}, synchronize_session=False
+        ) == 1
+
     def compare_with_solved_board(self):
         """
         Compares the current Sudoku puzzle with the solved board and gets a list
-        of indices that do not match.
+        of indices that do not match. Puzzles whose solution is known not to be unique may
+        be solved differently from the stored solution, so only the pieces that conflict
+        with other pieces of their row, column or box are reported for them.
         """
+        if self.unique_solution is False:
+            validator = self.get_validator()
+            dimensions = self.size * self.size
+            return [{'x_coordinate': x_coord, 'y_coordinate': y_coord}
+                    for y_coord in range(dimensions) for x_coord in range(dimensions)
+                    if validator.has_conflict(x_coord, y_coord)]
+
         solved_board = self.get_solved_puzzle()
         current_board_arr = self.get_pieces_as_arr()
         solved_board_arr = solved_board.get_pieces_as_arr()
@@ -226,14 +601,22 @@ class Puzzle(db.Model):
 
     def get_solved_puzzle(self):
         """
-        Gets the solved puzzle, by recreating the original puzzle as an array,
-        and using the Sudoku() library to solve the Sudoku board. Finally, it
-        uses this "solved" board to create an instance of this Puzzle class that
-        has all the same attributes as the current class, but with a completed
-        configuration.
+        Gets the solved puzzle, using the solution stored when the puzzle was created.
+        Puzzles stored before solutions were kept are solved once, by recreating the original
+        puzzle as an array and solving it with the board executor (using the solver set by the
+        PUZZLE_SOLVER configuration), and the solution is stored with the puzzle (it is
+        persisted with the next commit). Finally, it uses this "solved" board to create an
+        instance of this Puzzle class that has all the same attributes as the current class,
+        but with a completed configuration.
         """
         original_arr = self.recreate_original_puzzle_as_array()
-        solved_arr = Sudoku(self.size, self.size, board=original_arr).solve().board
+        solved_arr = self.get_solution_as_arr()
+        if solved_arr is None:
+            solved_arr = executor.run(solve_board, self.size, original_arr,
+                                      app.config['PUZZLE_SOLVER'])
+            if solved_arr is None:
+                raise PuzzleException(f"Puzzle {self.id} does not have a solution.")
+            self.set_solution(solved_arr)
 
         # create the winning puzzle board
         pieces = []
@@ -250,7 +633,8 @@ class Puzzle(db.Model):
                     )
                 )
 
-        solved_board = Puzzle(self.difficulty, self.size, True)
+        solved_board = Puzzle(self.difficulty, self.size, True,
+                              board=original_arr, solution=solved_arr)
         solved_board.puzzle_pieces = pieces
         return solved_board
 
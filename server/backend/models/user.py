@@ -16,7 +16,7 @@ class User(db.Model):
     g_id = db.Column(db.String(25), nullable=False, unique=True)
     first_name = db.Column(db.String(80))
     last_name = db.Column(db.String(80))
-    email = db.Column(db.String(80), nullable=False)
+    email = db.Column(db.String(80), nullable=False, index=True)
 
     def __init__(self, g_id, first_name, last_name, email):
         self.g_id = g_id
@@ -35,20 +35,18 @@ class User(db.Model):
     @classmethod
     def find_users_by_email(cls, emails):
         """
-        Given a list of user emails, find the users associated with the emails.
-        Function returns tuple of the list of "found" users and a list of emails
-        that were not found in the system.
+        Given a list of user emails, find the users associated with the emails, using a
+        single query. Function returns tuple of the list of "found" users and a list of
+        emails that were not found in the system, both in the order of the given emails.
         """
-        found = []
-        not_found = []
-
-        for email in emails:
-            user = cls.find_by_email(email)
-            if user is not None:
-                found.append(user)
-            else:
-                not_found.append(email)
+        emails = list(emails)
+        users = {}
+        if emails:
+            for user in cls.query.filter(cls.email.in_(emails)).order_by(cls.id.desc()):
+                users[user.email] = user  # the first user registered with an email is kept
 
+        found = [users[email] for email in emails if email in users]
+        not_found = [email for email in emails if email not in users]
         return found, not_found
 
     @classmethod
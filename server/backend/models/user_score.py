@@ -0,0 +1,170 @@
+"""
+Module responsible for the scores of users on the leaderboard.
+
+A user's score is the sum of the point values of the completed puzzles they play. Scores are
+kept in their own table, updated in the same transaction as the changes that affect them (a
+puzzle being completed, or a player joining a completed puzzle), so that the leaderboard is a
+read of the top scores rather than an aggregate over all completed puzzles. Scores can be
+recomputed from the puzzles with the `flask rebuild-user-scores` command.
+
+The top of the leaderboard is also cached in memory (see backend.leaderboard_cache); the new
+scores of a transaction are kept with the session and written through to the cache once the
+transaction commits, so that scores that are rolled back are never served.
+"""
+from sqlalchemy import Boolean, Integer, column, event, func, literal_column, select, table
+from backend import db, leaderboard_cache
+from backend.leaderboard_cache import LeaderboardEntry
+from backend.models.user import User
+
+PENDING_SCORES = 'leaderboard_scores'  # session.info key of the scores changed in a transaction
+
+# lightweight declarations of the tables scores are computed from, since the models
+# of these tables depend on this one
+puzzle_players = table('puzzle_players', column('player_id', Integer), column('puzzle_id', Integer))
+sudoku_puzzles = table('sudoku_puzzles', column('id', Integer), column('completed', Boolean),
+                       column('point_value', Integer))
+
+
+class UserScore(db.Model):
+    """
+    The cumulative score of a user, from the completed puzzles they play.
+    """
+    __tablename__ = 'user_scores'
+    __table_args__ = (
+        db.Index('user_scores_ranking', 'score', 'user_id'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    score = db.Column(db.Integer, nullable=False, default=0)
+
+    def __init__(self, user_id, score=0):
+        self.user_id = user_id
+        self.score = score
+
+    @classmethod
+    def add_puzzle_points(cls, puzzle_id, points, player_id=None):
+        """
+        Adds the points of a completed puzzle to the scores of all of its players, or only
+        to the score of the given player (e.g., a player joining the completed puzzle).
+        Scores are created as needed; the changes are part of the current transaction.
+        """
+        players = select([puzzle_players.c.player_id])\
+            .where(puzzle_players.c.puzzle_id == puzzle_id)
+        if player_id is not None:
+            players = players.where(puzzle_players.c.player_id == player_id)
+
+        missing = players.where(puzzle_players.c.player_id.notin_(select([cls.user_id])))
+
+        db.session.flush()  # the players may have just been added
+        db.session.execute(cls.__table__.insert().from_select(
+            ['user_id', 'score'],
+            missing.with_only_columns([puzzle_players.c.player_id, literal_column('0')])
+        ))
+        db.session.execute(
+            cls.__table__.update()
+            .where(cls.user_id.in_(players))
+            .values(score=cls.score + points)
+        )
+        pending = db.session.info.setdefault(PENDING_SCORES, [])
+        if leaderboard_cache.size > 0 and pending is not None:
+            pending.extend(LeaderboardEntry(*row)
+                           for row in cls.query_entries().filter(cls.user_id.in_(players)))
+
+    @classmethod
+    def query_entries(cls):
+        """
+        Query the leaderboard entries (user id, first name, last name and score) of users.
+        """
+        return (
+            db.session.query(cls.user_id, User.first_name, User.last_name, cls.score)
+            .join(User, User.id == cls.user_id)
+        )
+
+    @classmethod
+    def get_top_scores(cls, n_results):
+        """
+        Get the users with the highest scores (as user id, first name, last name and score);
+        users with equal scores are listed with the most recently registered user first, which
+        lets the ranking be read from the index in reverse.
+        """
+        return (
+            cls.query_entries()
+            .filter(cls.score > 0)
+            .order_by(cls.score.desc(), cls.user_id.desc())
+            .limit(n_results)
+        )
+
+    @classmethod
+    def get_leaderboard(cls, n_results):
+        """
+        Get the n users with the highest scores (as in get_top_scores()), from the leaderboard
+        cache when it holds at least n users, loading the cache as needed.
+        """
+        entries = leaderboard_cache.get(n_results)
+        if entries is not None:
+            return entries
+        if n_results > leaderboard_cache.size:
+            return [LeaderboardEntry(*row) for row in cls.get_top_scores(n_results)]
+
+        token = leaderboard_cache.start_load()
+        entries = [LeaderboardEntry(*row) for row in cls.get_top_scores(leaderboard_cache.size)]
+        leaderboard_cache.load(entries, token)
+        return entries[:n_results]
+
+    @classmethod
+    def compute_scores(cls):
+        """
+        Computes the scores of all users from the completed puzzles they play, returning
+        a dictionary of the score of each user (by id) with at least one completed puzzle.
+        """
+        rows = db.session.execute(
+            select([puzzle_players.c.player_id, func.sum(sudoku_puzzles.c.point_value)])
+            .select_from(puzzle_players.join(
+                sudoku_puzzles, sudoku_puzzles.c.id == puzzle_players.c.puzzle_id
+            ))
+            .where(sudoku_puzzles.c.completed.is_(True))
+            .group_by(puzzle_players.c.player_id)
+        )
+        return {user_id: int(score) for user_id, score in rows}
+
+    @classmethod
+    def rebuild(cls, autocommit=True):
+        """
+        Recomputes the scores of all users from scratch, replacing the stored scores.
+        Returns the number of scores stored and the number of users whose stored score
+        differed from the recomputed score.
+        """
+        stored = dict(db.session.query(cls.user_id, cls.score))
+        scores = cls.compute_scores()
+        changed = sum(stored.get(user_id, 0) != score for user_id, score in scores.items())
+        changed += sum(score != 0 for user_id, score in stored.items() if user_id not in scores)
+
+        cls.query.delete()
+        db.session.add_all([cls(user_id, score) for user_id, score in scores.items()])
+        db.session.info[PENDING_SCORES] = None  # scores may have decreased; reload the cache
+        if autocommit:
+            db.session.commit()
+        return len(scores), changed
+
+
+@event.listens_for(db.session, 'after_commit')
+def write_through_scores(session):
+    """
+    Writes the scores changed by the committed transaction through to the leaderboard cache.
+    """
+    if PENDING_SCORES not in session.info:
+        return
+    entries = session.info.pop(PENDING_SCORES)
+    if entries is None:
+        leaderboard_cache.invalidate()
+    else:
+        leaderboard_cache.update(entries)
+
+
+@event.listens_for(db.session, 'after_transaction_end')
+def discard_scores(session, transaction):
+    """
+    Discards the scores changed by a transaction that ended without being committed.
+    """
+    if transaction.parent is None:
+        session.info.pop(PENDING_SCORES, None)
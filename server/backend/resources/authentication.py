@@ -4,9 +4,14 @@ before each request, as well as user registration.
 """
 from flask import g
 from flask_restful import Resource
+import requests
+from backend import app, token_cache
 from backend.models.user import User
 from backend.google_auth import GoogleAuth
 
+# shared by all requests, so that connections to the Google API are reused
+google_auth = GoogleAuth.from_config(app.config)
+
 
 def verify_token(incoming_request):
     """
@@ -52,21 +57,45 @@ def is_valid_token(token):
     Takes a token, determines if it is valid and returns the validation resulting
     from the Google Auth API. Determines if the token is valid so that calling function
     does not need to do any additional checks to know the result, but can use the
-    error description from the validation provided.
+    error description from the validation provided. Validations are cached (see
+    backend.token_cache), so that the Google Auth API is only called for new tokens.
+    Tokens that cannot be validated because the Google Auth API cannot be reached (once its
+    retries are exhausted) are rejected, without caching the failure.
     """
-    google_auth = GoogleAuth()
-    validation = google_auth.validate_token(token)
+    validation = token_cache.get(token)
+    if validation is None:
+        try:
+            validation = google_auth.validate_token(token)
+        except requests.RequestException as exception:
+            return False, {'error': 'unavailable',
+                           'error_description': f'token could not be validated, as the Google '
+                                                f'API could not be reached '
+                                                f'({type(exception).__name__})'}
+        token_cache.put(token, validation)
+
     if 'error' in validation.keys():
         return False, validation
     return True, validation
 
 
+class TokenCacheStats(Resource):
+    """
+    Resource for monitoring the cache of token validations of this server process.
+    """
+    @staticmethod
+    def get():
+        """
+        Returns the number of cache hits and misses so far, and the number of cached tokens.
+        """
+        return token_cache.stats()
+
+
 class Registration(Resource):
     """
     Resource for registering a user with this puzzle API. Requires that an access_token
     is set.
     """
-    google_auth = GoogleAuth()
+    google_auth = google_auth
 
     def post(self):
         """
@@ -2,6 +2,7 @@
 Resource for handling leaderboard information.
 """
 from flask_restful import Resource, reqparse
+from backend import leaderboard_cache
 from backend.models.player import PuzzlePlayer
 
 
@@ -23,11 +24,6 @@ class Leaderboard(Resource):
         n_results = args['limit'] if (args['limit'] is not None and args['limit'] > 0) else 10
 
         top_players = PuzzlePlayer.get_top_players(n_results)
-        if not top_players:
-            return {
-                'message': 'No users have completed puzzles.',
-                'puzzles': []
-            }
         return {
             'players': [
                 user_score_as_dict(
@@ -40,6 +36,19 @@ class Leaderboard(Resource):
         }
 
 
+class LeaderboardStats(Resource):
+    """
+    Resource for monitoring the leaderboard cache of this server process.
+    """
+    @staticmethod
+    def get():
+        """
+        Returns the hits, misses and hit rate of the leaderboard cache, its write-through
+        updates and size, and how stale it is (see LeaderboardCache.stats).
+        """
+        return leaderboard_cache.stats()
+
+
 def user_score_as_dict(first_name, last_name, score):
     """
     Helper function for converting a user + score into a dictionary
@@ -18,11 +18,9 @@ class SudokuPlayer(Resource):
         Player may add themselves to the puzzle, if they are not already affiliated with
         the puzzle.
         """
-        # find all puzzles associated with the player making the request
-        player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(g.user.g_id)
-
-        # if the requested puzzle doesn't exist for the user, then return error
-        if any(puzzle.puzzle_id == puzzle_id for puzzle in player_puzzles):
+        # if the player making the request is already associated with the puzzle, do nothing
+        if PuzzlePlayer.is_player_of_puzzle(g.user.id, puzzle_id,
+                                            cache=g.setdefault('memberships', {})):
             return {
                 'message': f"{g.user.as_str()} is already is associated "
                            f"with puzzle {puzzle_id}."
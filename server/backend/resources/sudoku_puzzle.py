@@ -19,11 +19,9 @@ class SudokuPuzzle(Resource):
         """
         Finds a puzzle specified by puzzle_id.
         """
-        # find all puzzles associated with the player making the request
-        player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(g.user.g_id)
-
         # if the requested puzzle doesn't exist for the user, then return error
-        if not any(puzzle.puzzle_id == puzzle_id for puzzle in player_puzzles):
+        if not PuzzlePlayer.is_player_of_puzzle(g.user.id, puzzle_id,
+                                                cache=g.setdefault('memberships', {})):
             return {'message': f"Puzzle requested does not exist or is not associated "
                                f"with user {g.user.as_str()}"}, 404  # not found
 
@@ -38,15 +36,10 @@ class SudokuPuzzle(Resource):
         Allows changes to be made to puzzles, namely making a specific puzzle
         hidden from a specific user in the UI.
         """
-        # find all puzzles associated with the player making the request (visible and hidden)
-        player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(g_id=g.user.g_id)
+        # find the puzzle for the player making the request (visible or hidden)
+        puzzle_to_edit = PuzzlePlayer.find_player_puzzle(g.user.id, puzzle_id)
 
         # if the requested puzzle doesn't exist for the user, then return error
-        puzzle_to_edit = None
-        for puzzle in player_puzzles:
-            if puzzle.puzzle_id == puzzle_id:
-                puzzle_to_edit = puzzle
-
         if not puzzle_to_edit:
             return {'message': f"Puzzle requested does not exist or is not associated "
                                f"with user {g.user.as_str()}"}, 404  # not found
@@ -72,9 +65,10 @@ class SudokuPuzzle(Resource):
                     'reason': 'Unknown error occurred.'}, 500
 
 
-def sudoku_to_dict(puzzle, puzzle_players=None):
+def sudoku_to_dict(puzzle, puzzle_players=None, include_pieces=True):
     """
-    Converts information about a Sudoku board into a dictionary.
+    Converts information about a Sudoku board into a dictionary; the puzzle pieces
+    can be left out (for a summary of the puzzle).
     """
 
     def puzzle_piece_as_dict(puzzle_piece):
@@ -95,16 +89,35 @@ def sudoku_to_dict(puzzle, puzzle_players=None):
             'email': user.email
         }
 
-    puzzle = {
+    puzzle_dict = {
         'puzzle_id': puzzle.id,
         'completed': puzzle.completed,
         'difficulty': puzzle.difficulty,
         'point_value': puzzle.point_value,
-        'pieces': [puzzle_piece_as_dict(piece) for piece in puzzle.puzzle_pieces]
+        'version': puzzle.version or 0
     }
 
+    # puzzle pieces are left out of summaries
+    if include_pieces:
+        puzzle_dict['pieces'] = [puzzle_piece_as_dict(piece) for piece in puzzle.puzzle_pieces]
+
     # puzzle players do not have to be specified
     if puzzle_players:
-        puzzle['players'] = [user_as_dict(player) for player in puzzle_players]
+        puzzle_dict['players'] = [user_as_dict(player) for player in puzzle_players]
+
+    return puzzle_dict
+
 
-    return puzzle
+def puzzle_delta(puzzle_id, puzzle, pieces):
+    """
+    Converts a move on a puzzle into a dictionary holding only the pieces changed by the
+    move (given as (x, y, value) tuples), along with the version of the puzzle after the
+    move and whether the move completed the puzzle.
+    """
+    return {
+        'puzzle_id': puzzle_id,
+        'version': puzzle.version,
+        'completed': puzzle.completed,
+        'pieces': [{'x_coordinate': x_coord, 'y_coordinate': y_coord, 'value': value}
+                   for x_coord, y_coord, value in pieces]
+    }
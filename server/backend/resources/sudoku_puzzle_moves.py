@@ -0,0 +1,103 @@
+"""
+Resource for getting the moves made on a puzzle since a given version, from the journal of
+moves (see backend.models.puzzle_move), so that clients that missed some moves can catch up
+without getting the whole puzzle board.
+"""
+from flask import g
+from flask_restful import Resource, reqparse
+from backend import app
+from backend.models.player import PuzzlePlayer
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.sudoku_puzzle import Puzzle
+
+
+class SudokuPuzzleMoves(Resource):
+    """
+    Resource for retrieving the journaled moves of a Sudoku puzzle.
+    """
+    def __init__(self):
+        self.parser = reqparse.RequestParser(bundle_errors=True)
+        self.parser.add_argument(
+            'since', type=int, required=True, location='args',
+            help='The version of the puzzle the moves are requested since must be specified'
+        )
+        self.parser.add_argument(
+            'limit', type=int, location='args',
+            help='The limit must be the maximum number of moves to return'
+        )
+
+    def get(self, puzzle_id):
+        """
+        Returns the moves made on the puzzle after the given version, in pages ordered by
+        version; the next page starts after the version given by next_since (which is None on
+        the last page). If some of the moves are no longer journaled, the request fails (410)
+        and the whole puzzle should be requested instead.
+        """
+        if not PuzzlePlayer.is_player_of_puzzle(g.user.id, puzzle_id,
+                                                cache=g.setdefault('memberships', {})):
+            return {'message': f"Puzzle requested does not exist or is not associated "
+                               f"with user {g.user.as_str()}"}, 404  # not found
+
+        args = self.parser.parse_args()
+        limit = app.config['MOVES_PAGE_SIZE'] if args['limit'] is None else args['limit']
+        max_limit = app.config['MOVES_MAX_PAGE_SIZE']
+        if not 1 <= limit <= max_limit:
+            return {'message': 'Failed to get the moves of the puzzle',
+                    'reason': f'The limit must range between 1 and {max_limit}. '
+                              f'Got {limit}.'}, 400
+
+        puzzle = Puzzle.get_puzzle(puzzle_id, load_pieces=False)
+        version, since = puzzle.version or 0, args['since']
+        if not 0 <= since <= version:
+            return {'message': 'Failed to get the moves of the puzzle',
+                    'reason': f'The version must range between 0 and {version}. '
+                              f'Got {since}.'}, 400
+
+        # one more move than the limit is requested, to find out if there is a next page
+        moves = PuzzleMove.find_moves_since(puzzle_id, since, limit=limit + 1)
+        if since < version and not PuzzleMove.covers(moves, since):
+            return {'message': 'Failed to get the moves of the puzzle',
+                    'reason': f'The moves made since version {since} are no longer journaled; '
+                              f'get the whole puzzle instead.',
+                    'version': version}, 410
+
+        next_since = None
+        if len(moves) > limit:
+            moves = moves[:limit]
+            next_since = moves[-1].version
+        return {
+            'puzzle_id': puzzle_id,
+            'version': max([version] + [move.version for move in moves]),
+            'completed': puzzle.completed,
+            'moves': [move_to_dict(move) for move in moves],
+            'next_since': next_since
+        }
+
+
+def move_to_dict(move):
+    """
+    Converts a journaled move into a dictionary.
+    """
+    return {
+        'version': move.version,
+        'player_id': move.player_id,
+        'x_coordinate': move.x_coordinate,
+        'y_coordinate': move.y_coordinate,
+        'old_value': move.old_value,
+        'new_value': move.new_value,
+        'created_at': move.created_at.isoformat()
+    }
+
+
+def move_delta(move, completed=False):
+    """
+    Converts a journaled move into a 'puzzle_delta' event, as announced when the move was made
+    (see backend.resources.sudoku_puzzle.puzzle_delta).
+    """
+    return {
+        'puzzle_id': move.puzzle_id,
+        'version': move.version,
+        'completed': completed,
+        'pieces': [{'x_coordinate': move.x_coordinate, 'y_coordinate': move.y_coordinate,
+                    'value': move.new_value}]
+    }
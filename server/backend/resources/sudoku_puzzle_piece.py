@@ -1,11 +1,19 @@
 """
-Resource for handling edits to individual puzzle pieces.
+Resource for handling edits to individual puzzle pieces. Every move is announced to the
+players in the puzzle's web socket room as a 'puzzle_delta' event; moves can also be made
+over the web socket (see backend.sockets).
+
+A move can give the version of the puzzle it was made against; it is then only made if no
+other move was made since, and is otherwise rejected (409) with the current version of the
+puzzle and value of the piece.
 """
 from flask import g
 from flask_restful import Resource, reqparse
+from backend import lock_manager, socketio
 from backend.models.player import PuzzlePlayer
-from backend.models.puzzle_exception import PuzzleException
+from backend.models.puzzle_exception import PuzzleConflict, PuzzleException
 from backend.models.sudoku_puzzle import Puzzle
+from backend.resources.sudoku_puzzle import puzzle_delta
 
 
 class SudokuPuzzlePiece(Resource):
@@ -26,6 +34,12 @@ class SudokuPuzzlePiece(Resource):
             help='The y-coordinate of the puzzle piece must be specified',
             required=True
         )
+        self.parser.add_argument(
+            'version',
+            type=int,
+            help='The version of the puzzle the move is made against must be an integer',
+            required=False
+        )
 
     def post(self, puzzle_id):
         """
@@ -43,13 +57,22 @@ class SudokuPuzzlePiece(Resource):
             required=True
         )
         args = self.parser.parse_args()
+        if not self.player_can_move(puzzle_id, args):
+            return {'message': f'Attempt to save {args["value"]} at ({args["x_coordinate"]}, '
+                               f'{args["y_coordinate"]}) on puzzle_id {puzzle_id}'
+                               f' by user {g.user.as_str()} was unsuccessful',
+                    'reason': 'The puzzle piece is locked by another player.'}, 409
         try:
-            puzzle = Puzzle.get_puzzle(puzzle_id)
-            puzzle.update(
+            puzzle = Puzzle.update_piece(
+                puzzle_id,
                 x_coord=args['x_coordinate'],
                 y_coord=args['y_coordinate'],
-                value=args['value']
+                value=args['value'],
+                expected_version=args.get('version'),
+                player_id=g.user.id
             )
+            announce_move(puzzle_id, puzzle,
+                          (args['x_coordinate'], args['y_coordinate'], args['value']))
 
             return {
                 'message': f"Successfully saved the submission of {args['value']} at "
@@ -57,6 +80,12 @@ class SudokuPuzzlePiece(Resource):
                            f"puzzle_id {puzzle_id} by {g.user.as_str()}"
             }
 
+        except PuzzleConflict as conflict:
+            return {'message': f'Attempt to save {args["value"]} at ({args["x_coordinate"]}, '
+                               f'{args["y_coordinate"]}) on puzzle_id {puzzle_id}'
+                               f' by user {g.user.as_str()} was unsuccessful',
+                    'reason': conflict.get_message(), **conflict_state(conflict)}, 409
+
         except PuzzleException as p_exception:
             return {'message': f'Attempt to save {args["value"]} at ({args["x_coordinate"]}, '
                                f'{args["y_coordinate"]}) on puzzle_id {puzzle_id}'
@@ -76,16 +105,31 @@ class SudokuPuzzlePiece(Resource):
                                f'is not associated with {g.user.as_str()}'}, 404
 
         args = self.parser.parse_args()
+        if not self.player_can_move(puzzle_id, args):
+            return {'message': f'Attempt to delete piece at ({args["x_coordinate"]}, '
+                               f'{args["y_coordinate"]}) on puzzle_id {puzzle_id}'
+                               f' by user {g.user.as_str()} was unsuccessful',
+                    'reason': 'The puzzle piece is locked by another player.'}, 409
         try:
-            puzzle = Puzzle.get_puzzle(puzzle_id)
-            puzzle.update(
+            puzzle = Puzzle.update_piece(
+                puzzle_id,
                 x_coord=args['x_coordinate'],
                 y_coord=args['y_coordinate'],
-                value=None
+                value=None,
+                expected_version=args.get('version'),
+                player_id=g.user.id
             )
+            announce_move(puzzle_id, puzzle,
+                          (args['x_coordinate'], args['y_coordinate'], None))
             return {'message': f"Successfully deleted piece at position ({args['x_coordinate']}, "
                                f"{args['y_coordinate']}) on puzzle_id {puzzle_id}."}
 
+        except PuzzleConflict as conflict:
+            return {'message': f'Attempt to delete piece at ({args["x_coordinate"]}, '
+                               f'{args["y_coordinate"]}) on puzzle_id {puzzle_id}'
+                               f' by user {g.user.as_str()} was unsuccessful',
+                    'reason': conflict.get_message(), **conflict_state(conflict)}, 409
+
         except PuzzleException as p_exception:
             return {'message': f'Attempt to delete piece at ({args["x_coordinate"]}, '
                                f'{args["y_coordinate"]}) on puzzle_id {puzzle_id}'
@@ -96,15 +140,41 @@ class SudokuPuzzlePiece(Resource):
             print(f"Unexpected error: {exception}")
             return {'message': 'Unexpected error occurred while deleting value from puzzle'}, 500
 
+    @staticmethod
+    def player_can_move(puzzle_id, args):
+        """
+        Determine if the player making the request can change the puzzle piece, i.e., if the
+        piece is not locked by another player (see backend.lock_manager).
+        """
+        return lock_manager.can_move(puzzle_id, args['x_coordinate'], args['y_coordinate'],
+                                     user_id=g.user.id)
+
     @staticmethod
     def player_associated_with_puzzle(puzzle_id):
         """
         Determine if the player making the request is associated with the puzzle
         they are submitting a change for.
         """
-        # find all puzzles associated with the player making the request
-        player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(g.user.g_id)
+        return PuzzlePlayer.is_player_of_puzzle(g.user.id, puzzle_id,
+                                                cache=g.setdefault('memberships', {}))
 
-        if not any(puzzle.puzzle_id == puzzle_id for puzzle in player_puzzles):
-            return False
-        return True
+
+def announce_move(puzzle_id, puzzle, piece):
+    """
+    Sends the piece changed by a move, as an (x, y, value) tuple, to the players in
+    the puzzle's room.
+    """
+    socketio.emit('puzzle_delta', puzzle_delta(puzzle_id, puzzle, [piece]), room=puzzle_id)
+
+
+def conflict_state(conflict):
+    """
+    Returns the current state of the puzzle given by a PuzzleConflict: the version of the
+    puzzle and the piece the move was made on.
+    """
+    return {
+        'version': conflict.version,
+        'piece': {'x_coordinate': conflict.x_coordinate,
+                  'y_coordinate': conflict.y_coordinate,
+                  'value': conflict.value}
+    }
@@ -2,10 +2,11 @@
 Resource for getting all puzzles associated with a user, or creating a new puzzle.
 """
 from flask import g
-from flask_restful import Resource, reqparse
-from backend import db
+from flask_restful import Resource, reqparse, inputs
+from backend import app, db
 from backend.models.player import PuzzlePlayer, MAX_PLAYERS_PER_PUZZLE
 from backend.models.puzzle_exception import PuzzleException
+from backend.models.puzzle_pool import PooledPuzzle, replenisher
 from backend.models.sudoku_puzzle import Puzzle
 from backend.models.user import User
 from backend.resources.sudoku_puzzle import sudoku_to_dict
@@ -36,30 +37,73 @@ class SudokuPuzzles(Resource):
             action='append'
         )
 
-    @staticmethod
-    def get():
+        # query string arguments for paging through and filtering the user's puzzles
+        self.list_parser = reqparse.RequestParser(bundle_errors=True)
+        self.list_parser.add_argument(
+            'cursor', type=int, location='args',
+            help='The cursor must be the next_cursor returned with the previous page of puzzles'
+        )
+        self.list_parser.add_argument(
+            'limit', type=int, location='args',
+            help='The limit must be the maximum number of puzzles to return'
+        )
+        self.list_parser.add_argument(
+            'fields', choices=('full', 'summary'), default='full', location='args',
+            help='The fields must be either full (with puzzle pieces) or summary (without)'
+        )
+        self.list_parser.add_argument('completed', type=inputs.boolean, location='args',
+                                      help='Filter on whether the puzzles are completed')
+        self.list_parser.add_argument('size', type=int, location='args',
+                                      help='Filter on the size of the puzzles')
+        self.list_parser.add_argument('difficulty', type=float, location='args',
+                                      help='Filter on the difficulty of the puzzles')
+
+    def get(self):
         """
-        Returns all of the sudoku puzzles for the user making the request;
-        by default, returns only the "visible" and not hidden puzzles.
+        Returns the sudoku puzzles for the user making the request, in pages ordered by puzzle
+        id; by default, returns only the "visible" and not hidden puzzles. The next page starts
+        after the puzzle given by the cursor (the next_cursor of the previous page, which is None
+        on the last page). Puzzles can be filtered on completion, size and difficulty, and only
+        summaries of the puzzles (without their pieces) are returned if fields is "summary".
         """
-        # based on the user, find all of their active puzzles
-        player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(g.user.g_id, hidden=False)
+        args = self.list_parser.parse_args()
+        limit = app.config['PUZZLES_PAGE_SIZE'] if args['limit'] is None else args['limit']
+        max_limit = app.config['PUZZLES_MAX_PAGE_SIZE']
+        if not 1 <= limit <= max_limit:
+            return {'message': 'Failed to get Sudoku puzzles',
+                    'reason': f'The limit must range between 1 and {max_limit}. '
+                              f'Got {limit}.'}, 400
 
-        if not player_puzzles:
+        # based on the user, find their active puzzles (with their pieces, unless summarized);
+        # one more puzzle than the limit is requested, to find out if there is a next page
+        include_pieces = args['fields'] == 'full'
+        filters = {name: args[name] for name in ('completed', 'size', 'difficulty')
+                   if args[name] is not None}
+        puzzles = PuzzlePlayer.find_puzzles_for_player(
+            g.user.id, hidden=False, after_id=args['cursor'], limit=limit + 1,
+            load_pieces=include_pieces, **filters
+        )
+        next_cursor = None
+        if len(puzzles) > limit:
+            puzzles = puzzles[:limit]
+            next_cursor = puzzles[-1].id
+
+        if not puzzles:
             return {
                 'message': f'No unhidden sudoku puzzles are associated with {g.user.as_str()}',
-                'puzzles': []
+                'puzzles': [],
+                'next_cursor': None
             }
 
-        # format all of the sudoku puzzles and return them
+        # find the players of all of the puzzles at once, then format the puzzles and return them
+        puzzle_players = PuzzlePlayer.find_players_for_puzzles([puzzle.id for puzzle in puzzles])
         return {
             'puzzles': [
-                sudoku_to_dict(
-                    puzzle=Puzzle.get_puzzle(puzzle.puzzle_id),
-                    puzzle_players=PuzzlePlayer.find_players_for_puzzle(puzzle.puzzle_id)
-                )
-                for puzzle in player_puzzles
-            ]
+                sudoku_to_dict(puzzle=puzzle, puzzle_players=puzzle_players[puzzle.id],
+                               include_pieces=include_pieces)
+                for puzzle in puzzles
+            ],
+            'next_cursor': next_cursor
         }
 
     def post(self):
@@ -77,24 +121,26 @@ class SudokuPuzzles(Resource):
                               f'is {MAX_PLAYERS_PER_PUZZLE}'}, 400
 
         try:
-            # do the database work
-            new_puzzle = Puzzle(difficulty_level=args['difficulty'], size=args['size'])
+            # do the database work; take the puzzle from the pool if possible,
+            # as generating a new puzzle board can be slow
+            new_puzzle = PooledPuzzle.draw(difficulty=args['difficulty'], size=args['size'])
+            if new_puzzle is None:
+                new_puzzle = Puzzle(difficulty_level=args['difficulty'], size=args['size'])
             puzzle_id = new_puzzle.save(autocommit=False)
 
-            # create new entry for player
-            puzzle_player = PuzzlePlayer(player_id=g.user.id, puzzle_id=puzzle_id)
-            puzzle_player.save(autocommit=False)
-
-            # add any subsequent users that the player requested to add to their puzzle
+            # add the player, along with any subsequent users that the player requested to
+            # add to their puzzle (looked up at once), as the puzzle's players
             players_registered, players_unregistered = User.find_users_by_email(
-                emails=set(additional_emails) if additional_emails else []
+                emails=sorted(set(additional_emails)) if additional_emails else []
+            )
+            PuzzlePlayer.add_players_to_new_puzzle(
+                puzzle_id, [g.user.id] + [player.id for player in players_registered],
+                autocommit=False
             )
-            for player in players_registered:
-                if player.id != g.user.id:
-                    PuzzlePlayer.add_player_to_puzzle(puzzle_id, player, autocommit=False)
 
             # now commit all changes as a single transaction
             db.session.commit()
+            replenisher.notify()
             return {
                 'message': 'New Sudoku puzzle successfully created',
                 'difficulty': args['difficulty'],
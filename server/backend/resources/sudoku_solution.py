@@ -3,6 +3,7 @@ Resource for getting a solution to a given puzzle.
 """
 from flask import g
 from flask_restful import Resource
+from backend import db
 from backend.models.player import PuzzlePlayer
 from backend.models.sudoku_puzzle import Puzzle
 from backend.resources.sudoku_puzzle import sudoku_to_dict
@@ -20,17 +21,21 @@ class SudokuPuzzleSolution(Resource):
         Returns the solved puzzle for a given puzzle id, as well as a list
         of the discrepancies in the current puzzle relative to the solved version.
         """
-        # find all puzzles associated with the player making the request
-        player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(g.user.g_id)
-
         # if the requested puzzle doesn't exist for the user, then return error
-        if not any(puzzle.puzzle_id == puzzle_id for puzzle in player_puzzles):
+        if not PuzzlePlayer.is_player_of_puzzle(g.user.id, puzzle_id,
+                                                cache=g.setdefault('memberships', {})):
             return {'message': f"Puzzle requested does not exist or is not associated "
                                f"with user {g.user.as_str()}"}, 404  # not found
 
         # get the puzzle and return it back
         puzzle = Puzzle.get_puzzle(puzzle_id)
-        return {
+        solution_stored = puzzle.solution is not None
+        solution = {
             'solved_puzzle': sudoku_to_dict(puzzle.get_solved_puzzle()),
             'discrepancy': puzzle.compare_with_solved_board()
         }
+
+        # puzzles created before solutions were stored get their solution saved on first access
+        if not solution_stored:
+            db.session.commit()
+        return solution
@@ -0,0 +1,71 @@
+"""
+Keeps the database schema up to date. Tables are created with db.create_all(), which creates the
+missing tables but never changes the tables that already exist; the columns and indexes added
+since to existing tables are added here (with ALTER TABLE and CREATE INDEX), so that databases
+created by earlier versions of the server can be upgraded in place, with `flask upgrade-db`.
+Every step is idempotent.
+"""
+from sqlalchemy import inspect
+from backend import db
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.puzzle_pool import PooledPuzzle
+from backend.models.puzzle_snapshot import PuzzleSnapshot
+from backend.models.sudoku_puzzle import Puzzle
+from backend.models.user import User
+
+# columns added to existing tables, by table; all of them are nullable
+ADDED_COLUMNS = {
+    Puzzle.__table__: ('solution', 'unique_solution', 'packed_board', 'empty_pieces', 'version'),
+    PooledPuzzle.__table__: ('unique_solution',),
+}
+
+# indexes added to existing tables, by table
+ADDED_INDEXES = {
+    User.__table__: ('ix_users_email',),
+    PuzzleMove.__table__: ('ix_puzzle_moves_created_at',),
+    PuzzleSnapshot.__table__: ('ix_puzzle_snapshots_created_at',),
+}
+
+
+def upgrade_schema():
+    """
+    Creates the missing tables and adds the missing columns and indexes to the existing
+    tables; returns the names of the columns ('table.column') and indexes added.
+    """
+    db.create_all()
+    added = []
+    for table, column_names in ADDED_COLUMNS.items():
+        added += add_missing_columns(table, column_names)
+    for table, index_names in ADDED_INDEXES.items():
+        added += add_missing_indexes(table, index_names)
+    return added
+
+
+def add_missing_columns(table, column_names):
+    """
+    Adds the given columns of the table to the database if they are missing from it; returns
+    the names of the columns added, as 'table.column'.
+    """
+    existing = {column['name'] for column in inspect(db.engine).get_columns(table.name)}
+    added = []
+    for name in column_names:
+        if name in existing:
+            continue
+        column_type = table.c[name].type.compile(dialect=db.engine.dialect)
+        db.engine.execute(f'ALTER TABLE {table.name} ADD COLUMN {name} {column_type}')
+        added.append(f'{table.name}.{name}')
+    return added
+
+
+def add_missing_indexes(table, index_names):
+    """
+    Creates the given indexes of the table if they are missing from the database; returns
+    the names of the indexes created.
+    """
+    existing = {index['name'] for index in inspect(db.engine).get_indexes(table.name)}
+    added = []
+    for index in table.indexes:
+        if index.name in index_names and index.name not in existing:
+            index.create(db.engine)
+            added.append(index.name)
+    return added
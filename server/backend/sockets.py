@@ -2,15 +2,35 @@
 Defines the socket capabilities for backend, notably joining
 and leaving rooms that are 1:1 with puzzles and being able to
 send messages between users of the same puzzle.
+
+Connections are authenticated once, when they are opened: the validation of the oauth
+token and the user it belongs to are kept for the connection (by session ID) until it
+disconnects, so that events do not validate tokens or look up users again.
 """
+from collections import namedtuple
 from flask import request
 from flask_socketio import join_room, leave_room, rooms
 from backend.models.player import PuzzlePlayer
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.puzzle_exception import PuzzleConflict, PuzzleException
 from backend.models.user import User
-from backend import socketio
+from backend import app, lock_manager, socketio
+from backend.lock_manager import LockSweeper
 from backend.models.sudoku_puzzle import Puzzle
 from backend.resources.authentication import is_valid_token
-from backend.resources.sudoku_puzzle import sudoku_to_dict
+from backend.resources.sudoku_puzzle import puzzle_delta, sudoku_to_dict
+from backend.resources.sudoku_puzzle_moves import move_delta
+from backend.resources.sudoku_puzzle_piece import announce_move, conflict_state
+
+# identity of a connection: the validation of its token, the user (None if the user was not
+# registered yet when the connection was opened), and the puzzle memberships found for the user
+SocketAuth = namedtuple('SocketAuth', ['validation', 'user', 'memberships'])
+
+# identity of each web socket connection (by session ID), kept until disconnect
+connections = {}
+
+# removes the expired piece locks in the background, announcing their removal
+lock_sweeper = LockSweeper(lock_manager)
 
 
 @socketio.on('connect')
@@ -19,7 +39,8 @@ def client_connect():
     Method that is used automatically when a client attempts to open a web socket
     connection with the server. In order to establish the connection,
     a oauth token must be provided and it must be valid according to the Google API.
-    Note that if the token is not valid, the
+    Note that if the token is not valid, the connection is refused; otherwise the identity
+    of the connection is kept for the events sent on it.
     """
     oauth_token = request.args.get('auth')
     if not oauth_token:
@@ -31,6 +52,8 @@ def client_connect():
         print(f"Supplied oauth token is not valid: {validation['error_description']}")
         return False
 
+    user = User.find_by_g_id(validation['user_id'])
+    connections[request.sid] = SocketAuth(validation, user, {})
     print(f"Client with unique session ID {request.sid} has connected...")
     return True
 
@@ -42,54 +65,119 @@ def client_disconnect():
     from a web socket connection with the server.
     """
     print(f'Client with session ID {request.sid} has been disconnected')
+    connections.pop(request.sid, None)
+    release_locks(request.sid)
     socketio.emit('disconnect', {'msg': 'Client disconnected'}, room=request.sid)
 
 
 @socketio.on('join')
 def on_join(data):
     """
-    Leave a websocket representing a puzzle room; data should be in format
-    {puzzle_id: <puzzle_id>, token: <oauth_token>}, where puzzle_id represents
-    a "room" that can be joined. Note that users can only enter web socket "rooms" if they
-    are, in fact, associated with a puzzle.
+    Join a websocket representing a puzzle room; data should be in format
+    {puzzle_id: <puzzle_id>}, where puzzle_id represents a "room" that can be joined (the
+    user is the one the connection was opened for). Note that users can only enter web
+    socket "rooms" if they are, in fact, associated with a puzzle. Clients that join the room
+    are acknowledged with the current locks on the puzzle's pieces, as {locks: [<lock>, ...]}.
     """
-    if any(key not in data.keys() for key in ['token', 'puzzle_id']):
-        return False
-
-    # find out who user is
-    is_valid, validation = is_valid_token(data['token'])
-    if not is_valid:
+    puzzle_id = get_puzzle_id(data)
+    if puzzle_id is None:
         return False
 
-    # find the user in our system; if they do not exist, do not do anything
-    user = User.find_by_g_id(validation['user_id'])
-    if not user:
+    # the user must be registered in our system; if they are not, do not do anything
+    user = get_user()
+    if user is None:
         return False
 
     # make sure that they can join the room, based on the puzzles they
     # are participating in
-    puzzle_id = int(data['puzzle_id'])
-    player_puzzles = PuzzlePlayer.find_all_puzzles_for_player(user.g_id)
-    if not any(puzzle.puzzle_id == puzzle_id for puzzle in player_puzzles):
+    memberships = connections[request.sid].memberships
+    if not PuzzlePlayer.is_player_of_puzzle(user.id, puzzle_id, cache=memberships):
         return False
 
     join_room(room=puzzle_id)
     socketio.emit('player_joined', {"msg": f'Player joined room {puzzle_id}'}, room=puzzle_id)
-    return True
+    return {'locks': [lock_as_dict(puzzle_id, x_coord, y_coord, piece_lock.player)
+                      for (x_coord, y_coord), piece_lock
+                      in sorted(lock_manager.get_puzzle_locks(puzzle_id).items())]}
 
 
 @socketio.on('move')
 def on_move(data):
     """
-    Handles announcement of a move on the puzzle board for puzzle piece.
+    Makes a move on a puzzle board; data should be in format {puzzle_id: <puzzle_id>,
+    x_coordinate: <x>, y_coordinate: <y>, value: <value>, version: <version>}, where a
+    missing or null value deletes the value of the piece, and the optional version is the
+    version of the puzzle the move is made against. Only clients that joined the puzzle's room
+    (i.e., players of the puzzle) can make moves. The move is validated and saved as with the
+    piece endpoints, then announced to the room as a 'puzzle_delta' event; the client is
+    acknowledged with {version: <version>, completed: <completed>}, or {error: <reason>}
+    if the move was not made (along with the current version and piece, as {version: ...,
+    piece: {...}}, if another move was made since the given version).
     """
-    print("A move was submitted by a user!")
-    if 'puzzle_id' not in data.keys():
+    try:
+        puzzle_id = int(data['puzzle_id'])
+        x_coord, y_coord = int(data['x_coordinate']), int(data['y_coordinate'])
+        value = data.get('value')
+        value = int(value) if value is not None else None
+        version = data.get('version')
+        version = int(version) if version is not None else None
+    except (KeyError, TypeError, ValueError):
+        return {'error': 'A move needs a puzzle_id, x_coordinate, y_coordinate and value.'}
+
+    if puzzle_id not in rooms():
+        return {'error': f'Join the room of puzzle {puzzle_id} before making moves on it.'}
+    if not lock_manager.can_move(puzzle_id, x_coord, y_coord, sid=request.sid):
+        return {'error': f'Piece ({x_coord}, {y_coord}) is locked by another player.'}
+
+    try:
+        puzzle = Puzzle.update_piece(puzzle_id, x_coord=x_coord, y_coord=y_coord, value=value,
+                                     expected_version=version,
+                                     player_id=get_user().id)
+    except PuzzleConflict as conflict:
+        return {'error': conflict.get_message(), **conflict_state(conflict)}
+    except PuzzleException as p_exception:
+        return {'error': p_exception.get_message()}
+    except Exception as exception:  # pylint: disable=broad-except
+        print(f"Unexpected error: {exception}")
+        return {'error': 'Unexpected error occurred while making the move.'}
+
+    announce_move(puzzle_id, puzzle, (x_coord, y_coord, value))
+    return {'version': puzzle.version, 'completed': puzzle.completed}
+
+
+@socketio.on('resync')
+def on_resync(data):
+    """
+    Moves are announced to the puzzle's room as 'puzzle_delta' events (see
+    backend.resources.sudoku_puzzle_piece), each with the version of the puzzle after the move;
+    a client that finds a gap in the versions can catch up with this event. Data should be in
+    format {puzzle_id: <puzzle_id>, version: <version>}, where the optional version is the
+    last version of the puzzle seen by the client: the moves made since are then sent again
+    as 'puzzle_delta' events, from the journal of moves, or as a single 'puzzle_delta' event
+    holding all of the pieces changed since, with {from_version: <version>}, if they cannot
+    all be sent from the journal (see missed_deltas). The whole puzzle is sent instead (as a
+    'puzzle_update' event) if no version is given, or if the board at that version cannot be
+    rebuilt. Nothing is sent to clients that did not join the puzzle's room.
+    """
+    puzzle_id = get_puzzle_id(data)
+    if puzzle_id is None or puzzle_id not in rooms():
         return
 
-    puzzle_id = int(data['puzzle_id'])
+    version = data.get('version')
+    try:
+        version = int(version) if version is not None else None
+    except (TypeError, ValueError):
+        return
+    if version is not None:
+        deltas = missed_deltas(puzzle_id, version)
+        if deltas is not None:
+            for delta in deltas:
+                socketio.emit('puzzle_delta', delta, room=request.sid)
+            return
+
     puzzle = Puzzle.get_puzzle(puzzle_id)
-    socketio.emit('puzzle_update', sudoku_to_dict(puzzle), room=puzzle_id)
+    if puzzle:
+        socketio.emit('puzzle_update', sudoku_to_dict(puzzle), room=request.sid)
 
 
 @socketio.on('message')
@@ -99,41 +187,55 @@ def on_message(data):
     puzzle board. Emits the message to all people who are currently in the puzzle
     "room" at the time.
     """
-    if 'puzzle_id' not in data.keys():
+    puzzle_id = get_puzzle_id(data)
+    if puzzle_id is None or puzzle_id not in rooms():
         return
 
     print("A new message was sent by a user!")
-    socketio.emit('message_update', data, room=int(data['puzzle_id']))
+    socketio.emit('message_update', data, room=puzzle_id)
 
 
 @socketio.on('add_lock')
 def on_lock(data):
     """
     In order to prevent users from working on the same puzzle piece at the same
-    time, the frontend can emit "add_lock" events, which will be routed here
-    to all currently members of the puzzle to prevent others from acting on that
-    piece at the same time.
+    time, the frontend can emit "add_lock" events; data should be in format
+    {puzzle_id: <puzzle_id>, x_coordinate: <x>, y_coordinate: <y>, player: <player>}.
+    If the piece is not locked by another client, the lock is taken (or its lease renewed)
+    and routed to all current members of the puzzle, to prevent others from acting on that
+    piece at the same time. The client is acknowledged with {locked: True}, or with
+    {locked: False, player: <player holding the lock>}.
     """
-    if 'puzzle_id' not in data.keys():
-        return
+    piece = get_piece(data)
+    if piece is None:
+        return None
+
+    puzzle_id, x_coord, y_coord = piece
+    if not lock_manager.acquire(puzzle_id, x_coord, y_coord, request.sid,
+                                user_id=get_user().id, player=data.get('player')):
+        holder = lock_manager.get_lock(puzzle_id, x_coord, y_coord)
+        return {'locked': False, 'player': holder.player if holder else None}
 
-    print(f"A new lock should be created; client with "
-          f"session ID {request.sid} is making a move.")
-    socketio.emit('lock_update_add', data, room=int(data['puzzle_id']))
+    print(f"A new lock was created; client with session ID {request.sid} is making a move.")
+    socketio.emit('lock_update_add', data, room=puzzle_id)
+    lock_sweeper.notify()
+    return {'locked': True}
 
 
 @socketio.on('remove_lock')
 def on_lock_remove(data):
     """
     In order to prevent users from working on the same puzzle piece at the same
-    time, the frontend can emit "add_lock" events; this event allows events to be
-    removed, but routing the remove event to all members of the current room.
+    time, the frontend can emit "add_lock" events; this event allows the lock to be
+    removed by the client holding it, routing the remove event to all members of the
+    current room.
     """
-    if 'puzzle_id' not in data.keys():
+    piece = get_piece(data)
+    if piece is None or not lock_manager.release(*piece, request.sid):
         return
 
-    print("A new lock should be removed, based on user completing their submission.")
-    socketio.emit('lock_update_remove', data, room=int(data['puzzle_id']))
+    print("A lock was removed, based on user completing their submission.")
+    socketio.emit('lock_update_remove', data, room=piece[0])
 
 
 @socketio.on('leave')
@@ -142,10 +244,120 @@ def on_leave(data):
     Called upon when a client emits an event to leave a puzzle room.
     Expects that data should be in format {puzzle_id: <puzzle_id>}.
     """
-    if 'puzzle_id' not in data.keys():
+    puzzle_id = get_puzzle_id(data)
+    if puzzle_id is None:
         return
 
-    puzzle_id = int(data['puzzle_id'])
+    release_locks(request.sid, puzzle_id)
     leave_room(puzzle_id)
     socketio.emit('player_left', {"msg": f'Player left room {puzzle_id}'}, room=puzzle_id)
     print(rooms())
+
+
+def get_user():
+    """
+    Returns the user of the current web socket connection, or None if the user is not
+    registered. Users that were not registered yet when the connection was opened (e.g.,
+    clients that connect before registering) are looked up again, and kept for the connection
+    once found. Clients in a puzzle's room always have a user.
+    """
+    auth = connections.get(request.sid)
+    if auth is None:
+        return None
+    if auth.user is None:
+        user = User.find_by_g_id(auth.validation['user_id'])
+        if user is None:
+            return None
+        auth = connections[request.sid] = auth._replace(user=user)
+    return auth.user
+
+
+def get_puzzle_id(data):
+    """
+    Gets the id of the puzzle that an event is about, or None if it is missing or invalid.
+    """
+    try:
+        return int(data['puzzle_id'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_piece(data):
+    """
+    Gets the puzzle id and the coordinates of the piece that an event is about, or None
+    if they are missing or if the client is not in the puzzle's room.
+    """
+    try:
+        piece = int(data['puzzle_id']), int(data['x_coordinate']), int(data['y_coordinate'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return piece if piece[0] in rooms() else None
+
+
+def release_locks(sid, puzzle_id=None):
+    """
+    Releases the locks held by a client (only on the given puzzle, if one is given),
+    routing a remove event for each lock to the members of the puzzle's room.
+    """
+    for locked_puzzle_id, x_coord, y_coord in lock_manager.release_all(sid, puzzle_id):
+        socketio.emit('lock_update_remove', lock_as_dict(locked_puzzle_id, x_coord, y_coord),
+                      room=locked_puzzle_id)
+
+
+def announce_expired_lock(puzzle_id, x_coord, y_coord):
+    """
+    Announces the removal of a lock whose lease expired to the players in the puzzle's room.
+    """
+    socketio.emit('lock_update_remove', lock_as_dict(puzzle_id, x_coord, y_coord), room=puzzle_id)
+
+
+lock_manager.on_expired = announce_expired_lock
+
+
+def lock_as_dict(puzzle_id, x_coord, y_coord, player=None):
+    """
+    Helper function for converting a lock on a piece into a dictionary.
+    """
+    lock_dict = {'puzzle_id': puzzle_id, 'x_coordinate': x_coord, 'y_coordinate': y_coord}
+    if player is not None:
+        lock_dict['player'] = player
+    return lock_dict
+
+
+def missed_deltas(puzzle_id, version):
+    """
+    Returns the 'puzzle_delta' events of the moves made on the puzzle since the given version,
+    from the journal of moves. If some of the moves are no longer journaled, or if there are
+    more than MOVES_PAGE_SIZE of them, a single delta holding the pieces changed since that
+    version (given as its from_version) is returned instead, the board at that version being
+    rebuilt from its latest snapshot; returns None if it cannot be rebuilt either (the whole
+    puzzle is then sent).
+    """
+    puzzle = Puzzle.get_puzzle(puzzle_id, load_pieces=False)
+    if not puzzle or not 0 <= version <= (puzzle.version or 0):
+        return None
+    if version == (puzzle.version or 0):
+        return []
+
+    max_moves = app.config['MOVES_PAGE_SIZE']
+    moves = PuzzleMove.find_moves_since(puzzle_id, version, limit=max_moves + 1)
+    if len(moves) <= max_moves and PuzzleMove.covers(moves, version):
+        # only the last of the moves can have completed the puzzle
+        return [move_delta(move, completed=puzzle.completed and move is moves[-1])
+                for move in moves]
+
+    try:
+        missed_board = puzzle.rebuild_board(version)
+    except PuzzleException:
+        return None
+    if not puzzle.puzzle_pieces:
+        puzzle.load_pieces()
+    board = puzzle.get_pieces_as_arr()
+    delta = puzzle_delta(puzzle_id, puzzle, [
+        (x_coord, y_coord, value)
+        for y_coord, row in enumerate(board)
+        for x_coord, value in enumerate(row)
+        if value != missed_board[y_coord][x_coord]
+    ])
+    delta['from_version'] = version
+    return [delta]
@@ -0,0 +1,101 @@
+"""
+In-process cache of OAuth token validations, so that a token is not validated with the
+Google API on every request (and every socket event) made with it.
+
+Tokens are cached under a SHA-256 hash of the token, so that tokens themselves are never
+kept in memory by the cache. Valid tokens are cached until they expire (using the
+`expires_in` field of the validation), up to TOKEN_CACHE_MAX_TTL seconds, so that revoked
+tokens are still noticed; rejected tokens are cached for TOKEN_CACHE_NEGATIVE_TTL seconds.
+The cache holds at most TOKEN_CACHE_SIZE tokens, evicting the least recently used token;
+a size of 0 disables the cache.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TokenCache:
+    """
+    Least recently used cache of token validations, with an expiry time per token.
+    """
+    def __init__(self, app=None, clock=time.monotonic):
+        self.app = app
+        self.clock = clock
+        self.entries = OrderedDict()  # token hash -> (expiry time, validation)
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        """
+        Sets the app whose configuration sizes the cache.
+        """
+        self.app = app
+
+    @staticmethod
+    def get_key(token):
+        """
+        Returns the key of a token in the cache.
+        """
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+    def get(self, token):
+        """
+        Returns the cached validation of the token, or None if the token is not cached
+        (or its validation has expired).
+        """
+        if self.app.config['TOKEN_CACHE_SIZE'] <= 0:
+            return None
+
+        key = self.get_key(token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, validation):
+        """
+        Caches the validation of the token (which is rejected if it holds an error).
+        """
+        max_size = self.app.config['TOKEN_CACHE_SIZE']
+        if max_size <= 0:
+            return
+
+        if 'error' in validation:
+            ttl = self.app.config['TOKEN_CACHE_NEGATIVE_TTL']
+        else:
+            try:
+                expires_in = int(validation.get('expires_in', 0))
+            except (TypeError, ValueError):
+                expires_in = 0
+            ttl = min(expires_in, self.app.config['TOKEN_CACHE_MAX_TTL'])
+        if ttl <= 0:
+            return
+
+        key = self.get_key(token)
+        with self.lock:
+            self.entries[key] = (self.clock() + ttl, validation)
+            self.entries.move_to_end(key)
+            while len(self.entries) > max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all tokens from the cache.
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        Returns the number of cache hits and misses so far, and the number of cached tokens.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
@@ -0,0 +1,110 @@
+"""
+Benchmark of the completion check made when a move is submitted to a puzzle.
+
+Compares the previous approach (scan every piece, then solve the board from its static
+pieces and compare it with the current board) with the incremental board validator,
+for every supported board size. Each move fills the last empty piece of the board.
+
+The validator is timed both with its build from the pieces of the board (as paid by a move on
+a puzzle that was just loaded, see Puzzle.get_validator) and without it (the incremental check
+alone, as for a validator that is already built); the speedup is given for the former.
+
+Run from the server directory with: python -m benchmarks.completion_check
+"""
+import statistics
+import time
+from sudoku import Sudoku
+from backend.models.sudoku_puzzle import Puzzle
+
+REPEATS = 50
+DIFFICULTY = 0.5
+
+
+def solved_board(size):
+    """
+    Builds a solved board of the given size from the standard shifted-row pattern.
+    """
+    dimensions = size * size
+    return [[(size * (row % size) + row // size + column) % dimensions + 1
+             for column in range(dimensions)] for row in range(dimensions)]
+
+
+def puzzle_missing_last_piece(size):
+    """
+    Creates a puzzle where roughly half the pieces were given (static) and every other
+    piece was played, except for the last piece of the board.
+    """
+    solution = solved_board(size)
+    dimensions = size * size
+    board = [[value if (row * dimensions + column) % 2 else None
+              for column, value in enumerate(values)] for row, values in enumerate(solution)]
+
+    puzzle = Puzzle(difficulty_level=DIFFICULTY, size=size, board=board)
+    for piece in puzzle.puzzle_pieces:
+        if not piece.static_piece:
+            piece.value = solution[piece.y_coordinate][piece.x_coordinate]
+    last = puzzle.puzzle_pieces[-1]
+    last.value = None
+    return puzzle, last, solution[last.y_coordinate][last.x_coordinate]
+
+
+def solver_check(puzzle):
+    """
+    The completion check used before the validator: scan for empty pieces, then
+    solve the original board and compare the current board with the solution.
+    """
+    if any(piece.value is None for piece in puzzle.puzzle_pieces):
+        return False
+    original = puzzle.recreate_original_puzzle_as_array()
+    solved = Sudoku(puzzle.size, puzzle.size, board=original).solve().board
+    return solved == puzzle.get_pieces_as_arr()
+
+
+def validator_check(puzzle, last, build):
+    """
+    The completion check with the board validator: the move is placed on the validator, which
+    is built from the pieces of the board first if build is True (otherwise, the validator
+    built before the move is used).
+    """
+    if build:
+        puzzle.validator = None
+    validator = puzzle.get_validator()
+    if not build:
+        validator.place(last.x_coordinate, last.y_coordinate, last.value)
+    return validator.is_complete()
+
+
+def time_move(check, size):
+    """
+    Times a move that fills the last piece of a board, followed by the completion check.
+    Returns the median time per move in milliseconds.
+    """
+    timings = []
+    for _ in range(REPEATS):
+        puzzle, last, value = puzzle_missing_last_piece(size)
+        puzzle.get_validator()  # built before the move, for the incremental check
+
+        start = time.perf_counter()
+        last.value = value
+        check(puzzle, last)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    """
+    Runs the benchmark for each supported size and prints the results as a table.
+    """
+    print(f"{'size':>4} {'pieces':>6} {'solver (ms)':>12} {'validator with build (ms)':>26} "
+          f"{'incremental (ms)':>17} {'speedup':>8}")
+    for size in range(Puzzle.SIZE_RANGE[0], Puzzle.SIZE_RANGE[1] + 1):
+        solver_ms = time_move(lambda puzzle, last: solver_check(puzzle), size)
+        build_ms = time_move(lambda puzzle, last: validator_check(puzzle, last, True), size)
+        incremental_ms = time_move(lambda puzzle, last: validator_check(puzzle, last, False),
+                                   size)
+        print(f"{size:>4} {size ** 4:>6} {solver_ms:>12.3f} {build_ms:>26.4f} "
+              f"{incremental_ms:>17.4f} {solver_ms / build_ms:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
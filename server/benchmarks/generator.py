@@ -0,0 +1,53 @@
+"""
+Benchmark of puzzle board generation (see backend.engine.generator), for every puzzle size
+and for a difficulty in each difficulty bucket (see Puzzle.POINT_VALUES_DIFFICULTY).
+
+Reports the median, 99th percentile and maximum generation time, along with the share of
+generated puzzles whose solution is known to be unique. Generation uses the default time
+budget for uniqueness checks (PUZZLE_GENERATION_BUDGET).
+
+Run from the server directory with: python -m benchmarks.generator
+"""
+import random
+import time
+from backend import app
+from backend.engine.generator import generate
+from backend.models.sudoku_puzzle import Puzzle
+
+REPEATS = 100
+DIFFICULTIES = (0.1, 0.35, 0.6, 0.85, 0.97)  # one per difficulty bucket
+
+
+def percentile(timings, share):
+    """
+    Returns the value of the sorted timings at the given share (nearest rank).
+    """
+    return timings[min(len(timings) - 1, int(share * len(timings)))]
+
+
+def main():
+    """
+    Runs the benchmark for each size and difficulty and prints the results as a table.
+    """
+    time_budget = app.config['PUZZLE_GENERATION_BUDGET']
+    rng = random.Random(0)
+    print(f"{'size':>4} {'difficulty':>10} {'median (ms)':>12} {'p99 (ms)':>9} "
+          f"{'max (ms)':>9} {'unique':>7}")
+    for size in Puzzle.POINT_VALUES_SIZE:
+        for difficulty in DIFFICULTIES:
+            timings = []
+            unique = 0
+            for _ in range(REPEATS):
+                start = time.perf_counter()
+                generated = generate(size, difficulty, rng, time_budget)
+                timings.append((time.perf_counter() - start) * 1000)
+                unique += generated.unique
+            timings.sort()
+            print(f"{size:>4} {difficulty:>10} {percentile(timings, 0.5):>12.1f} "
+                  f"{percentile(timings, 0.99):>9.1f} {timings[-1]:>9.1f} "
+                  f"{unique / REPEATS:>7.0%}")
+    print(f"(time budget for uniqueness checks: {time_budget * 1000:.0f} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark of saving new puzzles stored as individual puzzle pieces, for every puzzle size.
+
+Compares adding every piece to the session (one INSERT per piece, as the ORM issues them) with
+the multi-row INSERT statements used by Puzzle.save (see PuzzlePiece.insert_pieces). Reports
+the puzzles saved per second. Each puzzle is committed in its own transaction.
+
+Uses an in-memory SQLite database, unless BENCHMARK_DATABASE_URI is set (e.g., to a scratch
+PostgreSQL database; its tables are created and dropped).
+
+Run from the server directory with: python -m benchmarks.puzzle_save
+"""
+import os
+import time
+from backend import app, db
+from backend.models.sudoku_puzzle import Puzzle
+
+REPEATS = 20
+DIFFICULTY = 0.5
+
+
+def solved_board(size):
+    """
+    Builds a solved board of the given size from the standard shifted-row pattern.
+    """
+    dimensions = size * size
+    return [[(size * (row % size) + row // size + column) % dimensions + 1
+             for column in range(dimensions)] for row in range(dimensions)]
+
+
+def new_puzzle(size):
+    """
+    Creates an unsaved puzzle of the given size where half of the pieces are empty.
+    """
+    solution = solved_board(size)
+    dimensions = size * size
+    board = [[value if (row * dimensions + column) % 2 else None
+              for column, value in enumerate(values)] for row, values in enumerate(solution)]
+    return Puzzle(difficulty_level=DIFFICULTY, size=size, board=board, solution=solution)
+
+
+def save_per_piece(puzzle):
+    """
+    Saves the puzzle as before bulk inserts: every piece is added to the session.
+    """
+    puzzle.empty_pieces = sum(piece.value is None for piece in puzzle.puzzle_pieces)
+    db.session.add(puzzle)
+    db.session.flush()
+    for piece in puzzle.puzzle_pieces:
+        piece.puzzle_id = puzzle.id
+        piece.save(autocommit=False)
+    db.session.commit()
+
+
+def save_bulk(puzzle):
+    """
+    Saves the puzzle with Puzzle.save, inserting its pieces in bulk.
+    """
+    puzzle.save(autocommit=True)
+
+
+def puzzles_per_second(save, size):
+    """
+    Returns the number of puzzles of the given size saved per second.
+    """
+    puzzles = [new_puzzle(size) for _ in range(REPEATS)]
+    start = time.perf_counter()
+    for puzzle in puzzles:
+        save(puzzle)
+    return REPEATS / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Runs the benchmark for each supported size and prints the results as a table.
+    """
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('BENCHMARK_DATABASE_URI',
+                                                           'sqlite://')
+    app.config['PUZZLE_STORAGE'] = Puzzle.STORAGE_PIECES
+    with app.app_context():
+        db.create_all()
+        print(f"{'size':>4} {'pieces':>6} {'per piece (/s)':>15} {'bulk (/s)':>10} "
+              f"{'speedup':>8}")
+        for size in range(Puzzle.SIZE_RANGE[0], Puzzle.SIZE_RANGE[1] + 1):
+            per_piece = puzzles_per_second(save_per_piece, size)
+            bulk = puzzles_per_second(save_bulk, size)
+            print(f"{size:>4} {size ** 4:>6} {per_piece:>15.1f} {bulk:>10.1f} "
+                  f"{bulk / per_piece:>7.1f}x")
+        db.session.remove()
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark of the Sudoku solvers (see backend.engine.solver), on a fixed corpus of puzzles
+for every supported board size.
+
+The corpus (benchmarks/corpus/size-<SIZE>.txt) holds puzzles with a unique solution, at
+several difficulties; each line is the difficulty the puzzle was built for, followed by
+the board written row by row in base 36 (0 for an empty piece). The bitmask solver is timed
+on solving each puzzle and on checking that its solution is unique; the py-sudoku solver is
+timed on solving each puzzle, in a separate process so that it can be stopped after a timeout.
+
+Run from the server directory with: python -m benchmarks.solver
+To rebuild the corpus: python -m benchmarks.solver --build-corpus
+"""
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import time
+from backend.engine.generator import solved_board
+from backend.engine.solver import get_solver
+from backend.models.sudoku_puzzle import Puzzle
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus')
+CORPUS_DIFFICULTIES = (0.2, 0.35, 0.5)
+PUZZLES_PER_DIFFICULTY = 4
+PY_SUDOKU_TIMEOUT = 10  # seconds per puzzle
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def encode_board(board):
+    """
+    Writes a board as a string, one base 36 character per piece (0 for an empty piece).
+    """
+    return ''.join(DIGITS[value or 0] for row in board for value in row)
+
+
+def decode_board(text, size):
+    """
+    Reads a board written by encode_board().
+    """
+    dimensions = size * size
+    values = [int(char, 36) or None for char in text]
+    return [values[row * dimensions:(row + 1) * dimensions] for row in range(dimensions)]
+
+
+def build_puzzle(size, difficulty, rng):
+    """
+    Removes pieces from a solved board in random order, as long as the solution stays
+    unique, until the share of empty pieces reaches the difficulty.
+    """
+    solver = get_solver('bitmask')
+    board = solved_board(size, rng)
+    dimensions = size * size
+    target = int(difficulty * dimensions * dimensions)
+    removed = 0
+    for cell in rng.sample(range(dimensions * dimensions), dimensions * dimensions):
+        if removed == target:
+            break
+        row, column = divmod(cell, dimensions)
+        value, board[row][column] = board[row][column], None
+        if solver.has_unique_solution(size, board):
+            removed += 1
+        else:
+            board[row][column] = value
+    return board
+
+
+def build_corpus():
+    """
+    Builds the corpus files, with a fixed seed per size.
+    """
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    for size in range(Puzzle.SIZE_RANGE[0], Puzzle.SIZE_RANGE[1] + 1):
+        rng = random.Random(size)
+        with open(os.path.join(CORPUS_DIR, f'size-{size}.txt'), 'w') as corpus:
+            for difficulty in CORPUS_DIFFICULTIES:
+                for _ in range(PUZZLES_PER_DIFFICULTY):
+                    board = build_puzzle(size, difficulty, rng)
+                    corpus.write(f"{difficulty} {encode_board(board)}\n")
+        print(f"Built corpus for size {size}.")
+
+
+def load_corpus(size):
+    """
+    Loads the puzzles of the corpus for the given size.
+    """
+    with open(os.path.join(CORPUS_DIR, f'size-{size}.txt')) as corpus:
+        return [decode_board(line.split()[1], size) for line in corpus if line.strip()]
+
+
+def py_sudoku_solve(size, board):
+    """
+    Times solving a board with the py-sudoku solver (run in a separate process).
+    """
+    return time_call(get_solver('py-sudoku').solve, size, board)
+
+
+def time_py_sudoku(size, board):
+    """
+    Times the py-sudoku solver on a board; returns None if it did not finish in time.
+    """
+    pool = multiprocessing.Pool(1)
+    try:
+        return pool.apply_async(py_sudoku_solve, (size, board)).get(timeout=PY_SUDOKU_TIMEOUT)
+    except multiprocessing.TimeoutError:
+        return None
+    finally:
+        pool.terminate()
+
+
+def time_call(func, *args):
+    """
+    Times a single call, in seconds.
+    """
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Runs the benchmark for each supported size and prints the results as a table.
+    """
+    solver = get_solver('bitmask')
+    print(f"{'size':>4} {'puzzles':>7} {'bitmask solve median/max (ms)':>30} "
+          f"{'unique check median/max (ms)':>29} {'py-sudoku median/max (ms)':>26} "
+          f"{'timeouts':>8}")
+    for size in range(Puzzle.SIZE_RANGE[0], Puzzle.SIZE_RANGE[1] + 1):
+        corpus = load_corpus(size)
+        for board in corpus:
+            assert solver.has_unique_solution(size, board)
+
+        solve = [time_call(solver.solve, size, board) * 1000 for board in corpus]
+        unique = [time_call(solver.has_unique_solution, size, board) * 1000 for board in corpus]
+        py_sudoku = [time_py_sudoku(size, board) for board in corpus]
+        finished = [seconds * 1000 for seconds in py_sudoku if seconds is not None]
+        py_sudoku_times = (f"{statistics.median(finished):.1f}/{max(finished):.1f}"
+                           if finished else '-')
+
+        print(f"{size:>4} {len(corpus):>7} "
+              f"{statistics.median(solve):>20.1f}/{max(solve):<9.1f} "
+              f"{statistics.median(unique):>19.1f}/{max(unique):<9.1f} "
+              f"{py_sudoku_times:>26} {len(py_sudoku) - len(finished):>8}")
+    print(f"(timeouts: puzzles the py-sudoku solver did not solve within {PY_SUDOKU_TIMEOUT}s)")
+
+
+if __name__ == '__main__':
+    if '--build-corpus' in sys.argv[1:]:
+        build_corpus()
+    else:
+        main()
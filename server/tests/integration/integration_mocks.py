@@ -2,7 +2,17 @@
 Shared integration tests mocks used in multiple test cases
 """
 import pytest
+from sqlalchemy import event
+from backend import db
 from backend.google_auth import GoogleAuth
+from backend.models.player import PuzzlePlayer
+from backend.models.sudoku_puzzle import Puzzle
+
+# solved board of size 2 that the test puzzles are made from
+SOLUTION = [[1, 2, 3, 4],
+            [3, 4, 1, 2],
+            [2, 1, 4, 3],
+            [4, 3, 2, 1]]
 
 
 @pytest.fixture(scope="function", autouse=False)
@@ -37,3 +47,41 @@ def verification_error(monkeypatch):
         }
 
     monkeypatch.setattr(GoogleAuth, "validate_token", mock_verification)
+
+
+def new_puzzle(empty_pieces=((0, 0), (1, 1)), player_ids=(5,)):
+    """
+    Save a puzzle of size 2 (worth 30 points) made from SOLUTION, with the given (x, y) pieces
+    left empty, for the given users (by default, Joe Biden). Returns the id of the puzzle.
+    """
+    board = [row[:] for row in SOLUTION]
+    for x_coord, y_coord in empty_pieces:
+        board[y_coord][x_coord] = None
+    puzzle = Puzzle(difficulty_level=0.1, size=2, board=board, solution=SOLUTION)
+    new_id = puzzle.save(autocommit=True)
+    for player_id in player_ids:
+        PuzzlePlayer(player_id, new_id).save(autocommit=True)
+    return new_id
+
+
+@pytest.fixture
+def puzzle_id(init_db):  # pylint: disable=unused-argument
+    """
+    Save a puzzle of size 2 with two empty pieces, at (0, 0) and (1, 1), for user Joe Biden.
+    """
+    return new_puzzle()
+
+
+@pytest.fixture
+def statements(init_db):  # pylint: disable=unused-argument
+    """
+    Record the SQL statements sent to the database during a test.
+    """
+    recorded = []
+
+    def record(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        recorded.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(db.engine, 'before_cursor_execute', record)
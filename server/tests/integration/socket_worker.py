@@ -0,0 +1,55 @@
+"""
+Runs a server process for the multi-process web socket tests (see test_message_queue), sharing
+events through the message queue set by SOCKETIO_MESSAGE_QUEUE:
+
+    python -m tests.integration.socket_worker serve <port>
+        runs the server on localhost:<port>.
+    python -m tests.integration.socket_worker move <puzzle_id> <x> <y> <value>
+        makes the move through the API, and prints the response status.
+
+All tokens are verified as Joe Biden's (see integration_mocks.verification_true).
+"""
+import sys
+from backend import app, socketio
+from backend.config import IntegrationTestingConfig
+from backend.google_auth import GoogleAuth
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+def mock_verification(*args, **kwargs):  # pylint: disable=unused-argument
+    """
+    Verify every token as Joe Biden's.
+    """
+    return {'user_id': '987234', 'email': 'jb@biden2020.com', 'expires_in': 3588}
+
+
+def serve(port):
+    """
+    Run the server on the given port.
+    """
+    socketio.run(app, host='127.0.0.1', port=port, log_output=False)
+
+
+def move(puzzle_id, x_coord, y_coord, value):
+    """
+    Make the move through the API and print the response status.
+    """
+    with app.test_client() as test_client:
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=x_coord, y_coordinate=y_coord, value=value
+        ), headers=HEADERS)
+    print(response.status_code, flush=True)
+
+
+def main(command, *args):
+    """
+    Run the command as a server process of the integration tests.
+    """
+    GoogleAuth.validate_token = mock_verification
+    app.config.from_object(IntegrationTestingConfig)
+    {'serve': serve, 'move': move}[command](*map(int, args))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -2,10 +2,13 @@
 Integration tests for Google OAuth authentication
 """
 import pytest
+from backend import app, token_cache
 from backend.google_auth import GoogleAuth
 from tests.integration.test_setup import test_client, init_db
 from tests.integration.integration_mocks import verification_error, verification_true
 
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
 
 @pytest.fixture(scope="function", autouse=False)
 def user_info(monkeypatch):
@@ -173,3 +176,20 @@ def test_successful_user_registration(test_client, init_db, verification_true, u
     response = test_client.post('/register', headers={'Authorization': 'Bearer 2342351231asdb'})
     assert response.status_code == 200
     assert response.json == {'message': 'User Jane Doe was successfully registered'}
+
+
+def test_token_cache_stats(monkeypatch, test_client, init_db, verification_true):
+    """
+    The stats of the token cache should count the validations served from the cache.
+    """
+    monkeypatch.setitem(app.config, 'TOKEN_CACHE_SIZE', 10)
+    token_cache.clear()
+    try:
+        first = test_client.get('/token-cache/stats', headers=HEADERS)
+        second = test_client.get('/token-cache/stats', headers=HEADERS)
+    finally:
+        token_cache.clear()
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json['size'] == second.json['size'] == 1
+    assert second.json['hits'] == first.json['hits'] + 1
+    assert second.json['misses'] == first.json['misses']
@@ -3,6 +3,7 @@ Integration tests for leaderboard endpoints
 """
 from backend.models.player import PuzzlePlayer
 from backend.models.sudoku_puzzle import Puzzle
+from backend.models.user_score import UserScore
 from tests.integration.test_setup import test_client, init_db
 from tests.integration.integration_mocks import verification_error, verification_true
 
@@ -32,6 +33,9 @@ def test_get_leaders_completed_puzzles(test_client, init_db, verification_true):
     puzzle_player = PuzzlePlayer(1, 3)
     puzzle_player.save(autocommit=True)
 
+    # the puzzle was completed outside of any moves, so the scores are recomputed
+    UserScore.rebuild()
+
     response = test_client.get('/leaderboard', headers={'Authorization': 'Bearer 2342351231asdb'})
     assert response.status_code == 200
     assert response.json == {
@@ -0,0 +1,126 @@
+"""
+Integration tests for the in-memory cache of the top of the leaderboard, which is written
+through as puzzles are completed.
+"""
+import pytest
+from sqlalchemy import event
+from backend import app, db, leaderboard_cache
+from backend.models.user_score import UserScore
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true, new_puzzle
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    """
+    Enable a leaderboard cache of 2 users, emptied before and after each test.
+    """
+    monkeypatch.setitem(app.config, 'LEADERBOARD_CACHE_SIZE', 2)
+    leaderboard_cache.invalidate()
+    yield leaderboard_cache
+    leaderboard_cache.invalidate()
+
+
+@pytest.fixture
+def score_reads(init_db):
+    """
+    Record the statements reading the user_scores table during a test.
+    """
+    recorded = []
+
+    def record(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        if statement.lstrip().upper().startswith('SELECT') and 'user_scores' in statement:
+            recorded.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield recorded
+    event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def save_puzzle(player_ids):
+    """
+    Save a puzzle of size 2 (worth 30 points) with a single empty piece at (0, 0).
+    """
+    return new_puzzle(((0, 0),), player_ids)
+
+
+def get_leaderboard(test_client, limit):
+    """
+    Get the names and scores of the top users from the leaderboard endpoint.
+    """
+    response = test_client.get('/leaderboard', query_string={'limit': limit}, headers=HEADERS)
+    assert response.status_code == 200
+    return [(player['first_name'], player['score']) for player in response.json['players']]
+
+
+def test_cache_written_through(test_client, verification_true, cache, score_reads):
+    """
+    The leaderboard should be read from the database once, then served from the cache,
+    which is updated as puzzles are completed.
+    """
+    puzzle_id = save_puzzle([5, 3])
+    assert get_leaderboard(test_client, 2) == []
+    assert get_leaderboard(test_client, 1) == []
+    assert len(score_reads) == 1
+
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=0, y_coordinate=0, value=1
+    ), headers=HEADERS)
+    assert response.status_code == 200
+    del score_reads[:]
+
+    assert get_leaderboard(test_client, 2) == [('Joe', 30), ('Princess', 30)]
+    assert get_leaderboard(test_client, 1) == [('Joe', 30)]
+    assert score_reads == []
+    assert cache.stats()['updates'] == 1
+
+    # more users than the cache holds are read from the database
+    assert get_leaderboard(test_client, 3) == [('Joe', 30), ('Princess', 30)]
+    assert len(score_reads) == 1
+
+
+def test_cache_not_written_on_rollback(test_client, verification_true, cache):
+    """
+    Scores of a transaction that is rolled back should not reach the cache.
+    """
+    puzzle_id = save_puzzle([2])
+    assert get_leaderboard(test_client, 2) == [('Joe', 30), ('Princess', 30)]
+    misses = cache.stats()['misses']
+
+    UserScore.add_puzzle_points(puzzle_id, 100)
+    db.session.rollback()
+    assert get_leaderboard(test_client, 2) == [('Joe', 30), ('Princess', 30)]
+
+    UserScore.add_puzzle_points(puzzle_id, 100)
+    db.session.commit()
+    assert get_leaderboard(test_client, 2) == [('foo', 100), ('Joe', 30)]
+    assert cache.stats()['misses'] == misses
+
+
+def test_cache_rebuild(test_client, verification_true, cache):
+    """
+    Rebuilding the scores should empty the cache, as scores may have decreased.
+    """
+    assert get_leaderboard(test_client, 2) == [('foo', 100), ('Joe', 30)]
+    UserScore.rebuild()
+    assert cache.stats()['size'] == 0
+    assert get_leaderboard(test_client, 2) == [('Joe', 30), ('Princess', 30)]
+
+
+def test_cache_stats(test_client, verification_true, cache):
+    """
+    The stats endpoint should report the requests served from the cache, and its size.
+    """
+    stats = test_client.get('/leaderboard/stats', headers=HEADERS).json
+    assert (stats['size'], stats['age']) == (0, None)
+
+    get_leaderboard(test_client, 2)
+    get_leaderboard(test_client, 1)
+    response = test_client.get('/leaderboard/stats', headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json['misses'] == stats['misses'] + 1
+    assert response.json['hits'] == stats['hits'] + 1
+    assert response.json['size'] == 2
+    assert response.json['age'] >= 0
@@ -0,0 +1,120 @@
+"""
+Integration tests for the message queue shared by several server processes: events emitted by
+one process should reach the web socket clients connected to the others.
+"""
+import os
+import queue
+import socket
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import socketio
+from backend.message_queue import MessageBroker
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import new_puzzle
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TIMEOUT = 30  # seconds
+
+
+@pytest.fixture
+def broker(tmp_path):
+    """
+    Run a message broker on a UNIX socket.
+    """
+    broker = MessageBroker(str(tmp_path / 'broker.sock'))
+    thread = threading.Thread(target=broker.serve_forever, daemon=True)
+    thread.start()
+    yield broker
+    broker.shutdown()
+    broker.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def puzzle_id(init_db):
+    """
+    Save a puzzle of size 2 with an empty piece at (0, 0), for user Joe Biden.
+    """
+    return new_puzzle(((0, 0),))
+
+
+def start_worker(broker, *args):
+    """
+    Start a server process running the socket_worker command with the given arguments,
+    sharing events through the broker.
+    """
+    env = dict(os.environ, SOCKETIO_MESSAGE_QUEUE=f'unix://{broker.path}')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'tests.integration.socket_worker', *map(str, args)],
+        cwd=SERVER_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        universal_newlines=True
+    )
+
+
+def free_port():
+    """
+    Returns a port on localhost that is free to listen on.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition):
+    """
+    Wait until the condition holds, failing the test after the timeout.
+    """
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.05)
+
+
+def connect(port):
+    """
+    Connect a web socket client to the server on the given port, retrying until it is up.
+    """
+    client = socketio.Client()
+    deadline = time.monotonic() + TIMEOUT
+    while True:
+        try:
+            client.connect(f'http://127.0.0.1:{port}?auth=X', transports=['polling'])
+            return client
+        except socketio.exceptions.ConnectionError:
+            assert time.monotonic() < deadline, 'timed out'
+            time.sleep(0.1)
+
+
+def test_move_reaches_other_process(broker, puzzle_id):
+    """
+    A move made on one server process should be announced to the players of the puzzle
+    connected to another process.
+    """
+    port = free_port()
+    server = start_worker(broker, 'serve', port)
+    client = None
+    try:
+        client = connect(port)
+        deltas = queue.Queue()
+        client.on('puzzle_delta', deltas.put)
+        joined = queue.Queue()
+        client.emit('join', {'puzzle_id': puzzle_id}, callback=joined.put)
+        assert joined.get(timeout=TIMEOUT) == {'locks': []}
+        wait_for(lambda: broker.subscribers)  # the server listens to events from the others
+
+        mover = start_worker(broker, 'move', puzzle_id, 0, 0, 1)
+        output, _ = mover.communicate(timeout=TIMEOUT)
+        assert output.strip() == '200'
+
+        assert deltas.get(timeout=TIMEOUT) == {
+            'puzzle_id': puzzle_id, 'version': 1, 'completed': True,
+            'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 1}]
+        }
+    finally:
+        if client is not None:
+            client.disconnect()
+        server.kill()
+        server.wait()
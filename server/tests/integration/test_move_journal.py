@@ -0,0 +1,142 @@
+"""
+Integration tests for the journal of moves: every move is journaled with the version it gave
+the puzzle, and clients can get the moves made since a version they saw, over the API or by
+resyncing over the web socket.
+"""
+from backend import app, db, socketio
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true, puzzle_id
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+def make_moves(test_client, puzzle_id, moves):
+    """
+    Make the (x, y, value) moves through the API, deleting the value when it is None.
+    """
+    for x_coord, y_coord, value in moves:
+        data = dict(x_coordinate=x_coord, y_coordinate=y_coord)
+        if value is None:
+            response = test_client.delete(f'/puzzles/{puzzle_id}/piece', data=data,
+                                          headers=HEADERS)
+        else:
+            response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(data, value=value),
+                                        headers=HEADERS)
+        assert response.status_code == 200
+
+
+def journal(puzzle_id):
+    """
+    Returns the journaled moves of the puzzle, as (version, player, x, y, old, new) tuples.
+    """
+    return [(move.version, move.player_id, move.x_coordinate, move.y_coordinate,
+             move.old_value, move.new_value)
+            for move in PuzzleMove.find_moves_since(puzzle_id, 0)]
+
+
+def test_moves_are_journaled(test_client, verification_true, puzzle_id):
+    """
+    Every move should be journaled with its version, player, and the old and new values of the
+    piece; rejected moves should not be journaled.
+    """
+    make_moves(test_client, puzzle_id, ((0, 0, 2), (0, 0, 1), (0, 0, None)))
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=0, value=3
+    ), headers=HEADERS)
+    assert response.status_code == 400
+
+    assert journal(puzzle_id) == [(1, 5, 0, 0, None, 2), (2, 5, 0, 0, 2, 1), (3, 5, 0, 0, 1, None)]
+    assert all(move.created_at is not None for move in PuzzleMove.find_moves_since(puzzle_id, 0))
+
+
+def test_moves_on_loaded_board_are_journaled(test_client, verification_true, puzzle_id):
+    """
+    Moves that write back the whole board (e.g., on packed boards) should be journaled as well.
+    """
+    Puzzle.query.filter_by(id=puzzle_id).update({Puzzle.empty_pieces: None})
+    db.session.commit()
+    make_moves(test_client, puzzle_id, ((1, 1, 3),))
+    Puzzle.get_puzzle(puzzle_id).convert_to_packed()
+    make_moves(test_client, puzzle_id, ((1, 1, 4),))
+
+    assert journal(puzzle_id) == [(1, 5, 1, 1, None, 3), (2, 5, 1, 1, 3, 4)]
+
+
+def test_get_moves_since(test_client, verification_true, puzzle_id):
+    """
+    The moves made since a version should be returned in pages ordered by version.
+    """
+    make_moves(test_client, puzzle_id, ((1, 1, 4), (0, 0, 2), (0, 0, 1)))
+
+    response = test_client.get(f'/puzzles/{puzzle_id}/moves?since=1', headers=HEADERS)
+    assert response.status_code == 200
+    assert (response.json['version'], response.json['completed'], response.json['next_since']) \
+        == (3, True, None)
+    assert [(move['version'], move['player_id'], move['x_coordinate'], move['y_coordinate'],
+             move['old_value'], move['new_value']) for move in response.json['moves']] == \
+        [(2, 5, 0, 0, None, 2), (3, 5, 0, 0, 2, 1)]
+
+    response = test_client.get(f'/puzzles/{puzzle_id}/moves?since=0&limit=2', headers=HEADERS)
+    assert [move['version'] for move in response.json['moves']] == [1, 2]
+    assert response.json['next_since'] == 2
+
+    response = test_client.get(f'/puzzles/{puzzle_id}/moves?since=3', headers=HEADERS)
+    assert (response.json['moves'], response.json['next_since']) == ([], None)
+
+    response = test_client.get(f'/puzzles/{puzzle_id}/moves?since=4', headers=HEADERS)
+    assert response.status_code == 400
+
+
+def test_get_moves_not_journaled(test_client, verification_true, puzzle_id):
+    """
+    Moves that were not journaled (e.g., made before there was a journal) cannot be returned;
+    the whole puzzle should be requested instead.
+    """
+    Puzzle.query.filter_by(id=puzzle_id).update({Puzzle.version: 2})
+    db.session.commit()
+    make_moves(test_client, puzzle_id, ((1, 1, 4),))
+
+    response = test_client.get(f'/puzzles/{puzzle_id}/moves?since=1', headers=HEADERS)
+    assert response.status_code == 410
+    assert response.json['version'] == 3
+
+    response = test_client.get(f'/puzzles/{puzzle_id}/moves?since=2', headers=HEADERS)
+    assert [move['version'] for move in response.json['moves']] == [3]
+
+
+def test_socket_resync_since_version(test_client, verification_true, puzzle_id):
+    """
+    A client resyncing from a version should be sent only the moves made since, as deltas.
+    If some of the moves are not journaled, the pieces changed since that version should be
+    sent as one delta, or the whole puzzle if the board at that version cannot be rebuilt.
+    """
+    make_moves(test_client, puzzle_id, ((1, 1, 4), (0, 0, 2), (0, 0, 1)))
+    client = socketio.test_client(app, flask_test_client=test_client, query_string='?auth=X')
+    client.emit('join', {'puzzle_id': puzzle_id})
+    client.get_received()
+
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 1})
+    assert [event['args'][0] for event in client.get_received()] == [
+        {'puzzle_id': puzzle_id, 'version': 2, 'completed': False,
+         'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 2}]},
+        {'puzzle_id': puzzle_id, 'version': 3, 'completed': True,
+         'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 1}]}
+    ]
+
+    PuzzleMove.query.filter_by(puzzle_id=puzzle_id, version=2).delete()
+    db.session.commit()
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 1})
+    assert [event['args'][0] for event in client.get_received()] == [
+        {'puzzle_id': puzzle_id, 'version': 3, 'completed': True, 'from_version': 1,
+         'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 1}]}
+    ]
+
+    PuzzleMove.query.filter_by(puzzle_id=puzzle_id, version=1).delete()
+    db.session.commit()
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 1})
+    received = client.get_received()
+    assert [event['name'] for event in received] == ['puzzle_update']
+    assert received[0]['args'][0]['version'] == 3
+    client.disconnect()
@@ -0,0 +1,83 @@
+"""
+Integration tests for puzzles stored as packed boards, and for the migration of puzzles
+stored as individual puzzle pieces to packed storage.
+"""
+from backend import app
+from backend.models.puzzle_pieces import PuzzlePiece
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true
+
+
+def test_create_packed_puzzle(monkeypatch, test_client, init_db, verification_true):
+    """
+    With packed storage configured, a new puzzle should be saved without any
+    individual puzzle pieces, and be returned with all of its pieces.
+    """
+    monkeypatch.setitem(app.config, 'PUZZLE_STORAGE', Puzzle.STORAGE_PACKED)
+    response = test_client.post('/puzzles',
+                                data=dict(difficulty=0.5, size=3, additional_players=[]),
+                                headers={'Authorization': 'Bearer 2342351231asdb'})
+    assert response.status_code == 200
+    puzzle_id = response.json['puzzle_id']
+
+    assert PuzzlePiece.find_all_pieces(puzzle_id) == []
+    assert Puzzle.get_puzzle(puzzle_id).is_packed()
+
+    response = test_client.get(f'/puzzles/{puzzle_id}',
+                               headers={'Authorization': 'Bearer 2342351231asdb'})
+    assert response.status_code == 200
+    pieces = response.json['pieces']
+    assert len(pieces) == 81
+    assert [(piece['x_coordinate'], piece['y_coordinate']) for piece in pieces[:2]] == \
+           [(0, 0), (1, 0)]
+    assert sum(not piece['static_piece'] for piece in pieces) == 40
+    assert all(piece['value'] is None for piece in pieces if not piece['static_piece'])
+
+
+def test_update_packed_puzzle(test_client, init_db, verification_true):
+    """
+    Moves made on a packed puzzle should be saved to the packed board.
+    """
+    puzzle = Puzzle.get_puzzle(3)
+    empty = next(piece for piece in puzzle.puzzle_pieces if not piece.static_piece)
+
+    response = test_client.post('/puzzles/3/piece', data=dict(
+        x_coordinate=empty.x_coordinate, y_coordinate=empty.y_coordinate, value=7
+    ), headers={'Authorization': 'Bearer 2342351231asdb'})
+    assert response.status_code == 200
+
+    arr = Puzzle.get_puzzle(3).get_pieces_as_arr()
+    assert arr[empty.y_coordinate][empty.x_coordinate] == 7
+
+    response = test_client.delete('/puzzles/3/piece', data=dict(
+        x_coordinate=empty.x_coordinate, y_coordinate=empty.y_coordinate
+    ), headers={'Authorization': 'Bearer 2342351231asdb'})
+    assert response.status_code == 200
+
+    arr = Puzzle.get_puzzle(3).get_pieces_as_arr()
+    assert arr[empty.y_coordinate][empty.x_coordinate] is None
+
+
+def test_pack_puzzles_command(test_client, init_db):
+    """
+    The pack-puzzles command should convert puzzles stored as individual pieces
+    to packed storage, without changing the puzzle boards.
+    """
+    boards = {puzzle_id: Puzzle.get_puzzle(puzzle_id).get_pieces_as_arr()
+              for puzzle_id in (1, 2)}
+    static_boards = {puzzle_id: Puzzle.get_puzzle(puzzle_id).get_pieces_as_arr(static_only=True)
+                     for puzzle_id in (1, 2)}
+
+    result = app.test_cli_runner().invoke(args=['pack-puzzles'])
+    assert result.output == 'Converted 2 puzzles to packed storage.\n'
+
+    for puzzle_id in (1, 2):
+        puzzle = Puzzle.get_puzzle(puzzle_id)
+        assert puzzle.is_packed()
+        assert PuzzlePiece.find_all_pieces(puzzle_id) == []
+        assert puzzle.get_pieces_as_arr() == boards[puzzle_id]
+        assert puzzle.get_pieces_as_arr(static_only=True) == static_boards[puzzle_id]
+
+    result = app.test_cli_runner().invoke(args=['pack-puzzles'])
+    assert result.output == 'Converted 0 puzzles to packed storage.\n'
@@ -0,0 +1,133 @@
+"""
+Integration tests for the table of locks on puzzle pieces kept in the database, which is shared
+by the server processes.
+"""
+from datetime import datetime, timedelta
+import pytest
+from backend import app
+from backend.lock_manager import DatabaseLockManager
+from tests.integration.test_setup import test_client, init_db
+
+
+class MockClock:
+    """
+    Clock that only moves when told to.
+    """
+    def __init__(self):
+        self.start = self.now = datetime(2026, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+    def advance_to(self, seconds):
+        """
+        Moves the clock to the given number of seconds after it started.
+        """
+        self.now = self.start + timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def clock():
+    """
+    Clock of the lock manager.
+    """
+    return MockClock()
+
+
+@pytest.fixture
+def locks(init_db, monkeypatch, clock):
+    """
+    Lock manager with a lease of 30 seconds, emptied after each test.
+    """
+    monkeypatch.setitem(app.config, 'PIECE_LOCK_LEASE', 30)
+    manager = DatabaseLockManager(app, clock=clock)
+    yield manager
+    manager.clear()
+
+
+def test_acquire_and_release(test_client, locks):
+    """
+    A piece can only be locked by one connection at a time, and only the holder of the
+    lock can release it.
+    """
+    assert locks.acquire(1, 2, 3, 'first', user_id=5, player={'id': 5})
+    assert locks.get_lock(1, 2, 3)[:3] == ('first', 5, {'id': 5})
+    assert locks.acquire(1, 2, 3, 'first')  # renews the lease
+    assert not locks.acquire(1, 2, 3, 'second')
+    assert locks.acquire(1, 3, 2, 'second')
+    assert locks.acquire(2, 2, 3, 'second')
+
+    assert not locks.release(1, 2, 3, 'second')
+    assert locks.get_lock(1, 2, 3).sid == 'first'
+    assert locks.release(1, 2, 3, 'first')
+    assert locks.get_lock(1, 2, 3) is None
+    assert not locks.release(1, 2, 3, 'first')
+    assert locks.acquire(1, 2, 3, 'second')
+
+
+def test_shared_between_managers(test_client, locks, clock):
+    """
+    Locks taken through one manager (i.e., server process) should hold for the others.
+    """
+    other = DatabaseLockManager(app, clock=clock)
+    assert locks.acquire(1, 0, 0, 'first', user_id=5)
+    assert not other.acquire(1, 0, 0, 'second')
+    assert not other.can_move(1, 0, 0, sid='second')
+    assert other.can_move(1, 0, 0, user_id=5)
+    assert other.release_all('first') == [(1, 0, 0)]
+    assert locks.can_move(1, 0, 0, sid='second')
+
+
+def test_lease_expiry(test_client, locks, clock):
+    """
+    Locks should expire once their lease is over, unless renewed.
+    """
+    locks.acquire(1, 0, 0, 'first')
+    locks.acquire(1, 0, 1, 'first')
+    clock.advance_to(20)
+    locks.acquire(1, 0, 1, 'first')
+    clock.advance_to(30)
+    assert not locks.acquire(1, 0, 1, 'second')
+    assert locks.acquire(1, 0, 0, 'second')
+    assert sorted(locks.get_puzzle_locks(1)) == [(0, 0), (0, 1)]
+    clock.advance_to(50)
+    assert list(locks.get_puzzle_locks(1)) == [(0, 0)]
+    assert not locks.release(1, 0, 1, 'first')
+
+
+def test_release_all(test_client, locks):
+    """
+    All of the locks of a connection, or only its locks on one puzzle, can be released at once.
+    """
+    locks.acquire(1, 0, 0, 'first')
+    locks.acquire(1, 1, 1, 'first')
+    locks.acquire(2, 0, 0, 'first')
+    locks.acquire(1, 2, 2, 'second')
+    assert locks.release_all('first', puzzle_id=2) == [(2, 0, 0)]
+    assert locks.release_all('first') == [(1, 0, 0), (1, 1, 1)]
+    assert locks.release_all('first') == []
+    assert list(locks.get_puzzle_locks(1)) == [(2, 2)]
+    assert locks.get_puzzle_locks(2) == {}
+
+
+def test_reap_expired(test_client, locks, clock):
+    """
+    The expired locks should be removed by reap_expired (and when a lock is taken), and
+    passed to the on_expired callback.
+    """
+    expired = []
+    locks.on_expired = lambda *key: expired.append(key)
+    locks.acquire(1, 0, 0, 'first')
+    locks.acquire(1, 0, 1, 'first')
+    clock.advance_to(20)
+    locks.acquire(2, 0, 0, 'first')
+    clock.advance_to(30)
+    assert locks.reap_expired() == [(1, 0, 0), (1, 0, 1)]
+    assert expired == [(1, 0, 0), (1, 0, 1)]
+    assert locks.has_locks()
+    clock.advance_to(50)
+    assert locks.acquire(2, 1, 1, 'second')
+    assert expired == [(1, 0, 0), (1, 0, 1), (2, 0, 0)]
+    assert locks.reap_expired() == []
+    locks.release(2, 1, 1, 'second')
+    assert not locks.has_locks()
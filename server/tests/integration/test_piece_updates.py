@@ -0,0 +1,357 @@
+"""
+Integration tests for moves made on a puzzle through single-piece updates, which
+avoid loading the whole puzzle board unless the move could complete the puzzle, and
+are announced to the players of the puzzle as deltas.
+"""
+from backend import app, db, lock_manager, socketio
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true, puzzle_id, statements
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+def test_new_puzzle_counts_empty_pieces(test_client, puzzle_id):
+    """
+    Saving a new puzzle should record the number of empty pieces on the board.
+    """
+    assert Puzzle.get_puzzle(puzzle_id).empty_pieces == 2
+
+
+def test_new_puzzle_inserts_pieces_in_bulk(test_client, statements):
+    """
+    The pieces of a new puzzle should be inserted with a few multi-row statements, rather
+    than one statement per piece.
+    """
+    solution = [[(4 * (row % 4) + row // 4 + column) % 16 + 1 for column in range(16)]
+                for row in range(16)]
+    board = [[None] * 16 for _ in range(16)]
+    board[0][0] = solution[0][0]
+    puzzle = Puzzle(difficulty_level=0.1, size=4, board=board, solution=solution)
+    new_id = puzzle.save(autocommit=True)
+
+    inserts = [statement for statement in statements if 'INSERT INTO puzzle_pieces' in statement]
+    assert len(inserts) == 2  # 256 pieces, in batches of PuzzlePiece.INSERT_BATCH_SIZE
+
+    pieces = {(piece.x_coordinate, piece.y_coordinate): (piece.value, piece.static_piece)
+              for piece in Puzzle.get_puzzle(new_id).puzzle_pieces}
+    assert len(pieces) == 256
+    assert (pieces[(0, 0)], pieces[(1, 0)], pieces[(15, 15)]) == \
+        ((1, True), (None, False), (None, False))
+
+
+def test_move_updates_single_piece(test_client, verification_true, puzzle_id, statements):
+    """
+    A move that cannot complete the puzzle should update the piece and the count
+    of empty pieces, without selecting the pieces of the puzzle board.
+    """
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=0, y_coordinate=0, value=1
+    ), headers=HEADERS)
+    assert response.status_code == 200
+    assert not any(statement.lstrip().startswith('SELECT') and 'FROM puzzle_pieces' in statement
+                   for statement in statements)
+
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.empty_pieces == 1
+    assert puzzle.get_pieces_as_arr()[0][0] == 1
+    assert not puzzle.completed
+
+
+def test_move_overwrites_and_deletes_piece(test_client, verification_true, puzzle_id):
+    """
+    Overwriting a value should leave the count of empty pieces unchanged, and
+    deleting a value should increase it (deleting an empty piece changes nothing).
+    """
+    for value, empty_pieces in ((2, 1), (3, 1)):
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=0, y_coordinate=0, value=value
+        ), headers=HEADERS)
+        assert response.status_code == 200
+        assert Puzzle.get_puzzle(puzzle_id).empty_pieces == empty_pieces
+
+    for _ in range(2):
+        response = test_client.delete(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=0, y_coordinate=0
+        ), headers=HEADERS)
+        assert response.status_code == 200
+        puzzle = Puzzle.get_puzzle(puzzle_id)
+        assert puzzle.empty_pieces == 2
+        assert puzzle.get_pieces_as_arr()[0][0] is None
+
+
+def test_move_on_static_piece(test_client, verification_true, puzzle_id):
+    """
+    Static pieces cannot be changed or deleted.
+    """
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=0, value=3
+    ), headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json['reason'] == 'Changes can only be made to non-static puzzle pieces.'
+
+    response = test_client.delete(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=0
+    ), headers=HEADERS)
+    assert response.status_code == 400
+
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.get_pieces_as_arr()[0][1] == 2
+    assert puzzle.empty_pieces == 2
+
+
+def test_moves_complete_puzzle(test_client, verification_true, puzzle_id):
+    """
+    The puzzle is only completed once the last empty piece is filled in with a valid value.
+    """
+    for x_coord, y_coord, value in ((1, 1, 4), (0, 0, 2)):
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=x_coord, y_coordinate=y_coord, value=value
+        ), headers=HEADERS)
+        assert response.status_code == 200
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.empty_pieces == 0
+    assert not puzzle.completed
+
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=0, y_coordinate=0, value=1
+    ), headers=HEADERS)
+    assert response.status_code == 200
+    assert Puzzle.get_puzzle(puzzle_id).completed
+
+
+def test_move_sets_missing_count(test_client, verification_true, puzzle_id):
+    """
+    Puzzles saved before empty pieces were counted should have the count set by the next move.
+    """
+    Puzzle.query.filter_by(id=puzzle_id).update({Puzzle.empty_pieces: None})
+    db.session.commit()
+
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=1, value=4
+    ), headers=HEADERS)
+    assert response.status_code == 200
+    assert Puzzle.get_puzzle(puzzle_id).empty_pieces == 1
+
+
+def test_moves_increase_version(test_client, verification_true, puzzle_id):
+    """
+    Every move (including deletions and moves that change nothing) should increase the
+    version of the puzzle by one; rejected moves should not.
+    """
+    assert Puzzle.get_puzzle(puzzle_id).version == 0
+    for _ in range(2):
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=0, y_coordinate=0, value=1
+        ), headers=HEADERS)
+        assert response.status_code == 200
+    response = test_client.delete(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=0, y_coordinate=0
+    ), headers=HEADERS)
+    assert response.status_code == 200
+
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=0, value=3
+    ), headers=HEADERS)
+    assert response.status_code == 400
+
+    assert Puzzle.get_puzzle(puzzle_id).version == 3
+    response = test_client.get(f'/puzzles/{puzzle_id}', headers=HEADERS)
+    assert response.json['version'] == 3
+
+
+def test_move_broadcasts_delta(test_client, verification_true, puzzle_id):
+    """
+    A move should be announced to the players in the puzzle's room with only the changed
+    piece and the new version of the puzzle; a client can ask for the whole puzzle.
+    """
+    client = socketio.test_client(app, flask_test_client=test_client, query_string='?auth=X')
+    client.emit('join', {'token': 'X', 'puzzle_id': puzzle_id})
+    client.get_received()
+
+    for x_coord, y_coord, value in ((1, 1, 4), (0, 0, 1)):
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=x_coord, y_coordinate=y_coord, value=value
+        ), headers=HEADERS)
+        assert response.status_code == 200
+
+    assert client.get_received() == [
+        {'name': 'puzzle_delta', 'namespace': '/', 'args': [{
+            'puzzle_id': puzzle_id, 'version': 1, 'completed': False,
+            'pieces': [{'x_coordinate': 1, 'y_coordinate': 1, 'value': 4}]
+        }]},
+        {'name': 'puzzle_delta', 'namespace': '/', 'args': [{
+            'puzzle_id': puzzle_id, 'version': 2, 'completed': True,
+            'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 1}]
+        }]}
+    ]
+
+    client.emit('resync', {'puzzle_id': puzzle_id})
+    received = client.get_received()
+    assert [event['name'] for event in received] == ['puzzle_update']
+    snapshot = received[0]['args'][0]
+    assert (snapshot['version'], snapshot['completed']) == (2, True)
+    assert all(piece['value'] is not None for piece in snapshot['pieces'])
+    client.disconnect()
+
+
+def test_socket_moves(test_client, verification_true, puzzle_id):
+    """
+    Moves made over the web socket should be saved and acknowledged with the new version
+    of the puzzle, and announced to the puzzle's room; invalid moves are rejected.
+    """
+    client = socketio.test_client(app, flask_test_client=test_client, query_string='?auth=X')
+    client.emit('join', {'token': 'X', 'puzzle_id': puzzle_id})
+    client.get_received()
+
+    ack = client.emit('move', {'puzzle_id': puzzle_id, 'x_coordinate': 1, 'y_coordinate': 1,
+                               'value': 4}, callback=True)
+    assert ack == {'version': 1, 'completed': False}
+    ack = client.emit('move', {'puzzle_id': puzzle_id, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': 3}, callback=True)
+    assert ack == {'error': 'Changes can only be made to non-static puzzle pieces.'}
+    ack = client.emit('move', {'puzzle_id': puzzle_id, 'x_coordinate': 0, 'y_coordinate': 0,
+                               'value': 1}, callback=True)
+    assert ack == {'version': 2, 'completed': True}
+
+    assert [event['args'][0]['version'] for event in client.get_received()] == [1, 2]
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.completed and puzzle.empty_pieces == 0
+    client.disconnect()
+
+
+def test_move_against_version(test_client, verification_true, puzzle_id):
+    """
+    Moves made against the current version of the puzzle should be made; moves made against
+    an older version should be rejected with the current version and value of the piece.
+    """
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=1, value=4, version=0
+    ), headers=HEADERS)
+    assert response.status_code == 200
+
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=1, value=3, version=0
+    ), headers=HEADERS)
+    assert response.status_code == 409
+    assert response.json['reason'] == \
+        'The puzzle was changed by another move; the move was not made.'
+    assert (response.json['version'], response.json['piece']) == \
+        (1, {'x_coordinate': 1, 'y_coordinate': 1, 'value': 4})
+
+    response = test_client.delete(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=1, version=1
+    ), headers=HEADERS)
+    assert response.status_code == 200
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert (puzzle.version, puzzle.empty_pieces) == (2, 2)
+
+
+def test_concurrent_move_on_loaded_board(monkeypatch, test_client, verification_true, puzzle_id):
+    """
+    Moves that write back the whole board (e.g., on packed boards) should lock the puzzle and
+    load it again, so that a move made since the puzzle was first read is not overwritten;
+    only moves made against an older version are rejected.
+    """
+    Puzzle.query.filter_by(id=puzzle_id).update({Puzzle.empty_pieces: None})
+    db.session.commit()
+    get_puzzle = Puzzle.get_puzzle.__func__
+
+    def get_puzzle_then_move(cls, *args, **kwargs):
+        puzzle = get_puzzle(cls, *args, **kwargs)
+        db.engine.execute(Puzzle.__table__.update().where(Puzzle.id == puzzle_id)
+                          .values(version=Puzzle.version + 1))
+        return puzzle
+
+    monkeypatch.setattr(Puzzle, 'get_puzzle', classmethod(get_puzzle_then_move))
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=1, value=4
+    ), headers=HEADERS)
+    assert response.status_code == 200
+
+    # the move above was made after the concurrent move, at version 2
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=0, y_coordinate=0, value=1, version=2
+    ), headers=HEADERS)
+    assert response.status_code == 409
+    assert (response.json['version'], response.json['piece']['value']) == (3, None)
+
+    monkeypatch.undo()
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.get_pieces_as_arr()[1][1] == 4
+    assert puzzle.get_pieces_as_arr()[0][0] is None
+
+
+def test_move_racing_completing_move(monkeypatch, test_client, verification_true, puzzle_id):
+    """
+    Moves (even without a version) should be rejected if the puzzle was completed by another
+    move since it was read, without counting or journaling them.
+    """
+    get_puzzle = Puzzle.get_puzzle.__func__
+
+    def get_puzzle_then_complete(cls, *args, **kwargs):
+        puzzle = get_puzzle(cls, *args, **kwargs)
+        db.engine.execute(Puzzle.__table__.update().where(Puzzle.id == puzzle_id)
+                          .values(completed=True))
+        return puzzle
+
+    monkeypatch.setattr(Puzzle, 'get_puzzle', classmethod(get_puzzle_then_complete))
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=1, y_coordinate=1, value=4
+    ), headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json['reason'] == 'Updates cannot be made to previously completed puzzles.'
+
+    monkeypatch.undo()
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert (puzzle.version, puzzle.empty_pieces) == (0, 2)
+    assert puzzle.get_pieces_as_arr()[1][1] is None
+    assert PuzzleMove.find_moves_since(puzzle_id, 0) == []
+
+
+def test_socket_move_against_version(test_client, verification_true, puzzle_id):
+    """
+    Moves made over the web socket against an older version of the puzzle should be
+    rejected with the current version and value of the piece.
+    """
+    client = socketio.test_client(app, flask_test_client=test_client, query_string='?auth=X')
+    client.emit('join', {'puzzle_id': puzzle_id})
+    client.get_received()
+
+    move = {'puzzle_id': puzzle_id, 'x_coordinate': 1, 'y_coordinate': 1, 'value': 4}
+    assert client.emit('move', dict(move, version=0), callback=True) == \
+        {'version': 1, 'completed': False}
+    assert client.emit('move', dict(move, value=2, version=0), callback=True) == {
+        'error': 'The puzzle was changed by another move; the move was not made.',
+        'version': 1, 'piece': {'x_coordinate': 1, 'y_coordinate': 1, 'value': 4}
+    }
+    assert [event['args'][0]['version'] for event in client.get_received()] == [1]
+    client.disconnect()
+
+
+def test_move_on_locked_piece(test_client, verification_true, puzzle_id):
+    """
+    Pieces locked by another player cannot be changed; pieces locked by the player (through
+    any of their connections) can.
+    """
+    try:
+        lock_manager.acquire(puzzle_id, 0, 0, 'other-sid', user_id=3)
+        lock_manager.acquire(puzzle_id, 1, 1, 'own-sid', user_id=5)
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=0, y_coordinate=0, value=1
+        ), headers=HEADERS)
+        assert response.status_code == 409
+        assert response.json['reason'] == 'The puzzle piece is locked by another player.'
+        response = test_client.delete(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=0, y_coordinate=0
+        ), headers=HEADERS)
+        assert response.status_code == 409
+
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=1, y_coordinate=1, value=4
+        ), headers=HEADERS)
+        assert response.status_code == 200
+        assert Puzzle.get_puzzle(puzzle_id).get_pieces_as_arr()[0][0] is None
+    finally:
+        lock_manager.clear()
@@ -0,0 +1,104 @@
+"""
+Integration tests for paging through, filtering and summarizing a user's puzzles.
+"""
+import pytest
+from backend.models.player import PuzzlePlayer
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+@pytest.fixture(scope='module')
+def puzzle_ids(init_db):
+    """
+    Save seven puzzles for user Joe Biden: sizes 2 and 3 alternating, difficulties 0.3 and
+    0.6 alternating every two puzzles, with the third puzzle completed and the fourth hidden.
+    """
+    saved = []
+    for index in range(7):
+        puzzle = Puzzle(difficulty_level=0.3 if index % 4 < 2 else 0.6, size=2 + index % 2)
+        puzzle.completed = index == 2
+        puzzle_id = puzzle.save(autocommit=True)
+        puzzle_player = PuzzlePlayer(5, puzzle_id)
+        puzzle_player.hidden = index == 3
+        puzzle_player.save(autocommit=True)
+        saved.append(puzzle_id)
+    return saved
+
+
+def get_puzzles(test_client, query=''):
+    """
+    Get a page of the user's puzzles.
+    """
+    response = test_client.get(f'/puzzles{query}', headers=HEADERS)
+    assert response.status_code == 200
+    return response.json
+
+
+def test_pages(test_client, verification_true, puzzle_ids):
+    """
+    Following the next cursor should return every visible puzzle once, in order.
+    """
+    pages = [get_puzzles(test_client, '?limit=2')]
+    while pages[-1]['next_cursor'] is not None:
+        pages.append(get_puzzles(test_client, f"?limit=2&cursor={pages[-1]['next_cursor']}"))
+
+    assert [len(page['puzzles']) for page in pages] == [2, 2, 2]
+    returned = [puzzle['puzzle_id'] for page in pages for puzzle in page['puzzles']]
+    assert returned == puzzle_ids[:3] + puzzle_ids[4:]
+    assert all('pieces' in puzzle for page in pages for puzzle in page['puzzles'])
+
+
+def test_default_page_size(test_client, verification_true, puzzle_ids):
+    """
+    Without a limit, the configured page size is used.
+    """
+    test_client.application.config['PUZZLES_PAGE_SIZE'] = 4
+    try:
+        page = get_puzzles(test_client)
+    finally:
+        test_client.application.config['PUZZLES_PAGE_SIZE'] = 20
+    assert len(page['puzzles']) == 4
+    assert page['next_cursor'] == page['puzzles'][-1]['puzzle_id']
+
+
+def test_summary(test_client, verification_true, puzzle_ids):
+    """
+    Summaries of puzzles should leave out the puzzle pieces.
+    """
+    page = get_puzzles(test_client, '?fields=summary')
+    assert len(page['puzzles']) == 6
+    assert page['next_cursor'] is None
+    for puzzle in page['puzzles']:
+        assert 'pieces' not in puzzle
+        assert puzzle['players'][0]['id'] == 5
+
+
+@pytest.mark.parametrize('query, indices', [
+    ('?completed=true', [2]),
+    ('?completed=false', [0, 1, 4, 5, 6]),
+    ('?size=3', [1, 5]),
+    ('?difficulty=0.6', [2, 6]),
+    ('?size=2&difficulty=0.3&completed=false', [0, 4])
+])
+def test_filters(test_client, verification_true, puzzle_ids, query, indices):
+    """
+    Puzzles can be filtered on completion, size and difficulty.
+    """
+    page = get_puzzles(test_client, query)
+    assert [puzzle['puzzle_id'] for puzzle in page['puzzles']] == \
+        [puzzle_ids[index] for index in indices]
+
+
+def test_invalid_arguments(test_client, verification_true, puzzle_ids):
+    """
+    Invalid limits and fields should be rejected.
+    """
+    response = test_client.get('/puzzles?limit=1000', headers=HEADERS)
+    assert response.status_code == 400
+    assert response.json['reason'] == 'The limit must range between 1 and 100. Got 1000.'
+
+    response = test_client.get('/puzzles?fields=everything', headers=HEADERS)
+    assert response.status_code == 400
@@ -0,0 +1,89 @@
+"""
+Integration tests for the pool of pre-generated puzzles: filling the pool ahead of time,
+creating new puzzles from the pool, and replenishing the pool.
+"""
+from backend import app, socketio
+from backend.engine.packed_board import unpack_board
+from backend.models.puzzle_pool import PooledPuzzle
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+def test_fill_puzzle_pool_command(test_client, init_db):
+    """
+    The fill-puzzle-pool command should fill every difficulty bucket up to the target.
+    """
+    result = app.test_cli_runner().invoke(args=['fill-puzzle-pool', '--size', '2',
+                                                '--target', '2'])
+    assert result.output.splitlines()[0] == 'Size 2, difficulty 0.01-0.24: generated 2 puzzles.'
+    assert len(result.output.splitlines()) == len(PooledPuzzle.BUCKETS)
+    assert all(PooledPuzzle.count_available(2, bucket) == 2
+               for bucket in range(len(PooledPuzzle.BUCKETS)))
+
+    pooled = PooledPuzzle.query.filter_by(size=2, bucket=1).first()
+    assert 0.25 <= pooled.difficulty <= 0.49
+
+    # buckets that are already full are left as is
+    result = app.test_cli_runner().invoke(args=['fill-puzzle-pool', '--size', '2',
+                                                '--target', '1'])
+    assert 'generated 0 puzzles' in result.output.splitlines()[-1]
+
+
+def test_create_puzzle_from_pool(test_client, init_db, verification_true):
+    """
+    A new puzzle should be created from the pool, when the pool holds a puzzle of the
+    requested size and difficulty.
+    """
+    pooled = PooledPuzzle.query.filter_by(size=2, bucket=1).order_by(PooledPuzzle.id).first()
+    board, _ = unpack_board(pooled.board, 2)
+    solution = pooled.solution
+
+    response = test_client.post('/puzzles', data=dict(difficulty=0.3, size=2),
+                                headers=HEADERS)
+    assert response.status_code == 200
+    assert PooledPuzzle.count_available(2, 1) == 1
+
+    puzzle = Puzzle.get_puzzle(response.json['puzzle_id'])
+    assert puzzle.difficulty == 0.3
+    assert puzzle.point_value == 45
+    assert puzzle.get_pieces_as_arr() == board
+    assert puzzle.solution == solution
+
+
+def test_create_puzzle_size_not_pooled(monkeypatch, test_client, init_db, verification_true):
+    """
+    Puzzles of sizes that are not pooled are generated when requested.
+    """
+    monkeypatch.setitem(app.config, 'PUZZLE_POOL_SIZES', [3])
+    response = test_client.post('/puzzles', data=dict(difficulty=0.3, size=2),
+                                headers=HEADERS)
+    assert response.status_code == 200
+    assert PooledPuzzle.count_available(2, 1) == 1
+
+
+def test_create_puzzle_replenishes_pool(monkeypatch, test_client, init_db, verification_true):
+    """
+    Buckets that fall below the low-water mark are refilled after a puzzle is created.
+    """
+    started = []
+
+    def start_task(target, *args, **kwargs):
+        started.append(target)
+        target(*args, **kwargs)
+
+    monkeypatch.setattr(socketio, 'start_background_task', start_task)
+    monkeypatch.setitem(app.config, 'PUZZLE_POOL_SIZES', [2])
+    monkeypatch.setitem(app.config, 'PUZZLE_POOL_LOW_WATER', 2)
+    monkeypatch.setitem(app.config, 'PUZZLE_POOL_TARGET', 3)
+
+    response = test_client.post('/puzzles', data=dict(difficulty=0.3, size=2),
+                                headers=HEADERS)
+    assert response.status_code == 200
+    assert len(started) == 1
+
+    # only the bucket that fell below the low-water mark is refilled
+    assert PooledPuzzle.count_available(2, 1) == 3
+    assert PooledPuzzle.count_available(2, 0) == 2
@@ -0,0 +1,102 @@
+"""
+Integration tests for the number of queries made to get a user's puzzles, or to check
+that the user is a player of a puzzle, which should not grow with the number of puzzles.
+"""
+from backend.models.player import PuzzlePlayer
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true, statements
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+def save_puzzle(player_ids, hidden=False):
+    """
+    Save a new puzzle of size 2 for the given players (by id); returns the puzzle id.
+    """
+    puzzle_id = Puzzle(difficulty_level=0.3, size=2).save(autocommit=True)
+    for player_id in player_ids:
+        puzzle_player = PuzzlePlayer(player_id, puzzle_id)
+        puzzle_player.hidden = hidden
+        puzzle_player.save(autocommit=True)
+    return puzzle_id
+
+
+def count_get_puzzles(test_client, statements):
+    """
+    Get all of the user's puzzles, returning the response and the number of queries made
+    (the tables are created before the first request, so only SELECT statements are counted).
+    """
+    del statements[:]
+    response = test_client.get('/puzzles', headers=HEADERS)
+    assert response.status_code == 200
+    return response, sum(statement.lstrip().startswith('SELECT') for statement in statements)
+
+
+def test_get_puzzles_query_count(test_client, init_db, verification_true, statements):
+    """
+    Getting all puzzles should load the puzzles, their pieces and their players with
+    one query each, however many puzzles the user has.
+    """
+    save_puzzle([5])
+    response, single_count = count_get_puzzles(test_client, statements)
+    assert len(response.json['puzzles']) == 1
+    assert single_count <= 4  # the user making the request, then puzzles, pieces and players
+    for table in ('FROM sudoku_puzzles', 'FROM puzzle_pieces', 'FROM users JOIN puzzle_players'):
+        assert sum(table in statement for statement in statements) <= 1
+
+    for _ in range(5):
+        save_puzzle([5, 3])
+    response, many_count = count_get_puzzles(test_client, statements)
+    assert len(response.json['puzzles']) == 6
+    assert many_count == single_count
+
+
+def test_get_puzzles_assembled(test_client, init_db, verification_true):
+    """
+    Puzzles should be returned in order, each with its own pieces and players, and
+    without the puzzles hidden from the user.
+    """
+    visible_id = save_puzzle([3, 5])
+    hidden_id = save_puzzle([5], hidden=True)
+    other_id = save_puzzle([3])
+
+    response = test_client.get('/puzzles', headers=HEADERS)
+    puzzles = response.json['puzzles']
+    puzzle_ids = [puzzle['puzzle_id'] for puzzle in puzzles]
+    assert puzzle_ids == sorted(puzzle_ids)
+    assert visible_id in puzzle_ids
+    assert hidden_id not in puzzle_ids
+    assert other_id not in puzzle_ids
+
+    for puzzle in puzzles:
+        saved = Puzzle.get_puzzle(puzzle['puzzle_id'])
+        assert len(puzzle['pieces']) == len(saved.puzzle_pieces)
+        board = [[None] * 4 for _ in range(4)]
+        for piece in puzzle['pieces']:
+            board[piece['y_coordinate']][piece['x_coordinate']] = piece['value']
+        assert board == saved.get_pieces_as_arr()
+        assert [player['id'] for player in puzzle['players']] == \
+            sorted(player.id for player in PuzzlePlayer.find_players_for_puzzle(saved.id))
+
+
+def test_membership_query_count(test_client, init_db, verification_true, statements):
+    """
+    Checking that the user is a player of a puzzle should be a single lookup on the
+    puzzle players, however many puzzles the user has.
+    """
+    puzzle_id = save_puzzle([5])
+    for _ in range(3):
+        save_puzzle([5])
+
+    del statements[:]
+    response = test_client.get(f'/puzzles/{puzzle_id}', headers=HEADERS)
+    assert response.status_code == 200
+    assert sum('FROM puzzle_players' in statement and 'JOIN' not in statement
+               for statement in statements) == 1
+
+    other_id = save_puzzle([3])
+    response = test_client.get(f'/puzzles/{other_id}', headers=HEADERS)
+    assert response.status_code == 404
+    response = test_client.get(f'/puzzles/{other_id}/solution', headers=HEADERS)
+    assert response.status_code == 404
@@ -0,0 +1,181 @@
+"""
+Integration tests for the snapshots of puzzle boards: boards are rebuilt from their latest
+snapshot and the moves journaled since (e.g., for clients resyncing from an old version), and
+the journal of completed puzzles is compacted.
+"""
+from datetime import datetime, timedelta
+import pytest
+from backend import app, db, socketio
+from backend.engine.packed_board import unpack_board
+from backend.models.puzzle_exception import PuzzleException
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.puzzle_snapshot import PuzzleSnapshot
+from backend.models.sudoku_puzzle import Puzzle
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import SOLUTION, verification_true, new_puzzle, \
+    puzzle_id
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+@pytest.fixture
+def snapshot_interval(monkeypatch):
+    """
+    Take a snapshot of the board every 2 moves.
+    """
+    monkeypatch.setitem(app.config, 'SNAPSHOT_INTERVAL', 2)
+
+
+def make_moves(test_client, puzzle_id, moves):
+    """
+    Make the (x, y, value) moves through the API.
+    """
+    for x_coord, y_coord, value in moves:
+        response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+            x_coordinate=x_coord, y_coordinate=y_coord, value=value
+        ), headers=HEADERS)
+        assert response.status_code == 200
+
+
+def snapshots(puzzle_id):
+    """
+    Returns the snapshots of the puzzle, as (version, board) tuples.
+    """
+    return [(snapshot.version, unpack_board(snapshot.packed_board, 2)[0])
+            for snapshot in PuzzleSnapshot.query.filter_by(puzzle_id=puzzle_id)
+            .order_by(PuzzleSnapshot.version)]
+
+
+def board_with(*pieces):
+    """
+    Returns the board of the puzzle with the (x, y, value) pieces set.
+    """
+    board = [row[:] for row in SOLUTION]
+    board[0][0] = None
+    board[1][1] = None
+    for x_coord, y_coord, value in pieces:
+        board[y_coord][x_coord] = value
+    return board
+
+
+def test_snapshots_taken(test_client, verification_true, snapshot_interval, puzzle_id):
+    """
+    A snapshot of the board should be taken every few moves, and when the puzzle is completed.
+    """
+    make_moves(test_client, puzzle_id, ((0, 0, 2), (0, 0, 3), (1, 1, 4)))
+    assert snapshots(puzzle_id) == [(2, board_with((0, 0, 3)))]
+
+    make_moves(test_client, puzzle_id, ((0, 0, 1),))
+    assert snapshots(puzzle_id) == [(2, board_with((0, 0, 3))),
+                                    (4, board_with((0, 0, 1), (1, 1, 4)))]
+    assert Puzzle.get_puzzle(puzzle_id).completed
+
+
+def test_snapshot_on_completion(test_client, verification_true, snapshot_interval, puzzle_id):
+    """
+    Moves that write back the whole board (e.g., on packed boards) should also take snapshots,
+    including when they complete the puzzle.
+    """
+    Puzzle.get_puzzle(puzzle_id).convert_to_packed()
+    make_moves(test_client, puzzle_id, ((1, 1, 4), (0, 0, 3), (0, 0, 1)))
+    assert snapshots(puzzle_id) == [(2, board_with((0, 0, 3), (1, 1, 4))),
+                                    (3, board_with((0, 0, 1), (1, 1, 4)))]
+
+
+def test_rebuild_board(test_client, verification_true, snapshot_interval, puzzle_id):
+    """
+    The board at any version should be rebuilt from the latest snapshot and the moves
+    journaled since; versions whose moves are no longer journaled cannot be rebuilt.
+    """
+    make_moves(test_client, puzzle_id, ((0, 0, 2), (0, 0, 3), (1, 1, 4)))
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.rebuild_board() == puzzle.get_pieces_as_arr()
+    assert [puzzle.rebuild_board(version) for version in range(4)] == [
+        board_with(), board_with((0, 0, 2)), board_with((0, 0, 3)),
+        board_with((0, 0, 3), (1, 1, 4))
+    ]
+
+    PuzzleMove.query.filter(PuzzleMove.puzzle_id == puzzle_id, PuzzleMove.version <= 2).delete()
+    db.session.commit()
+    assert puzzle.rebuild_board() == board_with((0, 0, 3), (1, 1, 4))
+    with pytest.raises(PuzzleException):
+        puzzle.rebuild_board(1)
+
+
+def test_socket_resync_from_snapshot(test_client, verification_true, snapshot_interval,
+                                     puzzle_id, monkeypatch):
+    """
+    A client resyncing from a version whose moves are no longer journaled (or too many moves
+    ago) should be sent the pieces changed since the board at that version, rebuilt from its
+    snapshot, as one delta.
+    """
+    monkeypatch.setitem(app.config, 'MOVES_PAGE_SIZE', 1)
+    make_moves(test_client, puzzle_id, ((0, 0, 2), (0, 0, 3), (1, 1, 4), (0, 0, 2)))
+    PuzzleMove.query.filter(PuzzleMove.puzzle_id == puzzle_id, PuzzleMove.version <= 2).delete()
+    db.session.commit()
+    client = socketio.test_client(app, flask_test_client=test_client, query_string='?auth=X')
+    client.emit('join', {'puzzle_id': puzzle_id})
+    client.get_received()
+
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 2})
+    assert [event['args'][0] for event in client.get_received()] == [
+        {'puzzle_id': puzzle_id, 'version': 4, 'completed': False, 'from_version': 2,
+         'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 2},
+                    {'x_coordinate': 1, 'y_coordinate': 1, 'value': 4}]}
+    ]
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 1})
+    assert [event['name'] for event in client.get_received()] == ['puzzle_update']
+    client.disconnect()
+
+
+def test_socket_resync_past_page(test_client, verification_true, snapshot_interval, puzzle_id,
+                                 monkeypatch):
+    """
+    A client that missed more than a page of moves should be sent the pieces changed since the
+    version it saw as one delta, from that version (so that the client can apply it), rather
+    than the moves one by one.
+    """
+    monkeypatch.setitem(app.config, 'MOVES_PAGE_SIZE', 2)
+    make_moves(test_client, puzzle_id, ((0, 0, 2), (1, 1, 3), (0, 0, 3), (1, 1, 4)))
+    client = socketio.test_client(app, flask_test_client=test_client, query_string='?auth=X')
+    client.emit('join', {'puzzle_id': puzzle_id})
+    client.get_received()
+
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 1})
+    assert [event['args'][0] for event in client.get_received()] == [
+        {'puzzle_id': puzzle_id, 'version': 4, 'completed': False, 'from_version': 1,
+         'pieces': [{'x_coordinate': 0, 'y_coordinate': 0, 'value': 3},
+                    {'x_coordinate': 1, 'y_coordinate': 1, 'value': 4}]}
+    ]
+    client.emit('resync', {'puzzle_id': puzzle_id, 'version': 2})
+    assert [event['args'][0]['version'] for event in client.get_received()] == [3, 4]
+    client.disconnect()
+
+
+def test_compact_move_journal(test_client, verification_true, snapshot_interval, puzzle_id):
+    """
+    Compaction should remove the old moves and snapshots of completed puzzles, except those
+    needed to rebuild their boards; the journal of puzzles still being played is kept.
+    """
+    playing_id = new_puzzle()
+    make_moves(test_client, playing_id, ((0, 0, 2), (0, 0, 3)))
+    make_moves(test_client, puzzle_id, ((0, 0, 2), (0, 0, 3), (1, 1, 4), (0, 0, 2), (0, 0, 1)))
+    two_days_ago = datetime.utcnow() - timedelta(days=2)
+    PuzzleMove.query.filter(PuzzleMove.puzzle_id.in_([puzzle_id, playing_id]),
+                            PuzzleMove.version < 5).update({PuzzleMove.created_at: two_days_ago},
+                                                           synchronize_session=False)
+    PuzzleSnapshot.query.filter(PuzzleSnapshot.puzzle_id.in_([puzzle_id, playing_id])).update(
+        {PuzzleSnapshot.created_at: two_days_ago}, synchronize_session=False
+    )
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['compact-move-journal', '--retention-days', '1'])
+    assert result.exit_code == 0
+    assert 'Removed 4 moves and 2 snapshots' in result.output
+
+    assert [move.version for move in PuzzleMove.find_moves_since(puzzle_id, 0)] == [5]
+    assert [version for version, _ in snapshots(puzzle_id)] == [5]
+    assert [move.version for move in PuzzleMove.find_moves_since(playing_id, 0)] == [1, 2]
+    assert [version for version, _ in snapshots(playing_id)] == [2]
+    puzzle = Puzzle.get_puzzle(puzzle_id)
+    assert puzzle.rebuild_board() == puzzle.get_pieces_as_arr()
@@ -0,0 +1,47 @@
+"""
+Integration tests for the upgrade of the schema of databases created by earlier versions of
+the server.
+"""
+from sqlalchemy import Boolean, Column, Integer, LargeBinary, MetaData, Table, inspect
+from backend import app, db
+from backend.models.user import User
+from backend.schema import add_missing_columns, add_missing_indexes
+from tests.integration.test_setup import test_client, init_db
+
+
+def test_add_missing_columns(init_db):
+    """
+    The columns missing from an existing table should be added once; running the upgrade
+    again should change nothing.
+    """
+    db.engine.execute('CREATE TABLE legacy_puzzles (id INTEGER PRIMARY KEY, completed BOOLEAN)')
+    legacy_puzzles = Table('legacy_puzzles', MetaData(),
+                           Column('id', Integer, primary_key=True), Column('completed', Boolean),
+                           Column('solution', LargeBinary), Column('version', Integer))
+    try:
+        assert add_missing_columns(legacy_puzzles, ('solution', 'version')) == \
+            ['legacy_puzzles.solution', 'legacy_puzzles.version']
+        assert add_missing_columns(legacy_puzzles, ('solution', 'version')) == []
+        assert [column['name'] for column in inspect(db.engine).get_columns('legacy_puzzles')] \
+            == ['id', 'completed', 'solution', 'version']
+    finally:
+        db.engine.execute('DROP TABLE legacy_puzzles')
+
+
+def test_upgrade_db_command(init_db):
+    """
+    Upgrading an up-to-date database should add nothing.
+    """
+    result = app.test_cli_runner().invoke(args=['upgrade-db'])
+    assert result.exit_code == 0
+    assert 'Added 0 columns and indexes.' in result.output
+
+
+def test_add_missing_indexes(init_db):
+    """
+    The index on the emails of users should be created if it is missing, once.
+    """
+    db.engine.execute('DROP INDEX ix_users_email')
+    assert add_missing_indexes(User.__table__, ('ix_users_email',)) == ['ix_users_email']
+    assert add_missing_indexes(User.__table__, ('ix_users_email',)) == []
+    assert 'ix_users_email' in [index['name'] for index in inspect(db.engine).get_indexes('users')]
@@ -2,6 +2,8 @@
 Integration tests for Sudoku Puzzle endpoints that impact the creation/editing/checking
 of Sudoku puzzles and pieces.
 """
+from sqlalchemy import event
+from backend import db
 from backend.google_auth import GoogleAuth
 from backend.models.player import PuzzlePlayer
 from backend.models.puzzle_pieces import PuzzlePiece
@@ -52,7 +54,8 @@ def test_get_all_puzzles_no_puzzles(test_client, init_db, verification_true):
     assert response.status_code == 200
     assert response.json == {
         'message': 'No unhidden sudoku puzzles are associated with Joe Biden (id = 5)',
-        'puzzles': []
+        'puzzles': [],
+        'next_cursor': None
     }
 
 
@@ -314,23 +317,24 @@ def test_get_all_puzzles_for_user(test_client, init_db, verification_true):
     """
     response = test_client.get('/puzzles', headers={'Authorization': 'Bearer 2342351231asdb'})
     expected = {'puzzles': [
-        {'puzzle_id': 3, 'completed': False, 'difficulty': 0.5, 'point_value': 90,
+        {'puzzle_id': 3, 'completed': False, 'difficulty': 0.5, 'point_value': 90, 'version': 0,
          'players': [
              {'id': 5, 'first_name': 'Joe', 'last_name': 'Biden', 'email': 'jb@biden2020.com'}]},
-        {'puzzle_id': 4, 'completed': False, 'difficulty': 0.5, 'point_value': 90,
+        {'puzzle_id': 4, 'completed': False, 'difficulty': 0.5, 'point_value': 90, 'version': 0,
          'players': [
              {'id': 5, 'first_name': 'Joe', 'last_name': 'Biden', 'email': 'jb@biden2020.com'}]},
-        {'puzzle_id': 5, 'completed': False, 'difficulty': 0.5, 'point_value': 90,
+        {'puzzle_id': 5, 'completed': False, 'difficulty': 0.5, 'point_value': 90, 'version': 0,
          'players': [
              {'id': 5, 'first_name': 'Joe', 'last_name': 'Biden', 'email': 'jb@biden2020.com'}]},
-        {'puzzle_id': 6, 'completed': False, 'difficulty': 0.5, 'point_value': 90,
+        {'puzzle_id': 6, 'completed': False, 'difficulty': 0.5, 'point_value': 90, 'version': 0,
          'players': [
              {'id': 5, 'first_name': 'Joe', 'last_name': 'Biden', 'email': 'jb@biden2020.com'}]},
-        {'puzzle_id': 7, 'completed': False, 'difficulty': 0.5, 'point_value': 90,
+        {'puzzle_id': 7, 'completed': False, 'difficulty': 0.5, 'point_value': 90, 'version': 0,
          'players': [{'id': 3, 'first_name': 'Princess', 'last_name': 'Bride',
                       'email': 'princess@princessbride.com'},
                      {'id': 5, 'first_name': 'Joe', 'last_name': 'Biden',
-                      'email': 'jb@biden2020.com'}]}]}
+                      'email': 'jb@biden2020.com'}]}],
+        'next_cursor': None}
 
     # not testing pieces in this test; just that puzzles are returned. Otherwise,
     # this is a pretty hefty response to compare
@@ -352,6 +356,7 @@ def test_get_puzzle_valid(test_client, init_db, verification_true):
         'completed': False,
         'difficulty': 0.5,
         'point_value': 90,
+        'version': 0,
         'pieces': ['some pieces would go here'],
         'players': [
             {'id': 5, 'first_name': 'Joe', 'last_name': 'Biden', 'email': 'jb@biden2020.com'}
@@ -661,3 +666,33 @@ def test_get_puzzle_solution_complete(test_client, init_db, verification_true):
 
     assert response.status_code == 200
     assert len(response.json['solved_puzzle']['pieces']) == 81
+
+
+def test_save_new_puzzle_adds_players_in_bulk(test_client, init_db, verification_true):
+    """
+    The players invited to a new puzzle should be looked up with a single query and added
+    to the puzzle, along with the user creating it, with a single statement.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+        statements.append(statement)
+
+    data = dict(difficulty=0.5, size=2, additional_players=[
+        'foobar@comsci.com', 'princess@princessbride.com', 'nobody.com'
+    ])
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = test_client.post('/puzzles', data=data,
+                                    headers={'Authorization': 'Bearer 2342351231asdb'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert response.status_code == 200
+    assert response.json['unregistered_emails'] == ['nobody.com']
+    assert len([statement for statement in statements if 'users.email IN' in statement]) == 1
+    assert len([statement for statement in statements
+                if 'INSERT INTO puzzle_players' in statement]) == 1
+
+    players = PuzzlePlayer.find_players_for_puzzle(response.json['puzzle_id'])
+    assert sorted(player.id for player in players) == [2, 3, 5]
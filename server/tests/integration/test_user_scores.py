@@ -0,0 +1,83 @@
+"""
+Integration tests for the scores of users on the leaderboard, which are updated as puzzles
+are completed and as players join completed puzzles.
+"""
+import pytest
+from backend import db
+from backend.models.player import PuzzlePlayer
+from backend.models.sudoku_puzzle import Puzzle
+from backend.models.user import User
+from backend.models.user_score import UserScore
+from tests.integration.test_setup import test_client, init_db
+from tests.integration.integration_mocks import verification_true, new_puzzle
+
+HEADERS = {'Authorization': 'Bearer 2342351231asdb'}
+
+
+@pytest.fixture(scope='module')
+def puzzle_id(init_db):
+    """
+    Save a puzzle of size 2 (worth 30 points) with a single empty piece at (0, 0), for
+    users Joe Biden and Princess Bride.
+    """
+    return new_puzzle(((0, 0),), (5, 3))
+
+
+def get_scores():
+    """
+    Get the stored score of each user, by id.
+    """
+    return dict(db.session.query(UserScore.user_id, UserScore.score))
+
+
+def test_completing_puzzle_adds_points(test_client, verification_true, puzzle_id):
+    """
+    Completing a puzzle should add its points to the score of each of its players.
+    """
+    assert get_scores() == {}
+    response = test_client.post(f'/puzzles/{puzzle_id}/piece', data=dict(
+        x_coordinate=0, y_coordinate=0, value=1
+    ), headers=HEADERS)
+    assert response.status_code == 200
+    assert Puzzle.get_puzzle(puzzle_id).completed
+    assert get_scores() == {3: 30, 5: 30}
+
+    # the puzzle cannot be marked as completed again (e.g., by a concurrent move)
+    assert not Puzzle.mark_completed(puzzle_id)
+
+
+def test_joining_completed_puzzle_adds_points(test_client, puzzle_id):
+    """
+    A player joining a completed puzzle should get its points, without changing the
+    scores of the other players.
+    """
+    PuzzlePlayer.add_player_to_puzzle(puzzle_id, User.query.get(4))
+    assert get_scores() == {3: 30, 4: 30, 5: 30}
+
+
+def test_leaderboard(test_client, verification_true, puzzle_id):
+    """
+    The leaderboard should list the stored scores, most recently registered users first
+    among users with equal scores.
+    """
+    response = test_client.get('/leaderboard', headers=HEADERS)
+    assert response.status_code == 200
+    assert response.json == {'players': [
+        {'first_name': 'Joe', 'last_name': 'Biden', 'score': 30},
+        {'first_name': 'Donald', 'last_name': 'Trump', 'score': 30},
+        {'first_name': 'Princess', 'last_name': 'Bride', 'score': 30}
+    ]}
+
+
+def test_rebuild(test_client, puzzle_id):
+    """
+    Rebuilding the scores should find them consistent with the completed puzzles, or
+    correct them if they are not.
+    """
+    assert UserScore.rebuild() == (3, 0)
+
+    UserScore.query.filter_by(user_id=3).update({UserScore.score: 5})
+    db.session.add(UserScore(1, 10))
+    db.session.commit()
+    assert UserScore.rebuild() == (3, 2)
+    assert get_scores() == {3: 30, 4: 30, 5: 30}
@@ -6,8 +6,10 @@ from backend.google_auth import GoogleAuth
 from backend.models.puzzle_pieces import PuzzlePiece
 from backend.models.player import PuzzlePlayer
 from backend.models.puzzle_exception import PuzzleException
+from backend.models.puzzle_pool import PooledPuzzle
 from backend.models.sudoku_puzzle import Puzzle
 from backend.models.user import User
+from backend.models.user_score import UserScore
 
 
 class MockSession:
@@ -39,6 +41,20 @@ class MockSession:
         """
         return
 
+    @staticmethod
+    def rollback():
+        """
+        Mock rollback method
+        """
+        return
+
+    @staticmethod
+    def execute(*args, **kwargs):
+        """
+        Mock execute method
+        """
+        return
+
     @staticmethod
     def remove():
         """
@@ -60,37 +76,77 @@ def user():
 @pytest.fixture
 def mock_no_puzzles_for_player(monkeypatch):
     """
-    Mock the find_all_puzzles_for_player() function, returning no puzzles for player.
+    Mock the find_all_puzzles_for_player(), find_puzzles_for_player() and find_player_puzzle()
+    functions, returning no puzzles for player.
     """
     def mock_get_puzzles_for_player(*args, **kwargs):
         return []
 
+    def mock_find_player_puzzle(*args, **kwargs):
+        return None
+
     monkeypatch.setattr(PuzzlePlayer, 'find_all_puzzles_for_player', mock_get_puzzles_for_player)
+    monkeypatch.setattr(PuzzlePlayer, 'find_puzzles_for_player', mock_get_puzzles_for_player)
+    monkeypatch.setattr(PuzzlePlayer, 'find_player_puzzle', mock_find_player_puzzle)
 
 
 @pytest.fixture
 def mock_single_puzzles_for_player(monkeypatch):
     """
-    Mock the find_all_puzzles_for_player() function, returning a single puzzle for player.
+    Mock the find_all_puzzles_for_player() and find_player_puzzle() functions, returning
+    a single puzzle (with id 1) for player.
     """
     def mock_get_puzzles_for_player(*args, **kwargs):
         return [PuzzlePlayer(1, 1)]
 
+    def mock_find_player_puzzle(player_id, puzzle_id):
+        return PuzzlePlayer(player_id, puzzle_id) if puzzle_id == 1 else None
+
     monkeypatch.setattr(PuzzlePlayer, 'find_all_puzzles_for_player', mock_get_puzzles_for_player)
+    monkeypatch.setattr(PuzzlePlayer, 'find_player_puzzle', mock_find_player_puzzle)
 
 
 @pytest.fixture
 def mock_get_puzzle(monkeypatch):
     """
-    Mock get_puzzle() method by passing back a puzzle with known configuration.
+    Mock get_puzzle() (and get_puzzle_for_update()) method by passing back a puzzle with known
+    configuration, along with the counting of moves made on the puzzle (the puzzle is always at
+    the expected version).
     """
     def mock_get_puzzle(*args, **kwargs):
         puzzle = Puzzle(difficulty_level=0.5, completed=False, size=3)
+        puzzle.solution = None  # the generated solution does not apply to the pieces below
         puzzle.puzzle_pieces = [PuzzlePiece(1, 0, 1, value=None, static_piece=False),
                                 PuzzlePiece(1, 1, 1, value=3, static_piece=True)]
         return puzzle
 
     monkeypatch.setattr(Puzzle, 'get_puzzle', mock_get_puzzle)
+    monkeypatch.setattr(Puzzle, 'get_puzzle_for_update', mock_get_puzzle)
+    monkeypatch.setattr(Puzzle, 'count_move', lambda *args, **kwargs: True)
+
+
+@pytest.fixture
+def mock_user_scores(monkeypatch):
+    """
+    Mock the marking of puzzles as completed in the database and the updates to user scores;
+    returns the list of (puzzle_id, points) added to user scores.
+    """
+    added = []
+
+    def mock_add_puzzle_points(puzzle_id, points, player_id=None):
+        added.append((puzzle_id, points))
+
+    monkeypatch.setattr(Puzzle, 'mark_completed', lambda *args: True)
+    monkeypatch.setattr(UserScore, 'add_puzzle_points', mock_add_puzzle_points)
+    return added
+
+
+@pytest.fixture
+def mock_empty_pool(monkeypatch):
+    """
+    Mock the puzzle pool as having no puzzles, so that new puzzles are generated.
+    """
+    monkeypatch.setattr(PooledPuzzle, 'draw', lambda *args, **kwargs: None)
 
 
 @pytest.fixture
@@ -103,6 +159,7 @@ def mock_save(monkeypatch):
         return 1
     monkeypatch.setattr(Puzzle, 'save', save_mock)
     monkeypatch.setattr(PuzzlePlayer, 'save', save_mock)
+    monkeypatch.setattr(PuzzlePlayer, 'add_players_to_new_puzzle', save_mock)
 
 
 @pytest.fixture
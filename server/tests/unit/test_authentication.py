@@ -3,6 +3,7 @@ Test Google Authentication mechanism
 """
 from flask import g
 import pytest
+import requests
 from backend.config import UnitTestingConfig
 from backend.google_auth import GoogleAuth
 from backend import app, db
@@ -108,6 +109,28 @@ def test_authorize_token_validation_error(monkeypatch):
     assert expected == result
 
 
+def test_authorize_token_validation_unavailable(monkeypatch):
+    """
+    Verification of token should fail, without raising, if Google cannot be reached.
+    """
+    class MockRequest:
+        """Mock Request for verification of token."""
+        def __init__(self):
+            self.headers = {'Authorization': 'Bearer Token-Here'}
+
+    def mock_verify_token(*args, **kwargs):
+        """Mock the verification of the token running out of retries."""
+        raise requests.exceptions.RetryError("Max retries exceeded")
+
+    monkeypatch.setattr(GoogleAuth, "validate_token", mock_verify_token)
+
+    result = verify_token(MockRequest())
+    expected = {'message': 'Request denied access',
+                'reason': 'Google rejected oauth2 token: token could not be validated, as the '
+                          'Google API could not be reached (RetryError)'}, 401
+    assert expected == result
+
+
 def test_authorize_token_validation_success_register(verification_token):
     """
     Verification of token should fail if header is Authentication info is malformed
@@ -0,0 +1,96 @@
+"""
+Unit tests for the incremental board validator.
+"""
+from backend.engine.board_validator import BoardValidator
+
+SOLVED_BOARD = [[2, 4, 3, 1], [1, 3, 4, 2], [4, 2, 1, 3], [3, 1, 2, 4]]
+
+
+def test_empty_board():
+    """
+    An empty board has no conflicts, but is not complete.
+    """
+    validator = BoardValidator(2)
+    assert validator.empty == 16
+    assert validator.conflicts == 0
+    assert not validator.is_complete()
+
+
+def test_solved_board():
+    """
+    A solved board has no empty pieces and no conflicts, so it is complete.
+    """
+    validator = BoardValidator(2, SOLVED_BOARD)
+    assert validator.empty == 0
+    assert validator.conflicts == 0
+    assert validator.is_complete()
+
+
+def test_place_conflict_row():
+    """
+    Placing a value already present in the same row is a conflict.
+    """
+    validator = BoardValidator(2, [[1, None, None, None]] + [[None] * 4] * 3)
+    assert validator.place(3, 0, 1)
+    assert validator.has_conflict(0, 0)
+    assert validator.conflicts == 1
+
+
+def test_place_conflict_column():
+    """
+    Placing a value already present in the same column is a conflict.
+    """
+    validator = BoardValidator(2)
+    validator.place(1, 0, 3)
+    assert validator.place(1, 3, 3)
+    assert validator.conflicts == 1
+
+
+def test_place_conflict_box():
+    """
+    Placing a value already present in the same box (but not the same row or column)
+    is a conflict.
+    """
+    validator = BoardValidator(2)
+    validator.place(2, 2, 4)
+    assert validator.place(3, 3, 4)
+    assert not validator.place(1, 3, 2)
+    assert validator.conflicts == 1
+
+
+def test_clear_conflict():
+    """
+    Replacing or removing a conflicting value resolves the conflict.
+    """
+    validator = BoardValidator(2, SOLVED_BOARD)
+    assert validator.place(0, 0, 1)
+    assert not validator.is_complete()
+
+    validator.place(0, 0, None)
+    assert validator.conflicts == 0
+    assert validator.empty == 1
+
+    assert not validator.place(0, 0, 2)
+    assert validator.is_complete()
+
+
+def test_place_same_value():
+    """
+    Placing the value a position already holds does not change the counters.
+    """
+    validator = BoardValidator(2, SOLVED_BOARD)
+    assert not validator.place(0, 0, 2)
+    assert validator.empty == 0
+    assert validator.conflicts == 0
+
+
+def test_get_candidates():
+    """
+    Candidates are the values not already used in the row, column and box of a position.
+    """
+    validator = BoardValidator(2, SOLVED_BOARD)
+    validator.place(0, 2, None)
+    assert validator.get_candidates(0, 2) == [4]
+
+    validator = BoardValidator(3)
+    assert validator.get_candidates(4, 4) == list(range(1, 10))
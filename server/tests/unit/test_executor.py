@@ -0,0 +1,133 @@
+"""
+Unit tests for the board executor, which runs CPU-bound work on puzzle boards.
+"""
+import time
+from concurrent.futures import Future
+import pytest
+from backend import app
+from backend.config import UnitTestingConfig
+from backend.engine.board_tasks import generate_board, solve_board
+from backend.executor import BoardExecutor
+from backend.models.puzzle_exception import PuzzleException
+
+app.config.from_object(UnitTestingConfig)
+
+
+class MockApp:
+    """
+    Mock app, holding only the configuration of the executor.
+    """
+    def __init__(self, workers, timeout=5):
+        self.config = {'BOARD_EXECUTOR_WORKERS': workers, 'BOARD_EXECUTOR_TIMEOUT': timeout}
+
+
+def add(first, second):
+    """Helper function to submit to the executor"""
+    return first + second
+
+
+def fail():
+    """Helper function that raises an exception"""
+    raise PuzzleException("Failed!")
+
+
+def test_run_inline():
+    """
+    Without workers, submitted functions should be run inline.
+    """
+    executor = BoardExecutor(MockApp(workers=0))
+    assert executor.run(add, 1, 2) == 3
+    assert executor.pool is None
+
+
+def test_run_inline_exception():
+    """
+    Exceptions raised by a submitted function should be raised by run().
+    """
+    executor = BoardExecutor(MockApp(workers=0))
+    with pytest.raises(PuzzleException) as exception:
+        executor.run(fail)
+    assert exception.value.get_message() == "Failed!"
+
+
+def test_run_in_worker_process():
+    """
+    With workers configured, functions should be run in the process pool, with the
+    executor sleeping (cooperatively) while waiting for the result.
+    """
+    sleeps = []
+    executor = BoardExecutor(MockApp(workers=1), sleep=lambda seconds: sleeps.append(seconds)
+                             or time.sleep(seconds))
+    try:
+        assert executor.run(add, 1, 2) == 3
+        assert executor.pool is not None
+        assert sleeps
+    finally:
+        executor.shutdown()
+    assert executor.pool is None
+
+
+def test_run_timeout():
+    """
+    A function that does not finish within the timeout should raise a PuzzleException.
+    """
+    executor = BoardExecutor(MockApp(workers=1))
+    try:
+        with pytest.raises(PuzzleException) as exception:
+            executor.run(time.sleep, 1, timeout=0.05)
+        assert exception.value.get_message() == ("Puzzle board could not be processed within"
+                                                 " 0.05 seconds; please try again later.")
+    finally:
+        executor.shutdown()
+
+
+def test_shutdown_at_exit(monkeypatch):
+    """
+    The pool should be shut down at exit once it is started, until it is shut down.
+    """
+    registered = []
+    monkeypatch.setattr('atexit.register', registered.append)
+    monkeypatch.setattr('atexit.unregister', registered.remove)
+    executor = BoardExecutor(MockApp(workers=1))
+    try:
+        executor.get_pool()
+        assert registered == [executor.shutdown]
+    finally:
+        executor.shutdown()
+    assert not registered
+
+
+def test_wait_cancelled():
+    """
+    Waiting on a cancelled task should raise a PuzzleException.
+    """
+    executor = BoardExecutor(MockApp(workers=0))
+    future = Future()
+    future.cancel()
+    with pytest.raises(PuzzleException) as exception:
+        executor.wait(future)
+    assert exception.value.get_message() == "Processing of the puzzle board was cancelled."
+
+
+def test_generate_board():
+    """
+    Generated boards should be reproducible given the seed, with the solution they were
+    generated from.
+    """
+    board, solution, unique = generate_board(3, 0.3, 1234)
+    assert generate_board(3, 0.3, 1234) == (board, solution, unique)
+    assert unique
+    assert sum(value is None for row in board for value in row) == 24
+    assert all(value in (None, solution[y][x])
+               for y, row in enumerate(board) for x, value in enumerate(row))
+
+
+def test_solve_board():
+    """
+    Solving a generated board should give a complete board, keeping all of its values.
+    """
+    board, _, _ = generate_board(2, 0.5, 1234)
+    solved = solve_board(2, [row[:] for row in board])
+    assert all(sorted(row) == [1, 2, 3, 4] for row in solved)
+    assert all(value in (None, solved[y][x])
+               for y, row in enumerate(board) for x, value in enumerate(row))
@@ -0,0 +1,72 @@
+"""
+Unit tests for the puzzle board generator.
+"""
+import random
+from backend.engine.board_validator import BoardValidator
+from backend.engine.generator import generate, solved_board
+from backend.engine.solver import BitmaskSolver
+
+
+def count_empty(board):
+    """Helper to count the empty pieces of a board"""
+    return sum(value is None for row in board for value in row)
+
+
+def test_solved_board():
+    """
+    Solved boards should be complete, for every size.
+    """
+    for size in range(2, 6):
+        board = solved_board(size, random.Random(size))
+        assert BoardValidator(size, board).is_complete()
+
+
+def test_solved_board_random():
+    """
+    Solved boards should be reproducible with the same random generator, and differ otherwise.
+    """
+    assert solved_board(3, random.Random(1)) == solved_board(3, random.Random(1))
+    assert solved_board(3, random.Random(1)) != solved_board(3, random.Random(2))
+
+
+def test_generate_difficulty():
+    """
+    The share of empty pieces on generated boards should match the difficulty, and
+    the board should keep the values of the solution.
+    """
+    for size in range(2, 6):
+        for difficulty in (0.01, 0.5, 0.99):
+            generated = generate(size, difficulty, random.Random(0))
+            assert count_empty(generated.board) == int(difficulty * size ** 4)
+            assert BoardValidator(size, generated.solution).is_complete()
+            assert all(value in (None, generated.solution[y][x])
+                       for y, row in enumerate(generated.board) for x, value in enumerate(row))
+
+
+def test_generate_unique():
+    """
+    Boards reported as unique should have a unique solution.
+    """
+    generated = generate(3, 0.55, random.Random(0), time_budget=5)
+    assert generated.unique
+    assert BitmaskSolver().has_unique_solution(3, generated.board)
+    assert BitmaskSolver().solve(3, generated.board) == generated.solution
+
+
+def test_generate_without_budget():
+    """
+    Without a budget for uniqueness checks, pieces beyond the ones that can be removed
+    without any checks are removed at random.
+    """
+    generated = generate(3, 0.9, random.Random(0), time_budget=0)
+    assert count_empty(generated.board) == 72
+    assert not generated.unique
+
+
+def test_generate_no_empty_pieces():
+    """
+    Boards with a difficulty too low to remove any piece are the solution itself.
+    """
+    generated = generate(2, 0.01, random.Random(0))
+    assert generated.board == generated.solution
+    assert generated.unique
@@ -1,70 +1,186 @@
 """
-Unit tests for the Google Auth class.
+Unit tests for the Google Auth class, run against a local stub of the Google API.
 """
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
 import requests
 from backend.google_auth import GoogleAuth
 
+TOKEN_INFO = {
+    "issued_to": "407408718192.apps.googleusercontent.com",
+    "audience": "407408718192.apps.googleusercontent.com",
+    "user_id": "103207743267402488580",
+    "scope": "https://www.googleapis.com/auth/userinfo.email "
+             "https://www.googleapis.com/auth/userinfo.profile openid",
+    "expires_in": 3590,
+    "email": "mmf2171@columbia.edu",
+    "verified_email": True,
+    "access_type": "offline"
+}
 
-class MockResponse:
+USER_INFO = {
+    "email": "janedoe@columbia.edu",
+    "verified_email": True,
+    "name": "Jane Doe",
+    "given_name": "Jane",
+    "family_name": "Doe",
+    "picture": "https://lh3.googleusercontent.com/a-/AOh14Gh2my8WQ"
+               "qJudGC0Ft2A1Q-jrnVtxYTyrQkrIj6LNVU=s91-c",
+    "locale": "en",
+    "hd": "columbia.edu"
+}
+
+
+class StubGoogleHandler(BaseHTTPRequestHandler):
     """
-    Mock the response from API
+    Answers requests with the responses queued on the server (status, body and delay),
+    and records each request made.
     """
-    def __init__(self, json_data, status_code):
-        self.json_data = json_data
-        self.status_code = status_code
+    protocol_version = 'HTTP/1.1'  # keep connections alive
 
-    def json(self):
+    def do_GET(self):  # pylint: disable=invalid-name
         """
-        Mock return json data
+        Handle a GET request with the next queued response.
         """
-        return self.json_data
+        self.server.requests.append({
+            'path': urlparse(self.path).path,
+            'query': parse_qs(urlparse(self.path).query),
+            'authorization': self.headers.get('Authorization'),
+            'client': self.client_address
+        })
+        status, body, delay = self.server.responses.pop(0)
+        time.sleep(delay)
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        """Keep the test output quiet"""
+
+
+@pytest.fixture
+def stub_server():
+    """
+    Run a stub of the Google API on a local port.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGoogleHandler)
+    server.daemon_threads = True
+    server.requests = []
+    server.responses = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def stub_auth(server, **kwargs):
+    """Helper to create a GoogleAuth pointed at the stub server"""
+    return GoogleAuth(token_info_url=f'{server.url}/tokeninfo',
+                      user_info_url=f'{server.url}/userinfo', **kwargs)
 
 
-def test_validate_token(monkeypatch):
+def test_validate_token(stub_server):
     """
     Validation of token should return json containing token information.
     """
-    json = {
-        "issued_to": "407408718192.apps.googleusercontent.com",
-        "audience": "407408718192.apps.googleusercontent.com",
-        "user_id": "103207743267402488580",
-        "scope": "https://www.googleapis.com/auth/userinfo.email "
-                 "https://www.googleapis.com/auth/userinfo.profile openid",
-        "expires_in": 3590,
-        "email": "mmf2171@columbia.edu",
-        "verified_email": True,
-        "access_type": "offline"
-    }
+    stub_server.responses.append((200, TOKEN_INFO, 0))
+    result = stub_auth(stub_server).validate_token("A fake token")
 
-    def mock_response(*args, **kwargs):
-        return MockResponse(json_data=json, status_code=200)
+    assert result == TOKEN_INFO
+    assert stub_server.requests[0]['path'] == '/tokeninfo'
+    assert stub_server.requests[0]['query'] == {'access_token': ['A fake token']}
 
-    monkeypatch.setattr(requests, "get", mock_response)
-    google_auth = GoogleAuth()
-    result = google_auth.validate_token("A fake token")
-    assert json == result
 
+def test_validate_token_rejected(stub_server):
+    """
+    Rejections of a token (client errors) should be returned without retrying.
+    """
+    rejection = {"error": "invalid_token", "error_description": "Invalid Value"}
+    stub_server.responses.append((400, rejection, 0))
+
+    assert stub_auth(stub_server).validate_token("A fake token") == rejection
+    assert len(stub_server.requests) == 1
 
-def test_get_user_information(monkeypatch):
+
+def test_get_user_information(stub_server):
     """
     Retrieval of user information should return json containing token information.
     """
-    json = {
-        "email": "janedoe@columbia.edu",
-        "verified_email": True,
-        "name": "Jane Doe",
-        "given_name": "Jane",
-        "family_name": "Doe",
-        "picture": "https://lh3.googleusercontent.com/a-/AOh14Gh2my8WQ"
-                   "qJudGC0Ft2A1Q-jrnVtxYTyrQkrIj6LNVU=s91-c",
-        "locale": "en",
-        "hd": "columbia.edu"
-    }
-
-    def mock_response(*args, **kwargs):
-        return MockResponse(json_data=json, status_code=200)
-
-    monkeypatch.setattr(requests, "get", mock_response)
-    google_auth = GoogleAuth()
-    result = google_auth.get_user_information("A fake token")
-    assert json == result
+    stub_server.responses.append((200, USER_INFO, 0))
+    result = stub_auth(stub_server).get_user_information("A fake token")
+
+    assert result == USER_INFO
+    assert stub_server.requests[0]['path'] == '/userinfo'
+    assert stub_server.requests[0]['authorization'] == 'Bearer A fake token'
+
+
+def test_connection_reused(stub_server):
+    """
+    Requests should reuse the same connection to the API.
+    """
+    stub_server.responses.extend([(200, TOKEN_INFO, 0), (200, USER_INFO, 0), (200, TOKEN_INFO, 0)])
+    google_auth = stub_auth(stub_server)
+    google_auth.validate_token("A fake token")
+    google_auth.get_user_information("A fake token")
+    google_auth.validate_token("Another fake token")
+
+    assert len({request['client'] for request in stub_server.requests}) == 1
+
+
+def test_retry_server_error(stub_server):
+    """
+    Server errors should be retried.
+    """
+    stub_server.responses.extend([(503, {}, 0), (200, TOKEN_INFO, 0)])
+    result = stub_auth(stub_server, backoff_factor=0).validate_token("A fake token")
+
+    assert result == TOKEN_INFO
+    assert len(stub_server.requests) == 2
+
+
+def test_retries_exhausted(stub_server):
+    """
+    Once the retries are exhausted, the error should be raised.
+    """
+    stub_server.responses.extend([(503, {}, 0)] * 2)
+    with pytest.raises(requests.exceptions.RequestException):
+        stub_auth(stub_server, retries=1, backoff_factor=0).validate_token("A fake token")
+    assert len(stub_server.requests) == 2
+
+
+def test_read_timeout(stub_server):
+    """
+    Requests should not wait on the API for longer than the read timeout.
+    """
+    stub_server.responses.append((200, TOKEN_INFO, 1))
+    start = time.monotonic()
+    with pytest.raises(requests.exceptions.RequestException):
+        stub_auth(stub_server, read_timeout=0.1, retries=0).validate_token("A fake token")
+    assert time.monotonic() - start < 1
+
+
+def test_from_config():
+    """
+    The pool size, timeouts and retries should be taken from the configuration.
+    """
+    google_auth = GoogleAuth.from_config({
+        'GOOGLE_AUTH_POOL_SIZE': 4,
+        'GOOGLE_AUTH_CONNECT_TIMEOUT': 1,
+        'GOOGLE_AUTH_READ_TIMEOUT': 2,
+        'GOOGLE_AUTH_RETRIES': 3,
+        'GOOGLE_AUTH_BACKOFF_FACTOR': 0.5
+    })
+    adapter = google_auth.session.get_adapter(GoogleAuth.TOKEN_INFO)
+    assert google_auth.timeout == (1, 2)
+    assert adapter.max_retries.total == 3
+    assert adapter.max_retries.backoff_factor == 0.5
+    assert adapter._pool_maxsize == 4  # pylint: disable=protected-access
@@ -49,7 +49,7 @@ def test_get_leaderboard_no_leaders(monkeypatch, user1):
         leaderboard_resource.parser = MockParser()
         result = leaderboard_resource.get()
 
-    expected = {'message': 'No users have completed puzzles.', 'puzzles': []}
+    expected = {'players': []}
     assert result == expected
 
 
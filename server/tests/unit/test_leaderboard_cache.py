@@ -0,0 +1,142 @@
+"""
+Unit tests for the cache of the top of the leaderboard.
+"""
+from backend.leaderboard_cache import LeaderboardCache, LeaderboardEntry
+
+
+class MockApp:
+    """
+    Mock app, holding only the configuration of the cache.
+    """
+    def __init__(self, size=3, max_age=300):
+        self.config = {'LEADERBOARD_CACHE_SIZE': size, 'LEADERBOARD_CACHE_MAX_AGE': max_age}
+
+
+class MockClock:
+    """
+    Clock that only moves when told to.
+    """
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def entry(user_id, score):
+    """
+    Build a leaderboard entry for a user.
+    """
+    return LeaderboardEntry(user_id, f'first{user_id}', f'last{user_id}', score)
+
+
+def loaded_cache(entries, **kwargs):
+    """
+    Build a cache loaded with the given entries.
+    """
+    cache = LeaderboardCache(MockApp(**kwargs))
+    cache.load(entries, cache.start_load())
+    return cache
+
+
+def test_cache_hit_and_miss():
+    """
+    Requests for up to K entries should be served once the cache is loaded; others are misses.
+    """
+    cache = LeaderboardCache(MockApp(size=3))
+    assert cache.get(2) is None
+    cache.load([entry(1, 10), entry(2, 30)], cache.start_load())
+    assert cache.get(2) == [entry(2, 30), entry(1, 10)]
+    assert cache.get(3) == [entry(2, 30), entry(1, 10)]
+    assert cache.get(4) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate'], stats['size']) == (2, 2, 0.5, 2)
+
+
+def test_cache_keeps_top_k():
+    """
+    Loaded entries should be sorted by score, then with the highest user id first, and
+    only the top K entries should be kept.
+    """
+    cache = loaded_cache([entry(1, 10), entry(2, 20), entry(3, 10), entry(4, 5)], size=3)
+    assert cache.get(3) == [entry(2, 20), entry(3, 10), entry(1, 10)]
+
+
+def test_cache_update():
+    """
+    New scores should be written through: moving cached users up, adding users that now
+    rank in the top K, and ignoring users that do not.
+    """
+    cache = loaded_cache([entry(1, 10), entry(2, 20), entry(3, 30)], size=3)
+    cache.update([entry(1, 40), entry(4, 15), entry(5, 5)])
+    assert cache.get(3) == [entry(1, 40), entry(3, 30), entry(2, 20)]
+    cache.update([entry(5, 20)])
+    assert cache.get(3) == [entry(1, 40), entry(3, 30), entry(5, 20)]
+    assert cache.stats()['updates'] == 2
+
+
+def test_cache_update_not_full():
+    """
+    While fewer than K users have a score, every user with a score should be added.
+    """
+    cache = loaded_cache([], size=3)
+    assert cache.get(3) == []
+    cache.update([entry(1, 0), entry(2, 5)])
+    assert cache.get(3) == [entry(2, 5)]
+
+
+def test_cache_update_decreased_score():
+    """
+    A decreased score should drop the cache, since other users may now rank in the top K.
+    """
+    cache = loaded_cache([entry(1, 10), entry(2, 20)], size=2)
+    cache.update([entry(2, 5)])
+    assert cache.get(2) is None
+    assert cache.stats()['size'] == 0
+
+
+def test_cache_load_after_update():
+    """
+    A load started before scores were written through should be ignored, as the entries
+    it read may not have these scores.
+    """
+    cache = loaded_cache([entry(1, 10)])
+    token = cache.start_load()
+    cache.update([entry(1, 20)])
+    cache.load([entry(1, 10)], token)
+    assert cache.get(1) == [entry(1, 20)]
+
+    cache.invalidate()
+    token = cache.start_load()
+    cache.update([entry(1, 30)])
+    cache.load([entry(1, 20)], token)
+    assert cache.get(1) is None
+
+
+def test_cache_max_age():
+    """
+    The cache should be loaded again once it is older than the maximum age, however recently
+    it was updated; its staleness should be reported.
+    """
+    clock = MockClock()
+    cache = LeaderboardCache(MockApp(max_age=300), clock=clock)
+    cache.load([entry(1, 10)], cache.start_load())
+    clock.now = 200
+    cache.update([entry(1, 20)])
+    clock.now = 250
+    assert cache.get(1) == [entry(1, 20)]
+    stats = cache.stats()
+    assert (stats['age'], stats['since_update']) == (250, 50)
+    clock.now = 300
+    assert cache.get(1) is None
+
+
+def test_cache_disabled():
+    """
+    Nothing should be cached with a cache size of 0.
+    """
+    cache = loaded_cache([entry(1, 10)], size=0)
+    cache.update([entry(2, 10)])
+    assert cache.get(1) is None
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'hit_rate': None, 'updates': 0,
+                             'size': 0, 'age': None, 'since_update': None}
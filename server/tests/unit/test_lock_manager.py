@@ -0,0 +1,143 @@
+"""
+Unit tests for the table of locks on puzzle pieces.
+"""
+from backend import socketio
+from backend.lock_manager import LockManager, LockSweeper
+
+
+class MockApp:
+    """
+    Mock app, holding only the configuration of the lock manager.
+    """
+    def __init__(self, lease=60):
+        self.config = {'PIECE_LOCK_LEASE': lease}
+
+
+class MockClock:
+    """
+    Clock that only moves when told to.
+    """
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_acquire_and_release():
+    """
+    A piece can only be locked by one connection at a time, and only the holder of the
+    lock can release it.
+    """
+    locks = LockManager(MockApp())
+    assert locks.acquire(1, 2, 3, 'first', user_id=7, player={'id': 7})
+    assert locks.acquire(1, 2, 3, 'first')  # renews the lease
+    assert not locks.acquire(1, 2, 3, 'second')
+    assert locks.acquire(1, 3, 2, 'second')
+    assert locks.acquire(2, 2, 3, 'second')
+
+    assert not locks.release(1, 2, 3, 'second')
+    assert locks.get_lock(1, 2, 3).sid == 'first'
+    assert locks.release(1, 2, 3, 'first')
+    assert locks.get_lock(1, 2, 3) is None
+    assert not locks.release(1, 2, 3, 'first')
+    assert locks.acquire(1, 2, 3, 'second')
+
+
+def test_lease_expiry():
+    """
+    Locks should expire once their lease is over, unless renewed.
+    """
+    clock = MockClock()
+    locks = LockManager(MockApp(lease=30), clock=clock)
+    locks.acquire(1, 0, 0, 'first')
+    locks.acquire(1, 0, 1, 'first')
+    clock.now = 20
+    locks.acquire(1, 0, 1, 'first')
+    clock.now = 30
+    assert not locks.acquire(1, 0, 1, 'second')
+    assert locks.acquire(1, 0, 0, 'second')
+    assert sorted(locks.get_puzzle_locks(1)) == [(0, 0), (0, 1)]
+    clock.now = 50
+    assert list(locks.get_puzzle_locks(1)) == [(0, 0)]
+    assert locks.held == {'second': {(1, 0, 0)}}
+
+
+def test_release_all():
+    """
+    All of the locks of a connection, or only its locks on one puzzle, can be released at once.
+    """
+    locks = LockManager(MockApp())
+    locks.acquire(1, 0, 0, 'first')
+    locks.acquire(1, 1, 1, 'first')
+    locks.acquire(2, 0, 0, 'first')
+    locks.acquire(1, 2, 2, 'second')
+    assert locks.release_all('first', puzzle_id=2) == [(2, 0, 0)]
+    assert locks.release_all('first') == [(1, 0, 0), (1, 1, 1)]
+    assert locks.release_all('first') == []
+    assert list(locks.get_puzzle_locks(1)) == [(2, 2)]
+    assert locks.get_puzzle_locks(2) == {}
+
+
+def test_can_move():
+    """
+    Moves on a locked piece should only be allowed for the connection or user holding it.
+    """
+    locks = LockManager(MockApp())
+    locks.acquire(1, 0, 0, 'first', user_id=7)
+    assert locks.can_move(1, 0, 0, sid='first')
+    assert locks.can_move(1, 0, 0, user_id=7)
+    assert not locks.can_move(1, 0, 0, sid='second', user_id=8)
+    assert not locks.can_move(1, 0, 0)
+    assert locks.can_move(1, 0, 1, sid='second')
+
+
+def test_expired_locks_announced():
+    """
+    The expired locks should be passed to the on_expired callback once removed, whether they
+    are found when a piece is looked at or by reap_expired.
+    """
+    clock = MockClock()
+    expired = []
+    locks = LockManager(MockApp(lease=30), clock=clock,
+                        on_expired=lambda *key: expired.append(key))
+    locks.acquire(1, 0, 0, 'first')
+    locks.acquire(1, 0, 1, 'first')
+    locks.acquire(2, 0, 0, 'first')
+    clock.now = 30
+    assert locks.can_move(1, 0, 0, sid='second')
+    assert expired == [(1, 0, 0)]
+    assert locks.reap_expired() == [(1, 0, 1), (2, 0, 0)]
+    assert expired == [(1, 0, 0), (1, 0, 1), (2, 0, 0)]
+    assert not locks.has_locks()
+    assert locks.reap_expired() == []
+    assert len(expired) == 3
+
+
+def test_sweeper(monkeypatch):
+    """
+    Only one background task should remove the expired locks at a time, and it should run
+    until no locks are held.
+    """
+    clock = MockClock()
+    expired = []
+    locks = LockManager(MockApp(lease=30), clock=clock,
+                        on_expired=lambda *key: expired.append(key))
+    started = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda task: started.append(task))
+
+    def mock_sleep(seconds):
+        clock.now += 20
+
+    monkeypatch.setattr(socketio, 'sleep', mock_sleep)
+    sweeper = LockSweeper(locks)
+    locks.acquire(1, 0, 0, 'first')
+    sweeper.notify()
+    sweeper.notify()
+    assert len(started) == 1
+
+    started[0]()
+    assert expired == [(1, 0, 0)]
+    assert clock.now == 40
+    sweeper.notify()
+    assert len(started) == 2
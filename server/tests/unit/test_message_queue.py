@@ -0,0 +1,87 @@
+"""
+Unit tests for the message queue shared by the server processes.
+"""
+import os
+import socket
+import threading
+import time
+import pytest
+from backend.message_queue import MessageBroker, UnixSocketManager, socketio_options
+
+
+@pytest.fixture
+def broker(tmp_path):
+    """
+    Run a message broker on a UNIX socket.
+    """
+    broker = MessageBroker(str(tmp_path / 'broker.sock'))
+    thread = threading.Thread(target=broker.serve_forever, daemon=True)
+    thread.start()
+    yield broker
+    broker.shutdown()
+    broker.server_close()
+    thread.join()
+
+
+def test_socketio_options():
+    """
+    UNIX socket URLs should use the broker's client manager, and other URLs the message
+    queues of Flask-SocketIO; no URL means no queue.
+    """
+    assert socketio_options('') == {}
+    assert socketio_options('redis://localhost:6379/0') == {
+        'message_queue': 'redis://localhost:6379/0', 'channel': 'flask-socketio'
+    }
+    manager = socketio_options('unix:///tmp/broker.sock')['client_manager']
+    assert isinstance(manager, UnixSocketManager)
+    assert (manager.path, manager.channel) == ('/tmp/broker.sock', 'flask-socketio')
+
+
+def test_broker_relays_to_subscribers(broker):
+    """
+    Messages published by any process should reach the subscribers of every process, on the
+    same channel only.
+    """
+    subscribers = [UnixSocketManager(broker.path, channel='puzzles') for _ in range(2)]
+    listeners = [subscriber._listen() for subscriber in subscribers]
+    received = [[], []]
+
+    def receive(index):
+        received[index].append(next(listeners[index]))
+
+    threads = [threading.Thread(target=receive, args=(index,)) for index in range(2)]
+    for thread in threads:
+        thread.start()
+    while len(broker.subscribers) < 2:
+        time.sleep(0.01)
+
+    UnixSocketManager(broker.path, channel='other')._publish({'method': 'emit', 'event': 'x'})
+    subscribers[0]._publish({'method': 'emit', 'event': 'puzzle_delta'})
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert received == [[{'method': 'emit', 'event': 'puzzle_delta'}]] * 2
+
+
+def test_broker_socket_in_use(broker):
+    """
+    A broker should not take over the socket of a broker that is still running.
+    """
+    with pytest.raises(OSError):
+        MessageBroker(broker.path)
+    assert os.path.exists(broker.path)
+
+
+def test_broker_stale_socket(tmp_path):
+    """
+    A socket file left behind by a broker that is no longer running should be replaced.
+    """
+    path = str(tmp_path / 'broker.sock')
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    broker = MessageBroker(path)
+    try:
+        assert os.path.exists(path)
+    finally:
+        broker.server_close()
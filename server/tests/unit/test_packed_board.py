@@ -0,0 +1,57 @@
+"""
+Unit tests for the packed board encoding.
+"""
+import pytest
+from backend.engine.packed_board import pack_board, unpack_board, set_packed_value, \
+    packed_length
+
+BOARD = [[2, None, 3, 1], [1, 3, None, 2], [None, 2, 1, 3], [3, 1, None, 4]]
+STATIC = [[True, False, True, True], [True, False, False, True],
+          [False, True, True, True], [True, True, False, False]]
+
+
+def test_packed_length():
+    """
+    The encoding uses one byte per piece, plus one bit per piece for static pieces.
+    """
+    assert packed_length(2) == 16 + 2
+    assert packed_length(3) == 81 + 11
+    assert packed_length(5) == 625 + 79
+
+
+def test_pack_board():
+    """
+    Values are encoded one byte per piece (0 if empty), followed by the static bitmap.
+    """
+    data = pack_board(BOARD, STATIC)
+    assert data[:16] == bytes([2, 0, 3, 1, 1, 3, 0, 2, 0, 2, 1, 3, 3, 1, 0, 4])
+    assert data[16:] == bytes([0b10011101, 0b00111110])
+
+
+def test_unpack_board():
+    """
+    Unpacking a packed board returns the original board and static pieces.
+    """
+    assert unpack_board(pack_board(BOARD, STATIC), 2) == (BOARD, STATIC)
+
+
+def test_unpack_board_wrong_size():
+    """
+    A packed board can only be unpacked with the size it was packed for.
+    """
+    with pytest.raises(ValueError):
+        unpack_board(pack_board(BOARD, STATIC), 3)
+
+
+def test_set_packed_value():
+    """
+    Setting the value of a piece only changes the value of that piece.
+    """
+    data = set_packed_value(pack_board(BOARD, STATIC), 2, 1, 0, 4)
+    board, static = unpack_board(data, 2)
+    assert board[0] == [2, 4, 3, 1]
+    assert board[1:] == BOARD[1:]
+    assert static == STATIC
+
+    board, _ = unpack_board(set_packed_value(data, 2, 1, 0, None), 2)
+    assert board == BOARD
@@ -2,12 +2,13 @@
 Unit tests for the Player class.
 """
 import pytest
+from sqlalchemy.dialects import postgresql
 from backend import app, db
 from backend.config import UnitTestingConfig
 from backend.models.puzzle_exception import PuzzleException
 from backend.models.player import PuzzlePlayer
 from backend.models.user import User
-from tests.unit.mocks import MockSession
+from tests.unit.mocks import MockSession, mock_get_puzzle
 
 app.config.from_object(UnitTestingConfig)
 
@@ -145,6 +146,27 @@ def test_find_players_for_puzzle(monkeypatch):
     assert result == []
 
 
+def test_is_player_of_puzzle_cached(monkeypatch):
+    """
+    Memberships found should be kept in the cache, and missing memberships looked up again.
+    """
+    lookups = []
+
+    def mock_find_player_puzzle(player_id, puzzle_id):
+        lookups.append((player_id, puzzle_id))
+        return PuzzlePlayer(player_id, puzzle_id) if puzzle_id == 1 else None
+
+    monkeypatch.setattr(PuzzlePlayer, 'find_player_puzzle', mock_find_player_puzzle)
+    cache = {}
+    for _ in range(2):
+        assert PuzzlePlayer.is_player_of_puzzle(5, 1, cache=cache)
+        assert not PuzzlePlayer.is_player_of_puzzle(5, 2, cache=cache)
+    assert lookups == [(5, 1), (5, 2), (5, 2)]
+
+    assert PuzzlePlayer.is_player_of_puzzle(5, 1)
+    assert lookups[-1] == (5, 1)
+
+
 def test_add_player_to_puzzle_already_too_many_players(monkeypatch):
     """
     Attempt to add a player to puzzle when there are already the maximum number of
@@ -180,7 +202,7 @@ def test_add_player_to_puzzle_player_doesnt_exist(monkeypatch):
         PuzzlePlayer.add_player_to_puzzle(1, requesting_user)
 
 
-def test_add_player_to_puzzle_ok_lower_bound(monkeypatch):
+def test_add_player_to_puzzle_ok_lower_bound(monkeypatch, mock_get_puzzle):
     """
     A valid attempt to add a player to a puzzle should be successful.
     """
@@ -201,7 +223,7 @@ def test_add_player_to_puzzle_ok_lower_bound(monkeypatch):
     assert True  # just need to make sure we can get to this point
 
 
-def test_add_player_to_puzzle_ok_upper_bound(monkeypatch):
+def test_add_player_to_puzzle_ok_upper_bound(monkeypatch, mock_get_puzzle):
     """
     A valid attempt to add a player to a puzzle should be successful.
     """
@@ -226,6 +248,39 @@ def test_add_player_to_puzzle_ok_upper_bound(monkeypatch):
     assert True  # just need to make sure we can get to this point
 
 
+def test_add_players_to_new_puzzle(monkeypatch):
+    """
+    Players of a new puzzle should be added with a single statement, without duplicates.
+    """
+    statements = []
+
+    class RecordingSession(MockSession):
+        """
+        Mock session recording the executed statements.
+        """
+        @staticmethod
+        def execute(*args, **kwargs):
+            statements.append(args[0])
+
+    monkeypatch.setattr(db, "session", RecordingSession)
+    PuzzlePlayer.add_players_to_new_puzzle(1, [5, 3, 5, 4])
+    assert len(statements) == 1
+    assert sorted(statements[0].compile(dialect=postgresql.dialect()).params.items()) == [
+        ('hidden_m0', False), ('hidden_m1', False), ('hidden_m2', False),
+        ('player_id_m0', 5), ('player_id_m1', 3), ('player_id_m2', 4),
+        ('puzzle_id_m0', 1), ('puzzle_id_m1', 1), ('puzzle_id_m2', 1)
+    ]
+
+
+def test_add_players_to_new_puzzle_too_many_players(monkeypatch):
+    """
+    Adding more than the maximum number of players (4) to a new puzzle should fail.
+    """
+    monkeypatch.setattr(db, "session", MockSession)
+    with pytest.raises(PuzzleException):
+        PuzzlePlayer.add_players_to_new_puzzle(1, [1, 2, 3, 4, 5])
+
+
 def test_get_top_players_boundary():
     """
     Attempt to get the top players, providing a limit of 0 (invalid)
@@ -2,6 +2,7 @@
 Unit tests for the Puzzle Pieces class.
 """
 import pytest
+from sqlalchemy.dialects import postgresql
 from backend import app, db
 from backend.config import UnitTestingConfig
 from backend.models.puzzle_exception import PuzzleException
@@ -159,6 +160,33 @@ def test_save(monkeypatch, puzzle_piece):
     assert True  # just want to make sure we can get here
 
 
+def test_insert_pieces(monkeypatch):
+    """
+    Test insert pieces in bulk, with database session mocked: the pieces should be inserted
+    with one multi-row statement per batch of pieces.
+    """
+    statements = []
+
+    class RecordingSession(MockSession):
+        """
+        Mock session recording the executed statements.
+        """
+        @staticmethod
+        def execute(*args, **kwargs):
+            statements.append(args[0])
+
+    monkeypatch.setattr(db, "session", RecordingSession)
+    monkeypatch.setattr(PuzzlePiece, "INSERT_BATCH_SIZE", 2)
+    pieces = [PuzzlePiece(1, x_coord, 0, x_coord or None, bool(x_coord)) for x_coord in range(5)]
+
+    PuzzlePiece.insert_pieces(pieces)
+    assert len(statements) == 3
+    rows = [param for statement in statements
+            for param in statement.compile(dialect=postgresql.dialect()).params.values()]
+    assert rows[:5] == [1, 0, 0, False, None]
+    assert len(rows) == 25
+
+
 def test_update_success(monkeypatch, puzzle_piece):
     """
     Test attempt update puzzle piece, valid change made to non-static piece.
@@ -0,0 +1,113 @@
+"""
+Unit tests for the pool of pre-generated puzzles.
+"""
+from backend import app, executor, socketio
+from backend.config import UnitTestingConfig
+from backend.models.puzzle_pool import PooledPuzzle, PoolReplenisher
+
+app.config.from_object(UnitTestingConfig)
+
+
+def test_get_bucket():
+    """
+    Difficulties should map to the index of their point value interval.
+    """
+    assert PooledPuzzle.get_bucket(0.01) == 0
+    assert PooledPuzzle.get_bucket(0.25) == 1
+    assert PooledPuzzle.get_bucket(0.74) == 2
+    assert PooledPuzzle.get_bucket(0.99) == 4
+
+
+def test_get_bucket_invalid_difficulty():
+    """
+    Difficulties outside of the intervals (or not given as floats) have no bucket.
+    """
+    assert PooledPuzzle.get_bucket(0.0) is None
+    assert PooledPuzzle.get_bucket(1.5) is None
+    assert PooledPuzzle.get_bucket('0.5') is None
+
+
+def test_draw_invalid_difficulty():
+    """
+    Puzzles with invalid difficulties are not drawn from the pool (without using the database).
+    """
+    assert PooledPuzzle.draw(difficulty=2.0, size=3) is None
+
+
+def test_generate():
+    """
+    Generated puzzles should hold a packed board and the solution for the board.
+    """
+    pooled = PooledPuzzle.generate(size=2, bucket=4)
+    assert pooled.size == 2
+    assert pooled.bucket == 4
+    assert 0.95 <= pooled.difficulty <= 0.99
+    assert len(pooled.board) == 16 + 2
+    assert sorted(pooled.solution) == sorted(list(range(1, 5)) * 4)
+
+
+def test_generate_time_budget(monkeypatch):
+    """
+    Pooled puzzles should be generated with the pool's time budget for keeping their solution
+    unique, rather than the budget of the request path.
+    """
+    budgets = []
+    run = executor.run
+
+    def mock_run(task, *args):
+        budgets.append(args[-1])
+        return run(task, *args)
+
+    monkeypatch.setattr(executor, 'run', mock_run)
+    monkeypatch.setitem(app.config, 'PUZZLE_POOL_GENERATION_BUDGET', 2.5)
+    PooledPuzzle.generate(size=2, bucket=0)
+    PooledPuzzle.generate(size=2, bucket=0, time_budget=0.5)
+    assert budgets == [2.5, 0.5]
+
+
+def test_notify_without_low_water(monkeypatch):
+    """
+    The pool should not be replenished if no low-water mark is configured.
+    """
+    started = []
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: started.append(args))
+
+    PoolReplenisher().notify()
+    assert not started
+
+
+def test_notify_starts_single_task(monkeypatch):
+    """
+    Only one background task should replenish the pool at a time.
+    """
+    started = []
+    monkeypatch.setitem(app.config, 'PUZZLE_POOL_LOW_WATER', 2)
+    monkeypatch.setattr(socketio, 'start_background_task', lambda *args: started.append(args))
+
+    replenisher = PoolReplenisher()
+    replenisher.notify()
+    replenisher.notify()
+    assert len(started) == 1
+    assert replenisher.requested
+
+
+def test_run_replenishes_until_no_requests(monkeypatch):
+    """
+    The background task should replenish the pool again if requested while running,
+    and release the lock once it is done.
+    """
+    replenisher = PoolReplenisher()
+    calls = []
+
+    def mock_replenish():
+        calls.append(1)
+        if len(calls) == 1:
+            replenisher.requested = True
+
+    monkeypatch.setattr(PooledPuzzle, 'replenish', mock_replenish)
+    replenisher.requested = True
+    replenisher.lock.acquire()
+    replenisher.run()
+
+    assert len(calls) == 2
+    assert not replenisher.lock.locked()
@@ -2,12 +2,18 @@
 Unit tests for web socket functionality.
 """
 import pytest
-from backend import app, socketio
+from backend import app, lock_manager, socketio
+from backend.config import UnitTestingConfig
+from backend.models.puzzle_exception import PuzzleConflict, PuzzleException
+from backend.models.puzzle_move import PuzzleMove
+from backend.models.sudoku_puzzle import Puzzle
 from backend.models.user import User
 from backend.google_auth import GoogleAuth
 from tests.unit.mocks import verification_token, mock_find_by_g_id,\
     mock_no_puzzles_for_player, mock_single_puzzles_for_player,  mock_get_puzzle
 
+app.config.from_object(UnitTestingConfig)
+
 
 @pytest.fixture
 def flask_client():
@@ -15,6 +21,13 @@ def flask_client():
     return app.test_client()
 
 
+@pytest.fixture(autouse=True)
+def clear_locks():
+    """Release the piece locks taken by the websockets of each test"""
+    yield
+    lock_manager.clear()
+
+
 def test_socketio_cannot_connect_without_credentials(flask_client):
     """
     Test that it is not possible to connect without credentials.
@@ -39,7 +52,8 @@ def test_socketio_cannot_connect_with_invalid_credentials(monkeypatch, flask_cli
     assert not client.is_connected()
 
 
-def test_socketio_can_connect_with_valid_credentials(flask_client, verification_token):
+def test_socketio_can_connect_with_valid_credentials(flask_client, verification_token,
+                                                     mock_find_by_g_id):
     """
     Test that it is not possible to connect without credentials.
     """
@@ -49,36 +63,31 @@ def test_socketio_can_connect_with_valid_credentials(flask_client, verification_
     assert client.get_received() == []
 
 
-def test_socketio_join_missing_token(flask_client, verification_token):
+def test_socketio_join_reuses_connection_identity(monkeypatch, flask_client,
+                                                  mock_single_puzzles_for_player):
     """
-    Test attempt to join room, missing token.
+    Test that the token is validated and the user looked up once, when connecting, rather
+    than again for every room joined; the token no longer has to be sent to join a room.
     """
-    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
-    client.emit('join', {'puzzle_id': 1})
-    assert client.get_received() == []
+    calls = []
 
+    def mock_verify_token(*args, **kwargs):
+        calls.append('validate_token')
+        return {"user_id": "103207743267402488580", "expires_in": 3590}
 
-def test_socketio_join_missing_puzzle(flask_client, verification_token):
-    """
-    Test attempt to join room, missing room id (i.e., puzzle id).
-    """
-    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
-    client.emit('join', {'token': 'X'})
-    assert client.get_received() == []
+    def mock_find_user(*args, **kwargs):
+        calls.append('find_by_g_id')
+        return User(g_id="103207743267402488580", first_name='Jane', last_name='Doe',
+                    email='janedoe@columbia.edu')
 
+    monkeypatch.setattr(GoogleAuth, "validate_token", mock_verify_token)
+    monkeypatch.setattr(User, 'find_by_g_id', mock_find_user)
 
-def test_socketio_join_bad_token(monkeypatch, flask_client, verification_token):
-    """
-    Test attempt to join room, but uses a bad token.
-    """
     client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
-
-    monkeypatch.setattr(GoogleAuth, "validate_token",
-                        lambda x, y: {"error": "some error",
-                                   "error_description": 'A bad error occurred'})
-
+    client.emit('join', {'puzzle_id': 1})
     client.emit('join', {'token': 'X', 'puzzle_id': 1})
-    assert client.get_received() == []
+    assert calls == ['validate_token', 'find_by_g_id']
+    assert [event['name'] for event in client.get_received()] == ['player_joined'] * 2
 
 
 def test_socketio_join_user_doesnt_exist(monkeypatch, flask_client, verification_token):
@@ -93,6 +102,29 @@ def test_socketio_join_user_doesnt_exist(monkeypatch, flask_client, verification
     assert client.get_received() == []
 
 
+def test_socketio_join_user_registered_after_connecting(monkeypatch, flask_client,
+                                                        verification_token,
+                                                        mock_single_puzzles_for_player):
+    """
+    Test that a user who registers after opening the connection can join rooms, and is then
+    kept for the connection rather than looked up for every event.
+    """
+    users = [None, User(g_id="103207743267402488580", first_name='Jane', last_name='Doe',
+                        email='janedoe@columbia.edu')]
+    lookups = []
+
+    def mock_find_user(*args, **kwargs):
+        lookups.append(args)
+        return users[min(len(lookups), len(users)) - 1]
+
+    monkeypatch.setattr(User, 'find_by_g_id', mock_find_user)
+
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'puzzle_id': 1})
+    client.emit('join', {'puzzle_id': 1})
+    assert len(lookups) == 2
+    assert [event['name'] for event in client.get_received()] == ['player_joined'] * 2
+
 def test_socketio_join_puzzle_not_associated(flask_client, verification_token, mock_find_by_g_id,
                                              mock_no_puzzles_for_player):
     """
@@ -104,6 +136,17 @@ def test_socketio_join_puzzle_not_associated(flask_client, verification_token, m
     assert client.get_received() == []
 
 
+def test_socketio_join_invalid_puzzle_id(flask_client, verification_token, mock_find_by_g_id,
+                                         mock_single_puzzles_for_player):
+    """
+    Test that attempts to join a room with an invalid puzzle id are ignored.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    assert client.emit('join', {'puzzle_id': 'abc'}, callback=True) is False
+    assert client.emit('join', {'puzzle_id': None}, callback=True) is False
+    assert client.get_received() == []
+
+
 def test_socketio_join_puzzle(flask_client, verification_token, mock_find_by_g_id,
                                              mock_single_puzzles_for_player):
     """
@@ -117,7 +160,7 @@ def test_socketio_join_puzzle(flask_client, verification_token, mock_find_by_g_i
     ]
 
 
-def test_socketio_disconnect(flask_client, verification_token):
+def test_socketio_disconnect(flask_client, verification_token, mock_find_by_g_id):
     """
     Test attempt disconnect websocket should be successful.
     """
@@ -126,34 +169,166 @@ def test_socketio_disconnect(flask_client, verification_token):
     assert not client.is_connected()
 
 
-def test_socketio_handle_move_missing_puzzle_id(flask_client, verification_token):
+@pytest.fixture
+def mock_update_piece(monkeypatch):
+    """
+    Mock the update_piece() method, returning a puzzle at version 7 for valid moves and
+    recording the moves made; moves made against a version other than 6 conflict.
+    """
+    moves = []
+
+    def mock_update_piece(puzzle_id, x_coord, y_coord, value, expected_version=None,
+                          player_id=None):
+        if value == 0:
+            raise PuzzleException('Invalid value.')
+        if expected_version not in (None, 6):
+            raise PuzzleConflict('Conflict.', 6, x_coord, y_coord, 4)
+        moves.append((puzzle_id, x_coord, y_coord, value))
+        puzzle = Puzzle(difficulty_level=0.5, size=2)
+        puzzle.version = 7
+        return puzzle
+
+    monkeypatch.setattr(Puzzle, 'update_piece', mock_update_piece)
+    return moves
+
+
+def test_socketio_handle_move_missing_coordinates(flask_client, verification_token,
+                                                  mock_find_by_g_id, mock_update_piece):
     """
-    Test re-emit move alert to members of a room; current socket is not part of
-    the room.
+    Test making a move without the coordinates of the piece; the move should be rejected.
     """
     client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
-    client.emit('move', {'x_coordinate': 1, 'y_coordinate': 5})
-    assert client.get_received() == []
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1}, callback=True)
+    assert ack == {'error': 'A move needs a puzzle_id, x_coordinate, y_coordinate and value.'}
+    assert mock_update_piece == []
 
 
-def test_socketio_handle_move_not_in_room(flask_client, verification_token, mock_get_puzzle):
+def test_socketio_handle_move_not_in_room(flask_client, verification_token, mock_find_by_g_id,
+                                          mock_update_piece):
     """
-    Test re-emit move alert to members of a room; current socket is not part of
-    the room.
+    Test making a move on a puzzle whose room the current socket has not joined; the move
+    should be rejected.
     """
     client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
-    client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 5})
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': 2}, callback=True)
+    assert ack == {'error': 'Join the room of puzzle 1 before making moves on it.'}
+    assert mock_update_piece == []
     assert client.get_received() == []
 
 
 def test_socketio_handle_move_in_room(flask_client, verification_token, mock_find_by_g_id,
-                                             mock_single_puzzles_for_player, mock_get_puzzle):
+                                      mock_single_puzzles_for_player, mock_update_piece):
+    """
+    Test making a move on a puzzle in the current socket's room; the move should be saved,
+    acknowledged with the new version of the puzzle and announced to the room.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'token': 'X', 'puzzle_id': 1})
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': 2}, callback=True)
+    assert ack == {'version': 7, 'completed': False}
+    assert mock_update_piece == [(1, 1, 0, 2)]
+    assert client.get_received() == [
+        {'name': 'player_joined', 'args': [{'msg': 'Player joined room 1'}], 'namespace': '/'},
+        {'name': 'puzzle_delta', 'args': [
+            {'puzzle_id': 1, 'version': 7, 'completed': False,
+             'pieces': [{'x_coordinate': 1, 'y_coordinate': 0, 'value': 2}]}
+        ], 'namespace': '/'}
+    ]
+
+
+def test_socketio_handle_move_delete(flask_client, verification_token, mock_find_by_g_id,
+                                     mock_single_puzzles_for_player, mock_update_piece):
+    """
+    Test making a move without a value, which deletes the value of the piece.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'token': 'X', 'puzzle_id': 1})
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': None}, callback=True)
+    assert ack == {'version': 7, 'completed': False}
+    assert mock_update_piece == [(1, 1, 0, None)]
+
+
+def test_socketio_handle_move_invalid(flask_client, verification_token, mock_find_by_g_id,
+                                      mock_single_puzzles_for_player, mock_update_piece):
     """
-    Test re-emit move alert to members of a room; current socket is part of room.
+    Test making a move that the puzzle rejects; the reason should be acknowledged, and
+    nothing announced to the room.
     """
     client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
     client.emit('join', {'token': 'X', 'puzzle_id': 1})
-    client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 5})
+    client.get_received()
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': 0}, callback=True)
+    assert ack == {'error': 'Invalid value.'}
+    assert client.get_received() == []
+
+
+def test_socketio_handle_move_conflict(flask_client, verification_token, mock_find_by_g_id,
+                                       mock_single_puzzles_for_player, mock_update_piece):
+    """
+    Test making a move against an older version of the puzzle; the current version and
+    piece should be acknowledged, and nothing announced to the room.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'puzzle_id': 1})
+    client.get_received()
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': 2, 'version': 5}, callback=True)
+    assert ack == {'error': 'Conflict.', 'version': 6,
+                   'piece': {'x_coordinate': 1, 'y_coordinate': 0, 'value': 4}}
+    assert client.get_received() == []
+
+    ack = client.emit('move', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 0,
+                               'value': 2, 'version': 6}, callback=True)
+    assert ack == {'version': 7, 'completed': False}
+    assert mock_update_piece == [(1, 1, 0, 2)]
+
+
+def test_socketio_handle_resync_missing_puzzle_id(flask_client, verification_token,
+                                                  mock_find_by_g_id):
+    """
+    Test request for the whole puzzle, missing the puzzle id.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('resync', {'version': 3})
+    assert client.get_received() == []
+
+
+def test_socketio_handle_resync_not_in_room(flask_client, verification_token, mock_find_by_g_id,
+                                            mock_get_puzzle):
+    """
+    Test request for the whole puzzle; current socket is not part of the puzzle's room, so
+    the puzzle is not sent.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('resync', {'puzzle_id': 1})
+    assert client.get_received() == []
+
+
+def test_socketio_handle_resync_invalid(flask_client, verification_token, mock_find_by_g_id,
+                                        mock_single_puzzles_for_player, mock_get_puzzle):
+    """
+    Test requests to catch up with an invalid puzzle id or version; nothing is sent.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'puzzle_id': 1})
+    client.get_received()
+    client.emit('resync', {'puzzle_id': [1]})
+    client.emit('resync', {'puzzle_id': 1, 'version': 'latest'})
+    assert client.get_received() == []
+
+
+def test_socketio_handle_resync_in_room(flask_client, verification_token, mock_find_by_g_id,
+                                        mock_single_puzzles_for_player, mock_get_puzzle):
+    """
+    Test request for the whole puzzle; current socket is part of room, and gets the puzzle.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'token': 'X', 'puzzle_id': 1})
+    client.emit('resync', {'puzzle_id': 1})
     recvd = client.get_received()
     assert recvd == [
         {'name': 'player_joined', 'args': [{'msg': 'Player joined room 1'}], 'namespace': '/'},
@@ -163,6 +338,7 @@ def test_socketio_handle_move_in_room(flask_client, verification_token, mock_fin
                 'completed': False,
                 'difficulty': 0.5,
                 'point_value': 90,
+                'version': 0,
                 'pieces': [
                     {'x_coordinate': 0, 'y_coordinate': 1, 'static_piece': False, 'value': None},
                     {'x_coordinate': 1, 'y_coordinate': 1, 'static_piece': True, 'value': 3}
@@ -171,6 +347,56 @@ def test_socketio_handle_move_in_room(flask_client, verification_token, mock_fin
         ], 'namespace': '/'}]
 
 
+def test_socketio_handle_resync_since_version(monkeypatch, flask_client, verification_token,
+                                              mock_find_by_g_id, mock_single_puzzles_for_player,
+                                              mock_get_puzzle):
+    """
+    Test request for the moves made since a version; the journaled moves are sent as deltas.
+    If some of the moves are missing from the journal, the pieces changed since the board at
+    that version (rebuilt from its snapshot) are sent as one delta, or the whole puzzle if that
+    board cannot be rebuilt.
+    """
+    journal = [PuzzleMove(1, version, 0, 1, None, version) for version in (1, 2)]
+    monkeypatch.setattr(PuzzleMove, 'find_moves_since', lambda puzzle_id, version, limit=None:
+                        [move for move in journal if move.version > version][:limit])
+    get_puzzle = Puzzle.get_puzzle
+
+    def mock_get_puzzle_at_version(*args, **kwargs):
+        puzzle = get_puzzle(*args, **kwargs)
+        puzzle.version = 2
+        return puzzle
+
+    monkeypatch.setattr(Puzzle, 'get_puzzle', mock_get_puzzle_at_version)
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'puzzle_id': 1})
+    client.get_received()
+
+    client.emit('resync', {'puzzle_id': 1, 'version': 0})
+    assert [event['args'][0] for event in client.get_received()] == [
+        {'puzzle_id': 1, 'version': version, 'completed': False,
+         'pieces': [{'x_coordinate': 0, 'y_coordinate': 1, 'value': version}]}
+        for version in (1, 2)
+    ]
+    client.emit('resync', {'puzzle_id': 1, 'version': 2})
+    assert client.get_received() == []
+
+    journal.pop(0)
+    monkeypatch.setattr(Puzzle, 'rebuild_board',
+                        lambda self, version=None: [[None] * 9 for _ in range(9)])
+    client.emit('resync', {'puzzle_id': 1, 'version': 0})
+    assert [event['args'][0] for event in client.get_received()] == [
+        {'puzzle_id': 1, 'version': 2, 'completed': False, 'from_version': 0,
+         'pieces': [{'x_coordinate': 1, 'y_coordinate': 1, 'value': 3}]}
+    ]
+
+    def mock_rebuild_board(self, version=None):
+        raise PuzzleException("The moves are no longer journaled.")
+
+    monkeypatch.setattr(Puzzle, 'rebuild_board', mock_rebuild_board)
+    client.emit('resync', {'puzzle_id': 1, 'version': 0})
+    assert [event['name'] for event in client.get_received()] == ['puzzle_update']
+
+
 def test_socketio_handle_message(flask_client, verification_token, mock_find_by_g_id,
                                              mock_single_puzzles_for_player):
     """
@@ -190,6 +416,17 @@ def test_socketio_handle_message(flask_client, verification_token, mock_find_by_
     ]
 
 
+def test_socketio_handle_message_not_in_room(flask_client, verification_token,
+                                             mock_find_by_g_id):
+    """
+    Test handle a message for a room that the current websocket is not in; the message
+    should not be sent.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('message', {'puzzle_id': 1, 'message': 'This is a message'})
+    assert client.get_received() == []
+
+
 def test_socketio_handle_message_missing_puzzle_id(flask_client, verification_token,
                                                    mock_find_by_g_id,
                                                    mock_single_puzzles_for_player):
@@ -205,6 +442,19 @@ def test_socketio_handle_message_missing_puzzle_id(flask_client, verification_to
     ]
 
 
+def test_socketio_handle_message_invalid_puzzle_id(flask_client, verification_token,
+                                                   mock_find_by_g_id,
+                                                   mock_single_puzzles_for_player):
+    """
+    Test handle a message with an invalid puzzle id; the message should not be sent.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'puzzle_id': 1})
+    client.get_received()
+    client.emit('message', {'puzzle_id': 'one', 'message': 'This is a message'})
+    assert client.get_received() == []
+
+
 def test_socketio_handle_add_lock(flask_client, verification_token, mock_find_by_g_id,
                                              mock_single_puzzles_for_player):
     """
@@ -239,20 +489,106 @@ def test_socketio_handle_lock_missing_puzzle_id(flask_client, verification_token
 def test_socketio_handle_remove_lock(flask_client, verification_token, mock_find_by_g_id,
                                              mock_single_puzzles_for_player):
     """
-    Test handle re-emitting a remove lock event in a room that the current websocket is in.
+    Test handle re-emitting a remove lock event in a room that the current websocket is in,
+    for a lock that the websocket holds.
     """
     client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
     client.emit('join', {'token': 'X', 'puzzle_id': 1})
+    client.emit('add_lock', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 5})
     client.emit('remove_lock', {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 5})
     recvd = client.get_received()
     assert recvd == [
         {'name': 'player_joined', 'args': [{'msg': 'Player joined room 1'}], 'namespace': '/'},
+        {'name': 'lock_update_add', 'args': [
+            {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 5}
+        ], 'namespace': '/'},
         {'name': 'lock_update_remove', 'args': [
             {'puzzle_id': 1, 'x_coordinate': 1, 'y_coordinate': 5}
         ], 'namespace': '/'}
     ]
 
 
+def test_socketio_handle_remove_lock_not_held(flask_client, verification_token,
+                                              mock_find_by_g_id, mock_single_puzzles_for_player):
+    """
+    Test handle a remove lock event for a lock that the current websocket does not hold;
+    nothing should be routed to the room.
+    """
+    client = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    client.emit('join', {'token': 'X', 'puzzle_id': 1})
+    client.emit('remove_lock', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 5})
+    recvd = client.get_received()
+    assert recvd == [
+        {'name': 'player_joined', 'args': [{'msg': 'Player joined room 1'}], 'namespace': '/'}
+    ]
+
+
+def test_socketio_locks_between_clients(flask_client, verification_token, mock_find_by_g_id,
+                                        mock_single_puzzles_for_player, mock_update_piece):
+    """
+    Test that a piece locked by one websocket cannot be locked or changed by another, that
+    a websocket joining later gets the current locks, and that the locks of a websocket are
+    released when it disconnects.
+    """
+    first = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    first.emit('join', {'token': 'X', 'puzzle_id': 1})
+    ack = first.emit('add_lock', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3,
+                                  'player': {'id': 1}}, callback=True)
+    assert ack == {'locked': True}
+
+    second = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    ack = second.emit('join', {'token': 'X', 'puzzle_id': 1}, callback=True)
+    assert ack == {'locks': [
+        {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3, 'player': {'id': 1}}
+    ]}
+    ack = second.emit('add_lock', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3},
+                      callback=True)
+    assert ack == {'locked': False, 'player': {'id': 1}}
+    ack = second.emit('move', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3,
+                               'value': 4}, callback=True)
+    assert ack == {'error': 'Piece (2, 3) is locked by another player.'}
+    ack = first.emit('move', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3,
+                              'value': 4}, callback=True)
+    assert ack == {'version': 7, 'completed': False}
+    second.get_received()
+
+    first.disconnect()
+    assert second.get_received() == [
+        {'name': 'lock_update_remove', 'args': [
+            {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3}
+        ], 'namespace': '/'}
+    ]
+    assert second.emit('add_lock', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3},
+                       callback=True) == {'locked': True}
+    second.disconnect()
+
+
+def test_socketio_expired_lock_announced(monkeypatch, flask_client, verification_token,
+                                         mock_find_by_g_id, mock_single_puzzles_for_player):
+    """
+    Test that the removal of a lock whose lease expired is announced to the puzzle's room,
+    as if it had been released.
+    """
+    now = [0]
+    monkeypatch.setattr(lock_manager, 'clock', lambda: now[0])
+    first = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    first.emit('join', {'token': 'X', 'puzzle_id': 1})
+    first.emit('add_lock', {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3})
+    second = socketio.test_client(app, flask_test_client=flask_client, query_string="?auth=X")
+    second.emit('join', {'token': 'X', 'puzzle_id': 1})
+    second.get_received()
+
+    now[0] = app.config['PIECE_LOCK_LEASE']
+    assert lock_manager.reap_expired() == [(1, 2, 3)]
+    assert second.get_received() == [
+        {'name': 'lock_update_remove', 'args': [
+            {'puzzle_id': 1, 'x_coordinate': 2, 'y_coordinate': 3}
+        ], 'namespace': '/'}
+    ]
+    first.disconnect()
+    second.disconnect()
+
+
 def test_socketio_handle_remove_lock_missing_puzzle_id(flask_client, verification_token,
                                                        mock_find_by_g_id,
                                                        mock_single_puzzles_for_player):
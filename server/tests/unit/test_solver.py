@@ -0,0 +1,143 @@
+"""
+Unit tests for the Sudoku solvers.
+"""
+import pytest
+from backend.engine.board_validator import BoardValidator
+from backend.engine.solver import BitmaskSolver, PySudokuSolver, Solver, get_solver
+
+SOLUTION = [[1, 2, 3, 4],
+            [3, 4, 1, 2],
+            [2, 1, 4, 3],
+            [4, 3, 2, 1]]
+
+# puzzle with a unique solution (SOLUTION)
+UNIQUE = [[None, 2, 3, None],
+          [None, None, None, None],
+          [None, 1, None, None],
+          [4, None, None, 1]]
+
+# puzzle with exactly two solutions
+AMBIGUOUS = [[None, 2, None, None],
+             [3, None, None, 2],
+             [2, None, None, 3],
+             [None, 3, None, None]]
+
+# well-known 9x9 puzzle requiring search
+HARD = [[8, None, None, None, None, None, None, None, None],
+        [None, None, 3, 6, None, None, None, None, None],
+        [None, 7, None, None, 9, None, 2, None, None],
+        [None, 5, None, None, None, 7, None, None, None],
+        [None, None, None, None, 4, 5, 7, None, None],
+        [None, None, None, 1, None, None, None, 3, None],
+        [None, None, 1, None, None, None, None, 6, 8],
+        [None, None, 8, 5, None, None, None, 1, None],
+        [None, 9, None, None, None, None, 4, None, None]]
+
+
+def keeps_values(board, solved):
+    """Helper to check that a solved board keeps all values of the original board"""
+    return all(value in (None, solved[y][x])
+               for y, row in enumerate(board) for x, value in enumerate(row))
+
+
+def test_solve_unique():
+    """
+    A puzzle with a unique solution should be solved, without changing the puzzle.
+    """
+    board = [row[:] for row in UNIQUE]
+    assert BitmaskSolver().solve(2, board) == SOLUTION
+    assert board == UNIQUE
+
+
+def test_solve_hard():
+    """
+    Puzzles that cannot be solved with forced moves only should be solved by searching.
+    """
+    solved = BitmaskSolver().solve(3, HARD)
+    assert BoardValidator(3, solved).is_complete()
+    assert keeps_values(HARD, solved)
+
+
+def test_solve_empty_board():
+    """
+    Empty boards of every size should be solved.
+    """
+    for size in range(2, 6):
+        dimensions = size * size
+        solved = BitmaskSolver().solve(size, [[None] * dimensions for _ in range(dimensions)])
+        assert BoardValidator(size, solved).is_complete()
+
+
+def test_solve_no_solution():
+    """
+    Boards with conflicting values, or that cannot be completed, have no solution.
+    """
+    conflicting = [row[:] for row in UNIQUE]
+    conflicting[0][0] = 3
+    assert BitmaskSolver().solve(2, conflicting) is None
+
+    # the top right piece can only be 3, which is already in its column
+    stuck = [[1, 2, 4, None],
+             [None, None, None, 3],
+             [None, None, None, None],
+             [None, None, None, None]]
+    assert BitmaskSolver().count_solutions(2, stuck) == 0
+
+
+def test_count_solutions():
+    """
+    Solutions should be counted up to the limit.
+    """
+    solver = BitmaskSolver()
+    assert solver.count_solutions(2, UNIQUE) == 1
+    assert solver.count_solutions(2, AMBIGUOUS) == 2
+    assert solver.count_solutions(2, AMBIGUOUS, limit=1) == 1
+    assert solver.count_solutions(2, [[None] * 4 for _ in range(4)], limit=10) == 10
+    assert solver.count_solutions(2, SOLUTION) == 1
+
+
+def test_has_unique_solution():
+    """
+    Only puzzles with exactly one solution are unique.
+    """
+    solver = BitmaskSolver()
+    assert solver.has_unique_solution(2, UNIQUE)
+    assert solver.has_unique_solution(3, HARD)
+    assert not solver.has_unique_solution(2, AMBIGUOUS)
+
+
+def test_invalid_board():
+    """
+    Boards that do not match the size, or hold invalid values, cannot be solved.
+    """
+    with pytest.raises(ValueError):
+        BitmaskSolver().solve(3, UNIQUE)
+    with pytest.raises(ValueError):
+        BitmaskSolver().solve(2, [[5, None, None, None]] + UNIQUE[1:])
+
+
+def test_py_sudoku_solver():
+    """
+    The py-sudoku solver should solve boards, but cannot count solutions.
+    """
+    solver = PySudokuSolver()
+    assert solver.solve(2, UNIQUE) == SOLUTION
+    assert not hasattr(solver, 'count_solutions')
+
+
+def test_solver_interface():
+    """
+    Solvers must implement solve.
+    """
+    with pytest.raises(TypeError):
+        Solver()  # pylint: disable=abstract-class-instantiated
+
+
+def test_get_solver():
+    """
+    Solvers are available by name.
+    """
+    assert isinstance(get_solver(), BitmaskSolver)
+    assert isinstance(get_solver('py-sudoku'), PySudokuSolver)
+    with pytest.raises(ValueError):
+        get_solver('dancing-links')
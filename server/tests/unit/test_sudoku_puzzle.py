@@ -5,9 +5,10 @@ import pytest
 from backend import app, db
 from backend.models.sudoku_puzzle import Puzzle
 from backend.models.puzzle_pieces import PuzzlePiece
+from backend.models.puzzle_snapshot import PuzzleSnapshot
 from backend.models.puzzle_exception import PuzzleException
 from backend.config import UnitTestingConfig
-from tests.unit.mocks import MockSession
+from tests.unit.mocks import MockSession, mock_user_scores
 
 app.config.from_object(UnitTestingConfig)
 
@@ -19,6 +20,7 @@ def incomplete_puzzle():
     """
     puzzle = Puzzle(difficulty_level=0.2, size=2)
     puzzle.id = 1
+    puzzle.solution = None  # pieces are replaced below, so the generated solution does not apply
     puzzle.puzzle_pieces = [
         PuzzlePiece(1, 0, 0, value=2, static_piece=False),
         PuzzlePiece(1, 1, 0, value=4, static_piece=True),
@@ -47,6 +49,7 @@ def complete_puzzle():
     """
     puzzle = Puzzle(difficulty_level=0.2, size=2)
     puzzle.id = 1
+    puzzle.solution = None  # pieces are replaced below, so the generated solution does not apply
     puzzle.puzzle_pieces = [
         PuzzlePiece(1, 0, 0, value=2, static_piece=True),
         PuzzlePiece(1, 1, 0, value=4, static_piece=True),
@@ -77,6 +80,7 @@ def incorrect_puzzle():
     """
     puzzle = Puzzle(difficulty_level=0.2, size=2)
     puzzle.id = 1
+    puzzle.solution = None  # pieces are replaced below, so the generated solution does not apply
     puzzle.puzzle_pieces = [
         PuzzlePiece(1, 0, 0, value=2, static_piece=True),
         PuzzlePiece(1, 1, 0, value=4, static_piece=True),
@@ -390,6 +394,25 @@ def test_check_discrepancies_incomplete_puzzle(incomplete_puzzle):
     assert expected == incomplete_puzzle.compare_with_solved_board()
 
 
+def test_check_discrepancies_not_unique(incorrect_puzzle):
+    """
+    Puzzles without a unique solution should only report the pieces that break the rules.
+    """
+    incorrect_puzzle.unique_solution = False
+    expected = [
+        {'x_coordinate': 0, 'y_coordinate': 0},
+        {'x_coordinate': 0, 'y_coordinate': 1},
+        {'x_coordinate': 1, 'y_coordinate': 1},
+        {'x_coordinate': 2, 'y_coordinate': 1},
+        {'x_coordinate': 0, 'y_coordinate': 2},
+        {'x_coordinate': 1, 'y_coordinate': 2},
+        {'x_coordinate': 1, 'y_coordinate': 3},
+        {'x_coordinate': 2, 'y_coordinate': 3},
+        {'x_coordinate': 3, 'y_coordinate': 3}
+    ]
+    assert expected == incorrect_puzzle.compare_with_solved_board()
+
+
 def test_get_puzzle_none(monkeypatch):
     """
     Test the result when no puzzle with the specified id exists.
@@ -592,7 +615,7 @@ def test_update_static_piece(incomplete_puzzle):
         incomplete_puzzle.update(1, 0, 1)
 
 
-def test_update_valid_complete_puzzle(monkeypatch, incomplete_puzzle):
+def test_update_valid_complete_puzzle(monkeypatch, incomplete_puzzle, mock_user_scores):
     """
     Adding the last piece to the puzzle should result in the puzzle being marked as completed.
     """
@@ -609,13 +632,27 @@ def test_update_valid_complete_puzzle(monkeypatch, incomplete_puzzle):
     assert incomplete_puzzle.completed
 
 
-def test_set_puzzle_complete(monkeypatch, incomplete_puzzle):
+def test_set_puzzle_complete(monkeypatch, incomplete_puzzle, mock_user_scores):
+    """
+    Calling the set_puzzle_complete() method should mark the puzzle as completed, and add
+    its points to the scores of its players.
+    """
+    monkeypatch.setattr(db, "session", MockSession)
+    incomplete_puzzle.set_puzzle_complete(autocommit=True)
+    assert incomplete_puzzle.completed
+    assert mock_user_scores == [(1, 30)]
+
+
+def test_set_puzzle_complete_already_marked(monkeypatch, incomplete_puzzle, mock_user_scores):
     """
-    Calling the set_puzzle_complete() method should mark the puzzle as completed.
+    Points should not be added again if the puzzle was already marked as completed
+    (e.g., by a concurrent move).
     """
     monkeypatch.setattr(db, "session", MockSession)
+    monkeypatch.setattr(Puzzle, 'mark_completed', lambda *args: False)
     incomplete_puzzle.set_puzzle_complete(autocommit=True)
     assert incomplete_puzzle.completed
+    assert mock_user_scores == []
 
 
 def test_as_str(incomplete_puzzle):
@@ -624,14 +661,92 @@ def test_as_str(incomplete_puzzle):
                                      ' completed=False, point_value=30, size=2)'
 
 
-def test_set_puzzle_complete_empty_puzzle(monkeypatch, incomplete_puzzle):
+def test_update_conflicting_value(monkeypatch, incomplete_puzzle, mock_user_scores):
+    """
+    Filling the last pieces of the puzzle with conflicting values should not complete the
+    puzzle, and the update should report the conflict.
+    """
+    monkeypatch.setattr(db, "session", MockSession)
+    assert not incomplete_puzzle.update(2, 3, 2)
+    assert incomplete_puzzle.update(0, 2, 1)   # 1 is already in row 2 (and column 0)
+    assert not incomplete_puzzle.completed
+
+    assert not incomplete_puzzle.update(0, 2, 4)   # fixing the conflict completes the puzzle
+    assert incomplete_puzzle.completed
+
+
+def test_update_complete_without_solving(monkeypatch, incomplete_puzzle, mock_user_scores):
+    """
+    The completion check should not need to solve the puzzle.
+    """
+    def solve_mock(*args, **kwargs):
+        """the solver should not be called"""
+        raise AssertionError("Puzzle was solved")
+
+    monkeypatch.setattr(db, "session", MockSession)
+    monkeypatch.setattr('sudoku.Sudoku.solve', solve_mock)
+
+    incomplete_puzzle.update(2, 3, 2)
+    incomplete_puzzle.update(0, 2, 4)
+    assert incomplete_puzzle.completed
+
+
+def test_update_takes_snapshots(monkeypatch, incomplete_puzzle, mock_user_scores):
     """
-    Test the update method on an empty puzzle, with no pieces. This is mostly
-    to complete branch coverage, it wouldn't make much sense otherwise.
+    Updates should take a snapshot of the board every SNAPSHOT_INTERVAL moves, and when they
+    complete the puzzle.
     """
+    taken = []
     monkeypatch.setattr(db, "session", MockSession)
-    monkeypatch.setattr(Puzzle, "compare_with_solved_board", lambda x: [])
+    monkeypatch.setattr(PuzzleSnapshot, 'save',
+                        lambda snapshot: taken.append((snapshot.version, snapshot.packed_board)))
+    monkeypatch.setitem(app.config, 'SNAPSHOT_INTERVAL', 2)
 
-    incomplete_puzzle.puzzle_pieces = []
     incomplete_puzzle.update(2, 3, 2)
+    assert taken == []
+    incomplete_puzzle.update(0, 2, 1)
+    assert taken == [(2, incomplete_puzzle.get_packed_pieces())]
+    incomplete_puzzle.update(0, 2, 4)
     assert incomplete_puzzle.completed
+    assert [version for version, _ in taken] == [2, 3]
+
+
+def test_new_puzzle_stores_solution():
+    """
+    The solution of a newly generated puzzle should be stored with the puzzle, and
+    agree with all of the static pieces on the board.
+    """
+    sudoku = Puzzle(difficulty_level=0.5, size=3)
+    solution = sudoku.get_solution_as_arr()
+
+    assert len(sudoku.solution) == 81
+    for piece in sudoku.puzzle_pieces:
+        if piece.static_piece:
+            assert solution[piece.y_coordinate][piece.x_coordinate] == piece.value
+
+
+def test_get_solved_puzzle_uses_stored_solution(monkeypatch, incomplete_puzzle):
+    """
+    If the solution is stored with the puzzle, the puzzle should not be solved again.
+    """
+    def solve_mock(*args, **kwargs):
+        """the solver should not be called"""
+        raise AssertionError("Puzzle was solved again")
+
+    incomplete_puzzle.set_solution([[2, 4, 3, 1], [1, 3, 4, 2], [4, 2, 1, 3], [3, 1, 2, 4]])
+    monkeypatch.setattr('sudoku.Sudoku.solve', solve_mock)
+
+    result = incomplete_puzzle.get_solved_puzzle()
+    assert result.completed
+    assert result.get_pieces_as_arr() == [[2, 4, 3, 1], [1, 3, 4, 2], [4, 2, 1, 3], [3, 1, 2, 4]]
+
+
+def test_get_solved_puzzle_backfills_solution(incomplete_puzzle):
+    """
+    Puzzles stored without a solution should have the solution stored on first access.
+    """
+    assert incomplete_puzzle.solution is None
+    incomplete_puzzle.get_solved_puzzle()
+    assert incomplete_puzzle.get_solution_as_arr() == [
+        [2, 4, 3, 1], [1, 3, 4, 2], [4, 2, 1, 3], [3, 1, 2, 4]
+    ]
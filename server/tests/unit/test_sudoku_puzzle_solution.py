@@ -2,10 +2,10 @@
 Tests for Sudoku Puzzle Solutions resource/endpoint.
 """
 from backend.resources.sudoku_solution import SudokuPuzzleSolution
-from backend import app
+from backend import app, db
 from backend.config import UnitTestingConfig
 from flask import g
-from tests.unit.mocks import user, mock_no_puzzles_for_player, \
+from tests.unit.mocks import MockSession, user, mock_no_puzzles_for_player, \
     mock_single_puzzles_for_player, mock_get_puzzle
 
 app.config.from_object(UnitTestingConfig)
@@ -41,11 +41,13 @@ def test_sudoku_puzzles_get_solution_not_associated_2(user, mock_single_puzzles_
     assert result == expected
 
 
-def test_sudoku_puzzles_get_solution(user, mock_single_puzzles_for_player, mock_get_puzzle):
+def test_sudoku_puzzles_get_solution(monkeypatch, user, mock_single_puzzles_for_player,
+                                     mock_get_puzzle):
     """
     If a player attempts to get the solution for a puzzle that they are
     associated with, the request should succeed.
     """
+    monkeypatch.setattr(db, "session", MockSession)
     with app.app_context():
         g.user = user
         puzzle_solution_resource = SudokuPuzzleSolution()
@@ -54,6 +56,7 @@ def test_sudoku_puzzles_get_solution(user, mock_single_puzzles_for_player, mock_
     # this is just basically a deterministic board; a board with 0 static pieces
     expected = {'solved_puzzle': {'puzzle_id': None, 'completed': True, 'difficulty': 0.5,
                                   'point_value': 90,
+                                  'version': 0,
                                   'pieces': [
                                       {'x_coordinate': 0, 'y_coordinate': 0, 'static_piece': False,
                                        'value': 1},
@@ -1,20 +1,24 @@
 """
 Unit testing for sudoku resources.
 """
+from datetime import datetime
+import pytest
 from flask import g, request
 from backend import app, db
 from backend.models.player import PuzzlePlayer
-from backend.models.puzzle_exception import PuzzleException
+from backend.models.puzzle_exception import PuzzleConflict, PuzzleException
+from backend.models.puzzle_move import PuzzleMove
 from backend.models.sudoku_puzzle import Puzzle
 from backend.models.user import User
 from backend.resources.sudoku_puzzle_piece import SudokuPuzzlePiece
+from backend.resources.sudoku_puzzle_moves import SudokuPuzzleMoves
 from backend.resources.sudoku_puzzle import SudokuPuzzle, sudoku_to_dict
 from backend.resources.sudoku_puzzles import SudokuPuzzles
 from backend.resources.sudoku_player import SudokuPlayer
 from backend.config import UnitTestingConfig
 from backend.decorators import handle_cors
 from tests.unit.mocks import MockSession, user, mock_save, mock_get_puzzle, \
-    mock_single_puzzles_for_player, mock_no_puzzles_for_player
+    mock_single_puzzles_for_player, mock_no_puzzles_for_player, mock_empty_pool
 
 app.config.from_object(UnitTestingConfig)
 
@@ -62,14 +66,15 @@ def test_get_sudoku_puzzles_none(mock_no_puzzles_for_player, user):
     If there are no puzzles associated with the player, an attempt to get all puzzles should
     return nothing.
     """
-    with app.app_context():
+    with app.test_request_context('/puzzles'):
         puzzles_resource = SudokuPuzzles()
         g.user = user
         result = puzzles_resource.get()
 
     expected = {
         'message': 'No unhidden sudoku puzzles are associated with Jane Doe (id = 1)',
-        'puzzles': []
+        'puzzles': [],
+        'next_cursor': None
     }
     assert result == expected
 
@@ -81,18 +86,18 @@ def test_get_sudoku_puzzles_one(monkeypatch, user, mock_get_puzzle):
     """
     def mock_get_puzzles_for_player(*args, **kwargs):
         """Helper mock"""
-        return [PuzzlePlayer(player_id=5, puzzle_id=3)]
+        return [Puzzle.get_puzzle(3)]
 
-    def mock_get_players(*args, **kwargs):
+    def mock_get_players(puzzle_ids):
         """Helper mock"""
-        return [
+        return {puzzle_id: [
             User(first_name='Sally', last_name='Sue', email='sallysue@emails.com', g_id='123445')
-        ]
+        ] for puzzle_id in puzzle_ids}
 
-    monkeypatch.setattr(PuzzlePlayer, 'find_all_puzzles_for_player', mock_get_puzzles_for_player)
-    monkeypatch.setattr(PuzzlePlayer, 'find_players_for_puzzle', mock_get_players)
+    monkeypatch.setattr(PuzzlePlayer, 'find_puzzles_for_player', mock_get_puzzles_for_player)
+    monkeypatch.setattr(PuzzlePlayer, 'find_players_for_puzzles', mock_get_players)
 
-    with app.app_context():
+    with app.test_request_context('/puzzles'):
         g.user = user
         puzzles_resource = SudokuPuzzles()
         result = puzzles_resource.get()
@@ -103,6 +108,7 @@ def test_get_sudoku_puzzles_one(monkeypatch, user, mock_get_puzzle):
              'completed': False,
              'difficulty': 0.5,
              'point_value': 90,
+             'version': 0,
              'pieces': [
                  {'x_coordinate': 0, 'y_coordinate': 1, 'static_piece': False, 'value': None},
                  {'x_coordinate': 1, 'y_coordinate': 1, 'static_piece': True, 'value': 3}
@@ -114,7 +120,8 @@ def test_get_sudoku_puzzles_one(monkeypatch, user, mock_get_puzzle):
                   'email': 'sallysue@emails.com'}
              ]
              }
-        ]
+        ],
+        'next_cursor': None
     }
     assert result == expected
 
@@ -126,21 +133,21 @@ def test_get_sudoku_puzzles_many(monkeypatch, user, mock_get_puzzle):
     """
     def mock_get_puzzles_for_player_duo(*args, **kwargs):
         """Mock get player puzzles"""
-        return [PuzzlePlayer(player_id=5, puzzle_id=3), PuzzlePlayer(player_id=5, puzzle_id=4)]
+        return [Puzzle.get_puzzle(3), Puzzle.get_puzzle(4)]
 
-    def mock_get_players_duo(*args, **kwargs):
-        """Mock get players as Users"""
-        return [
+    def mock_get_players_duo(puzzle_ids):
+        """Mock get players as Users, for each puzzle"""
+        return {puzzle_id: [
             User(first_name='Sally', last_name='Sue', email='sallysue@emails.com', g_id='123445'),
             User(first_name='Joe', last_name='Smith', email='joesmith@emails.com', g_id='123466')
-        ]
+        ] for puzzle_id in puzzle_ids}
 
-    monkeypatch.setattr(PuzzlePlayer, 'find_all_puzzles_for_player',
+    monkeypatch.setattr(PuzzlePlayer, 'find_puzzles_for_player',
                         mock_get_puzzles_for_player_duo)
-    monkeypatch.setattr(PuzzlePlayer, 'find_players_for_puzzle',
+    monkeypatch.setattr(PuzzlePlayer, 'find_players_for_puzzles',
                         mock_get_players_duo)
 
-    with app.app_context():
+    with app.test_request_context('/puzzles'):
         g.user = user
         puzzles_resource = SudokuPuzzles()
         result = puzzles_resource.get()
@@ -152,6 +159,7 @@ def test_get_sudoku_puzzles_many(monkeypatch, user, mock_get_puzzle):
                 'completed': False,
                 'difficulty': 0.5,
                 'point_value': 90,
+                'version': 0,
                 'pieces': [
                     {'x_coordinate': 0, 'y_coordinate': 1, 'static_piece': False, 'value': None},
                     {'x_coordinate': 1, 'y_coordinate': 1, 'static_piece': True, 'value': 3}
@@ -168,6 +176,7 @@ def test_get_sudoku_puzzles_many(monkeypatch, user, mock_get_puzzle):
                 'completed': False,
                 'difficulty': 0.5,
                 'point_value': 90,
+                'version': 0,
                 'pieces': [
                     {'x_coordinate': 0, 'y_coordinate': 1, 'static_piece': False, 'value': None},
                     {'x_coordinate': 1, 'y_coordinate': 1, 'static_piece': True, 'value': 3}
@@ -179,12 +188,65 @@ def test_get_sudoku_puzzles_many(monkeypatch, user, mock_get_puzzle):
                      'email': 'joesmith@emails.com'}
                 ]
             }
-        ]
+        ],
+        'next_cursor': None
     }
     assert result == expected
 
 
-def test_sudoku_puzzles_create_known_exception(monkeypatch, user, mock_save):
+def test_get_sudoku_puzzles_page(monkeypatch, user):
+    """
+    Puzzles should be returned in pages, as summaries if requested; the next cursor is
+    the id of the last puzzle returned, if there are more puzzles.
+    """
+    requests = []
+
+    def mock_get_puzzles_for_player(*args, **kwargs):
+        """Mock get player puzzles, returning one more puzzle than the page size"""
+        requests.append(kwargs)
+        puzzles = []
+        for puzzle_id in range(4, 4 + kwargs['limit']):
+            puzzle = Puzzle(difficulty_level=0.5, size=2, board=[[None] * 4] * 4)
+            puzzle.id = puzzle_id
+            puzzles.append(puzzle)
+        return puzzles
+
+    monkeypatch.setattr(PuzzlePlayer, 'find_puzzles_for_player', mock_get_puzzles_for_player)
+    monkeypatch.setattr(PuzzlePlayer, 'find_players_for_puzzles',
+                        lambda puzzle_ids: {puzzle_id: [] for puzzle_id in puzzle_ids})
+
+    with app.test_request_context('/puzzles?cursor=3&limit=2&fields=summary&completed=false'
+                                  '&size=2&difficulty=0.5'):
+        g.user = user
+        result = SudokuPuzzles().get()
+
+    assert requests == [{'hidden': False, 'after_id': 3, 'limit': 3, 'load_pieces': False,
+                         'completed': False, 'size': 2, 'difficulty': 0.5}]
+    assert result == {
+        'puzzles': [
+            {'puzzle_id': 4, 'completed': False, 'difficulty': 0.5, 'point_value': 70,
+             'version': 0},
+            {'puzzle_id': 5, 'completed': False, 'difficulty': 0.5, 'point_value': 70,
+             'version': 0}
+        ],
+        'next_cursor': 5
+    }
+
+
+@pytest.mark.parametrize('limit', [0, -1, 101])
+def test_get_sudoku_puzzles_invalid_limit(user, limit):
+    """
+    The number of puzzles per page must be within the allowed range.
+    """
+    with app.test_request_context(f'/puzzles?limit={limit}'):
+        g.user = user
+        result = SudokuPuzzles().get()
+
+    assert result == ({'message': 'Failed to get Sudoku puzzles',
+                       'reason': f'The limit must range between 1 and 100. Got {limit}.'}, 400)
+
+
+def test_sudoku_puzzles_create_known_exception(monkeypatch, user, mock_save, mock_empty_pool):
     """
     If a known exception (Puzzle Exception) is raised during the processing
     of the request, the response should follow an expected format.
@@ -209,8 +271,9 @@ def test_sudoku_puzzles_create_known_exception(monkeypatch, user, mock_save):
                 'additional_players': ['johnsmith@js.com']
             }
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
-    monkeypatch.setattr(PuzzlePlayer, 'save', raise_known_exception)
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
+    monkeypatch.setattr(User, 'find_users_by_email', lambda emails: ([], emails))
+    monkeypatch.setattr(PuzzlePlayer, 'add_players_to_new_puzzle', raise_known_exception)
 
     with app.app_context():
         g.user = user
@@ -223,7 +286,8 @@ def test_sudoku_puzzles_create_known_exception(monkeypatch, user, mock_save):
     assert result == expected
 
 
-def test_get_sudoku_puzzles_create_one_unknown_exception(monkeypatch, user, mock_save):
+def test_get_sudoku_puzzles_create_one_unknown_exception(monkeypatch, user, mock_save,
+                                                         mock_empty_pool):
     """
     If an unknown exception (Puzzle Exception) is raised during the
     processing of the request, the response should follow an expected format.
@@ -249,8 +313,9 @@ def test_get_sudoku_puzzles_create_one_unknown_exception(monkeypatch, user, mock
                 'additional_players': ['johnsmith@js.com']
             }
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
-    monkeypatch.setattr(PuzzlePlayer, 'save', raise_exception)
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
+    monkeypatch.setattr(User, 'find_users_by_email', lambda emails: ([], emails))
+    monkeypatch.setattr(PuzzlePlayer, 'add_players_to_new_puzzle', raise_exception)
 
     with app.app_context():
         g.user = user
@@ -262,7 +327,7 @@ def test_get_sudoku_puzzles_create_one_unknown_exception(monkeypatch, user, mock
     assert result == expected
 
 
-def test_create_puzzle_no_others(monkeypatch, user, mock_save):
+def test_create_puzzle_no_others(monkeypatch, user, mock_save, mock_empty_pool):
     """
     A valid request to create a puzzle should be successful.
     """
@@ -281,7 +346,7 @@ def test_create_puzzle_no_others(monkeypatch, user, mock_save):
                 'size': 5
             }
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
     monkeypatch.setattr(db, "session", MockSession)
 
     with app.app_context():
@@ -300,7 +365,7 @@ def test_create_puzzle_no_others(monkeypatch, user, mock_save):
     assert result == expected
 
 
-def test_create_puzzle_unregistered_other(monkeypatch, user, mock_save):
+def test_create_puzzle_unregistered_other(monkeypatch, user, mock_save, mock_empty_pool):
     """
     A valid request to create a puzzle should be successful.
     """
@@ -324,7 +389,7 @@ def test_create_puzzle_unregistered_other(monkeypatch, user, mock_save):
         """Helper mock"""
         return [], ['johnsmith@js.com']
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
     monkeypatch.setattr(db, "session", MockSession)
     monkeypatch.setattr(User, "find_users_by_email", mock_find_players_by_email)
 
@@ -344,7 +409,8 @@ def test_create_puzzle_unregistered_other(monkeypatch, user, mock_save):
     assert result == expected
 
 
-def test_create_puzzle_registered_others(monkeypatch, user, mock_save):
+def test_create_puzzle_registered_others(monkeypatch, user, mock_save, mock_empty_pool,
+                                         mock_get_puzzle):
     """
     A valid request to create a puzzle should be successful.
     """
@@ -372,7 +438,7 @@ def test_create_puzzle_registered_others(monkeypatch, user, mock_save):
         user3 = User(g_id='444', first_name="Dan", last_name="Doe", email='revere@independence.com')
         return [user1, user2, user3], []
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
     monkeypatch.setattr(db, "session", MockSession)
     monkeypatch.setattr(User, "find_users_by_email", mock_find_players_by_email)
     monkeypatch.setattr(PuzzlePlayer, "find_players_for_puzzle", lambda x: [user])
@@ -393,7 +459,8 @@ def test_create_puzzle_registered_others(monkeypatch, user, mock_save):
     assert result == expected
 
 
-def test_create_puzzle_registered_duplicates(monkeypatch, user, mock_save):
+def test_create_puzzle_registered_duplicates(monkeypatch, user, mock_save, mock_empty_pool,
+                                             mock_get_puzzle):
     """
     A valid request to create a puzzle should be successful. If there are duplicate
     users specified in additional players, system should process only distinct values.
@@ -418,7 +485,7 @@ def test_create_puzzle_registered_duplicates(monkeypatch, user, mock_save):
         user1 = User(g_id='923423', first_name="Jane", last_name="Doe", email='johnsmith@js.com')
         return [user1], ['paulrevere@independence.com']
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
     monkeypatch.setattr(db, "session", MockSession)
     monkeypatch.setattr(User, "find_users_by_email", mock_find_players_by_email)
     monkeypatch.setattr(PuzzlePlayer, "find_players_for_puzzle", lambda x: [user])
@@ -439,7 +506,8 @@ def test_create_puzzle_registered_duplicates(monkeypatch, user, mock_save):
     assert result == expected
 
 
-def test_create_puzzle_self_added_as_additional_player(monkeypatch, user, mock_save):
+def test_create_puzzle_self_added_as_additional_player(monkeypatch, user, mock_save,
+                                                       mock_empty_pool):
     """
     A valid request to create a puzzle should be successful. If the username of
     the person is specified (it does not need to be), it should not be considered
@@ -463,7 +531,7 @@ def test_create_puzzle_self_added_as_additional_player(monkeypatch, user, mock_s
         """Helper mock"""
         return [user], []
 
-    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x: None)  # to speed up tests
+    monkeypatch.setattr(Puzzle, 'set_pieces', lambda x, time_budget=None: None)  # to speed up tests
     monkeypatch.setattr(db, "session", MockSession)
     monkeypatch.setattr(User, "find_users_by_email", mock_find_players_by_email)
     monkeypatch.setattr(PuzzlePlayer, "find_players_for_puzzle", lambda x: [user])
@@ -636,10 +704,10 @@ def test_get_sudoku_puzzle_none_associated(monkeypatch, user):
     If an attempt is made to a get a puzzle that is not associated with
     the user, the response should provide an alert that the puzzle is not accessible to them.
     """
-    def mock_get_puzzles_for_player(*args, **kwargs):
-        return [PuzzlePlayer(3, 2)]
+    def mock_find_player_puzzle(player_id, puzzle_id):
+        return PuzzlePlayer(3, 2) if (player_id, puzzle_id) == (3, 2) else None
 
-    monkeypatch.setattr(PuzzlePlayer, 'find_all_puzzles_for_player', mock_get_puzzles_for_player)
+    monkeypatch.setattr(PuzzlePlayer, 'find_player_puzzle', mock_find_player_puzzle)
 
     with app.app_context():
         puzzles_resource = SudokuPuzzle()
@@ -670,6 +738,7 @@ def test_get_sudoku_puzzle_found(monkeypatch, mock_get_puzzle, mock_single_puzzl
         result = puzzles_resource.get(1)
 
     expected = {'puzzle_id': None, 'completed': False, 'difficulty': 0.5, 'point_value': 90,
+                'version': 0,
                 'pieces': [
                     {'x_coordinate': 0, 'y_coordinate': 1, 'static_piece': False, 'value': None},
                     {'x_coordinate': 1, 'y_coordinate': 1, 'static_piece': True, 'value': 3}],
@@ -841,6 +910,51 @@ def test_sudoku_puzzles_add_move_success(monkeypatch, user, mock_single_puzzles_
     assert result == expected
 
 
+def test_sudoku_puzzles_add_move_conflict(monkeypatch, user, mock_single_puzzles_for_player):
+    """
+    If a player attempts to make a move against an older version of the puzzle, the attempt
+    should fail with the current version of the puzzle and value of the piece.
+    """
+    class MockParser:
+        """
+        Mock the parsing function of the endpoint.
+        """
+        def add_argument(self, *args, **kwargs):
+            """
+            Mock add argument, do nothing.
+            """
+            return
+
+        def parse_args(self):
+            """
+            Mock the parsing function by returning known dict
+            """
+            return {
+                'x_coordinate': 0,
+                'y_coordinate': 1,
+                'value': 1,
+                'version': 2
+            }
+
+    def mock_update_piece(*args, **kwargs):
+        raise PuzzleConflict('The puzzle was changed.', 3, 0, 1, 4)
+
+    monkeypatch.setattr(Puzzle, 'update_piece', mock_update_piece)
+
+    with app.app_context():
+        g.user = user
+        puzzle_piece_resource = SudokuPuzzlePiece()
+        puzzle_piece_resource.parser = MockParser()
+        result = puzzle_piece_resource.post(1)
+
+    expected = ({'message': 'Attempt to save 1 at (0, 1) on puzzle_id 1 by user '
+                            'Jane Doe (id = 1) was unsuccessful',
+                 'reason': 'The puzzle was changed.',
+                 'version': 3,
+                 'piece': {'x_coordinate': 0, 'y_coordinate': 1, 'value': 4}}, 409)
+    assert result == expected
+
+
 def test_get_sudoku_puzzles_add_position_invalid(monkeypatch, user, mock_single_puzzles_for_player,
                                              mock_get_puzzle):
     """
@@ -1081,3 +1195,80 @@ def test_get_sudoku_puzzles_delete_piece_exception(monkeypatch, user,
 
     expected = ({'message': 'Unexpected error occurred while deleting value from puzzle'}, 500)
     assert result == expected
+
+
+class MockMovesParser:
+    """ Mock the parsing function of the moves endpoint."""
+    def __init__(self, since, limit=None):
+        self.args = {'since': since, 'limit': limit}
+
+    def parse_args(self):
+        """ Mock the parsing function by returning known dict """
+        return self.args
+
+
+def test_get_puzzle_moves_not_associated(user, mock_no_puzzles_for_player):
+    """
+    If a player requests the moves of a puzzle they are not associated with, the request
+    should fail.
+    """
+    with app.app_context():
+        g.user = user
+        moves_resource = SudokuPuzzleMoves()
+        moves_resource.parser = MockMovesParser(since=0)
+        result = moves_resource.get(2)
+
+    assert result == ({'message': "Puzzle requested does not exist or is not associated "
+                                  "with user Jane Doe (id = 1)"}, 404)
+
+
+def test_get_puzzle_moves_bad_limit(user, mock_single_puzzles_for_player):
+    """
+    The number of moves requested must range from 1 to the maximum page size.
+    """
+    with app.app_context():
+        g.user = user
+        moves_resource = SudokuPuzzleMoves()
+        moves_resource.parser = MockMovesParser(since=0, limit=0)
+        result = moves_resource.get(1)
+
+    assert result == ({'message': 'Failed to get the moves of the puzzle',
+                       'reason': 'The limit must range between 1 and 1000. Got 0.'}, 400)
+
+
+def test_get_puzzle_moves(monkeypatch, user, mock_single_puzzles_for_player, mock_get_puzzle):
+    """
+    The moves made since a version should be returned one page at a time; the request should
+    fail if some of the moves are missing from the journal.
+    """
+    journal = [PuzzleMove(1, version, 0, 1, version - 1 or None, version)
+               for version in (1, 2, 3)]
+    for move in journal:
+        move.player_id, move.created_at = 1, datetime(2020, 11, 3)
+    monkeypatch.setattr(PuzzleMove, 'find_moves_since', lambda puzzle_id, version, limit=None:
+                        [move for move in journal if move.version > version][:limit])
+    get_puzzle = Puzzle.get_puzzle
+
+    def mock_get_puzzle_at_version(*args, **kwargs):
+        puzzle = get_puzzle(*args, **kwargs)
+        puzzle.version = 3
+        return puzzle
+
+    monkeypatch.setattr(Puzzle, 'get_puzzle', mock_get_puzzle_at_version)
+    with app.app_context():
+        g.user = user
+        moves_resource = SudokuPuzzleMoves()
+        moves_resource.parser = MockMovesParser(since=1, limit=1)
+        result = moves_resource.get(1)
+        moves_resource.parser = MockMovesParser(since=4)
+        too_recent = moves_resource.get(1)
+        journal.pop(0)
+        moves_resource.parser = MockMovesParser(since=0)
+        not_journaled = moves_resource.get(1)
+
+    assert result == {'puzzle_id': 1, 'version': 3, 'completed': False, 'next_since': 2,
+                      'moves': [{'version': 2, 'player_id': 1, 'x_coordinate': 0,
+                                 'y_coordinate': 1, 'old_value': 1, 'new_value': 2,
+                                 'created_at': '2020-11-03T00:00:00'}]}
+    assert too_recent[1] == 400
+    assert not_journaled[1] == 410
@@ -0,0 +1,142 @@
+"""
+Unit tests for the cache of token validations.
+"""
+from backend import app, token_cache
+from backend.config import UnitTestingConfig
+from backend.google_auth import GoogleAuth
+from backend.resources.authentication import is_valid_token
+from backend.token_cache import TokenCache
+
+app.config.from_object(UnitTestingConfig)
+
+VALID = {"user_id": "103207743267402488580", "expires_in": 3590}
+REJECTED = {"error": "invalid_token", "error_description": "Invalid Value"}
+
+
+class MockApp:
+    """
+    Mock app, holding only the configuration of the cache.
+    """
+    def __init__(self, size=3, max_ttl=300, negative_ttl=30):
+        self.config = {'TOKEN_CACHE_SIZE': size, 'TOKEN_CACHE_MAX_TTL': max_ttl,
+                       'TOKEN_CACHE_NEGATIVE_TTL': negative_ttl}
+
+
+class MockClock:
+    """
+    Clock that only moves when told to.
+    """
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_and_miss():
+    """
+    Cached validations should be returned, and counted as hits; others as misses.
+    """
+    cache = TokenCache(MockApp())
+    assert cache.get('token') is None
+    cache.put('token', VALID)
+    assert cache.get('token') == VALID
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+
+def test_cache_key_is_hash():
+    """
+    Tokens should not be kept by the cache; only their hash.
+    """
+    cache = TokenCache(MockApp())
+    cache.put('secret-token', VALID)
+    assert 'secret-token' not in cache.entries
+    assert TokenCache.get_key('secret-token') in cache.entries
+    assert len(TokenCache.get_key('secret-token')) == 64
+
+
+def test_cache_expiry():
+    """
+    Valid tokens should be cached until they expire, up to the maximum TTL.
+    """
+    clock = MockClock()
+    cache = TokenCache(MockApp(max_ttl=300), clock=clock)
+    cache.put('short', {"user_id": "1", "expires_in": 10})
+    cache.put('long', VALID)
+
+    clock.now = 11
+    assert cache.get('short') is None
+    assert cache.get('long') == VALID
+
+    clock.now = 301
+    assert cache.get('long') is None
+    assert cache.stats()['size'] == 0
+
+
+def test_cache_negative():
+    """
+    Rejected tokens should be cached for the negative TTL.
+    """
+    clock = MockClock()
+    cache = TokenCache(MockApp(negative_ttl=30), clock=clock)
+    cache.put('token', REJECTED)
+    assert cache.get('token') == REJECTED
+    clock.now = 31
+    assert cache.get('token') is None
+
+
+def test_cache_no_expiry():
+    """
+    Validations without a (valid) expiry should not be cached.
+    """
+    cache = TokenCache(MockApp())
+    cache.put('missing', {"user_id": "1"})
+    cache.put('invalid', {"user_id": "1", "expires_in": "soon"})
+    cache.put('expired', {"user_id": "1", "expires_in": 0})
+    assert cache.stats()['size'] == 0
+
+
+def test_cache_lru_eviction():
+    """
+    The least recently used token should be evicted once the cache is full.
+    """
+    cache = TokenCache(MockApp(size=2))
+    cache.put('first', VALID)
+    cache.put('second', VALID)
+    cache.get('first')
+    cache.put('third', VALID)
+    assert cache.get('second') is None
+    assert cache.get('first') == VALID
+    assert cache.get('third') == VALID
+
+
+def test_cache_disabled():
+    """
+    Nothing should be cached with a cache size of 0.
+    """
+    cache = TokenCache(MockApp(size=0))
+    cache.put('token', VALID)
+    assert cache.get('token') is None
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0}
+
+
+def test_is_valid_token_cached(monkeypatch):
+    """
+    Tokens should only be validated with Google the first time they are seen.
+    """
+    calls = []
+
+    def mock_validate_token(self, token):
+        calls.append(token)
+        return REJECTED if token == 'bad' else VALID
+
+    monkeypatch.setattr(GoogleAuth, 'validate_token', mock_validate_token)
+    monkeypatch.setitem(app.config, 'TOKEN_CACHE_SIZE', 10)
+    try:
+        assert is_valid_token('good') == (True, VALID)
+        assert is_valid_token('good') == (True, VALID)
+        assert is_valid_token('bad') == (False, REJECTED)
+        assert is_valid_token('bad') == (False, REJECTED)
+        assert calls == ['good', 'bad']
+    finally:
+        token_cache.clear()
@@ -90,22 +90,56 @@ def test_find_users_by_email_none():
     assert User.find_users_by_email([]) == ([], [])
 
 
+def mock_email_query(monkeypatch, users):
+    """
+    Mock the database with a base query whose results are the given users.
+    """
+    class MockBaseQuery:
+        """
+        Mock instance of Sqlachelmy base query
+        """
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def filter(self, *args, **kwargs):
+            """Mock filter method"""
+            return self
+
+        def order_by(self, *args, **kwargs):
+            """Mock order by method, returns the results"""
+            return iter(users)
+
+    monkeypatch.setattr('flask_sqlalchemy._QueryProperty.__get__', MockBaseQuery)
+
+
 def test_find_users_by_email_one_found(monkeypatch, user):
     """
     Test method when additional email provided, and one found in database.
     """
-    monkeypatch.setattr(User, "find_by_email", lambda x: user)
-    assert User.find_users_by_email(['atestemail@emails.com']) == ([user], [])
+    mock_email_query(monkeypatch, [user])
+    assert User.find_users_by_email(['mmf2171@columbia.edu']) == ([user], [])
 
 
 def test_find_users_by_email_none_found(monkeypatch):
     """
     Test method when additional email provided, but not found in database.
     """
-    monkeypatch.setattr(User, "find_by_email", lambda x: None)
+    mock_email_query(monkeypatch, [])
     assert User.find_users_by_email(['atestemail@emails.com']) == ([], ['atestemail@emails.com'])
 
 
+def test_find_users_by_email_some_found(monkeypatch, user):
+    """
+    Test method when several emails are provided, looked up with a single query; users
+    and emails not found should be returned in the order of the given emails.
+    """
+    other = User('54321', 'Foo', 'Bar', 'foobar@emails.com')
+    mock_email_query(monkeypatch, [other, user])
+    emails = ['mmf2171@columbia.edu', 'nobody@emails.com', 'foobar@emails.com', 'a@emails.com']
+    assert User.find_users_by_email(emails) == \
+        ([user, other], ['nobody@emails.com', 'a@emails.com'])
+
+
 def test_get_email(monkeypatch, user):
     """
     Mock the base query class and call the get_email() function.